@@ -0,0 +1,36 @@
+"""add job run queue lease
+
+Revision ID: 3b8c1f0a9d2e
+Revises: 7f7dd438ee76
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8c1f0a9d2e'
+down_revision: Union[str, Sequence[str], None] = '7f7dd438ee76'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('run_requested_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs', sa.Column('lease_owner', sa.String(length=128), nullable=True))
+    op.add_column('jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs', sa.Column('run_attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index(op.f('ix_jobs_run_requested_at'), 'jobs', ['run_requested_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_jobs_run_requested_at'), table_name='jobs')
+    op.drop_column('jobs', 'run_attempts')
+    op.drop_column('jobs', 'lease_expires_at')
+    op.drop_column('jobs', 'lease_owner')
+    op.drop_column('jobs', 'run_requested_at')
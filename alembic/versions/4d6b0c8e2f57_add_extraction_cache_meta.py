@@ -0,0 +1,30 @@
+"""add extraction cache meta
+
+Revision ID: 4d6b0c8e2f57
+Revises: e2f7a90b61c4
+Create Date: 2026-10-17 15:42:10.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d6b0c8e2f57'
+down_revision: Union[str, Sequence[str], None] = 'e2f7a90b61c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('extraction_cache') as batch_op:
+        batch_op.add_column(sa.Column('meta', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('extraction_cache') as batch_op:
+        batch_op.drop_column('meta')
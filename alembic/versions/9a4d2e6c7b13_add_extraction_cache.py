@@ -0,0 +1,41 @@
+"""add extraction cache
+
+Revision ID: 9a4d2e6c7b13
+Revises: 3b8c1f0a9d2e
+Create Date: 2026-10-17 11:03:52.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d2e6c7b13'
+down_revision: Union[str, Sequence[str], None] = '3b8c1f0a9d2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('extraction_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('schema_id', sa.String(length=128), nullable=False),
+    sa.Column('pipeline_id', sa.String(length=128), nullable=False),
+    sa.Column('model', sa.String(length=128), nullable=False),
+    sa.Column('prompt_version', sa.String(length=32), nullable=False),
+    sa.Column('fields', sa.JSON(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_hit_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_extraction_cache_last_hit_at'), 'extraction_cache', ['last_hit_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_extraction_cache_last_hit_at'), table_name='extraction_cache')
+    op.drop_table('extraction_cache')
@@ -0,0 +1,28 @@
+"""index extraction cache created_at
+
+Revision ID: b7e3d5a1c942
+Revises: 4d6b0c8e2f57
+Create Date: 2026-10-17 18:20:41.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d5a1c942'
+down_revision: Union[str, Sequence[str], None] = '4d6b0c8e2f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_extraction_cache_created_at'), 'extraction_cache', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_extraction_cache_created_at'), table_name='extraction_cache')
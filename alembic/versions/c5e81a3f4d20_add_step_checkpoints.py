@@ -0,0 +1,39 @@
+"""add step checkpoints
+
+Revision ID: c5e81a3f4d20
+Revises: 9a4d2e6c7b13
+Create Date: 2026-10-17 12:20:07.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e81a3f4d20'
+down_revision: Union[str, Sequence[str], None] = '9a4d2e6c7b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('step_checkpoints',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('job_id', sa.String(length=36), nullable=False),
+    sa.Column('step_id', sa.String(length=64), nullable=False),
+    sa.Column('tool', sa.String(length=128), nullable=True),
+    sa.Column('output', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'step_id', name='uq_step_checkpoints_job_step')
+    )
+    op.create_index(op.f('ix_step_checkpoints_job_id'), 'step_checkpoints', ['job_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_step_checkpoints_job_id'), table_name='step_checkpoints')
+    op.drop_table('step_checkpoints')
@@ -0,0 +1,91 @@
+"""move job source_text to compressed documents store
+
+Revision ID: e2f7a90b61c4
+Revises: c5e81a3f4d20
+Create Date: 2026-10-17 13:41:26.730915
+
+"""
+import hashlib
+import zlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f7a90b61c4'
+down_revision: Union[str, Sequence[str], None] = 'c5e81a3f4d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+documents = sa.table(
+    'documents',
+    sa.column('sha256', sa.String),
+    sa.column('codec', sa.String),
+    sa.column('size_bytes', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime(timezone=True)),
+)
+jobs = sa.table(
+    'jobs',
+    sa.column('id', sa.String),
+    sa.column('source_text', sa.Text),
+    sa.column('content_sha256', sa.String),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('documents',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('codec', sa.String(length=16), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('jobs', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_jobs_content_sha256'), 'jobs', ['content_sha256'], unique=False)
+
+    # copy existing texts into the store (dedup by hash), one job at a time to bound memory
+    conn = op.get_bind()
+    seen: set[str] = set()
+    job_ids = conn.execute(sa.select(jobs.c.id).where(jobs.c.source_text.is_not(None))).scalars().all()
+    for job_id in job_ids:
+        text = conn.execute(sa.select(jobs.c.source_text).where(jobs.c.id == job_id)).scalar_one()
+        raw = text.encode('utf-8')
+        sha = hashlib.sha256(raw).hexdigest()
+        if sha not in seen:
+            packed = zlib.compress(raw, 6)
+            codec, data = ('zlib', packed) if len(packed) < len(raw) else ('raw', raw)
+            conn.execute(documents.insert().values(
+                sha256=sha, codec=codec, size_bytes=len(raw), data=data,
+                created_at=datetime.now(timezone.utc),
+            ))
+            seen.add(sha)
+        conn.execute(jobs.update().where(jobs.c.id == job_id).values(content_sha256=sha))
+
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('source_text')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('jobs', sa.Column('source_text', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(jobs.c.id, documents.c.codec, documents.c.data)
+        .select_from(jobs.join(documents, documents.c.sha256 == jobs.c.content_sha256))
+    )
+    for job_id, codec, data in rows.fetchall():
+        raw = zlib.decompress(data) if codec == 'zlib' else data
+        conn.execute(jobs.update().where(jobs.c.id == job_id).values(source_text=raw.decode('utf-8')))
+
+    op.drop_index(op.f('ix_jobs_content_sha256'), table_name='jobs')
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('content_sha256')
+    op.drop_table('documents')
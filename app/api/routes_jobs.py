@@ -1,26 +1,61 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import uuid
+from typing import Any, AsyncIterator, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas_artifacts import ArtifactResponse
 from app.api.schemas_events import AuditEventResponse
-from app.api.schemas_jobs import JobCreateRequest, JobResponse, JobStatusUpdateRequest
-from app.core.audit import write_audit_event
+from app.api.schemas_timeline import TimelineResponse
+from app.api.schemas_jobs import (
+    JobBatchItemResult,
+    JobBatchResponse,
+    JobCreateRequest,
+    JobResponse,
+    JobStatusUpdateRequest,
+)
+from app.core.audit import audit_event_message, write_audit_event
+from app.core.config import settings
+from app.core.events_bus import bus
+from app.core.metrics import record_transition
 from app.db.models import Artifact, AuditEvent, AuditEventType, Job, JobStatus  # <-- Artifact added
-from app.db.session import get_session
-from app.domain.job_service import set_job_status
-from app.runtime.runner import run_job
-from app.tools.init_tools import build_tool_registry
+from app.db.session import AsyncSessionLocal, get_session
+from app.domain.documents import put_document
+from app.domain.job_service import create_jobs_bulk, set_job_status
+from app.domain.state_machine import TransitionConflict
+from app.runtime.progress import PROGRESS_EVENT
+from app.runtime.queue import enqueue_job
+from app.runtime.runner import TERMINAL_STATUSES
+from app.runtime.timeline import build_timeline
+from app.runtime.worker import notify_enqueued
 
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-# Build registry once (module-level). Tools should be pure / stateless.
-tool_registry = build_tool_registry()
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+STREAM_BATCH = 200
+
+MAX_BATCH_ITEMS = 10_000
+BATCH_CHUNK = 500  # items per transaction in POST /jobs:batch
+
+# what GET /jobs/{id}/stream pushes, and the statuses that end the stream
+STREAM_EVENT_TYPES = (
+    AuditEventType.STATUS_CHANGED,
+    AuditEventType.TOOL_CALLED,
+    AuditEventType.TOOL_RESULT,
+    AuditEventType.EXECUTOR_HALTED,
+    AuditEventType.ERROR,
+)
+STREAM_EVENT_VALUES = frozenset(t.value for t in STREAM_EVENT_TYPES)
+FINAL_STATUS_VALUES = frozenset(s.value for s in TERMINAL_STATUSES | {JobStatus.CANCELLED})
 
 
 async def _ensure_job_exists(session: AsyncSession, job_id: str) -> None:
@@ -33,18 +68,18 @@ async def _ensure_job_exists(session: AsyncSession, job_id: str) -> None:
 @router.post("", response_model=JobResponse, status_code=201)
 async def create_job(req: JobCreateRequest, session: AsyncSession = Depends(get_session)):
     job_id = str(uuid.uuid4())
+    content_sha256 = await put_document(session, req.text) if req.text else None
     job = Job(
         id=job_id,
         status=JobStatus.RECEIVED,
         filename=req.filename,
         content_type=req.content_type,
-        source_text=req.text,
+        content_sha256=content_sha256,
         signals={},
     )
     session.add(job)
-    await session.commit()
-    await session.refresh(job)
 
+    # job, document and JOB_CREATED event in one commit
     await write_audit_event(
         session,
         job_id=job.id,
@@ -52,13 +87,103 @@ async def create_job(req: JobCreateRequest, session: AsyncSession = Depends(get_
         payload={
             "filename": job.filename,
             "content_type": job.content_type,
-            "has_text": bool(job.source_text),
+            "has_text": bool(job.content_sha256),
         },
     )
 
+    record_transition(job.id, JobStatus.RECEIVED.value)
     return JobResponse.model_validate(job, from_attributes=True)
 
 
+async def _batch_items(request: Request) -> AsyncIterator[Any]:
+    """Raw items of a batch body: a JSON array, or NDJSON (one object per line, read as a stream)."""
+    if "ndjson" in request.headers.get("content-type", ""):
+        buf = b""
+        async for chunk in request.stream():
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_ndjson_line(line)
+        if buf.strip():
+            yield _parse_ndjson_line(buf)
+        return
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    for item in body:
+        yield item
+
+
+def _parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"invalid JSON: {e}")
+
+
+@router.post(":batch", response_model=JobBatchResponse)
+async def create_jobs_batch(
+    request: Request,
+    run: bool = Query(False, description="also queue every created job for running"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Bulk job submission. Body: JSON array of JobCreateRequest, or NDJSON
+    (Content-Type: application/x-ndjson). Valid items are inserted with bulk
+    INSERTs, one transaction per BATCH_CHUNK items; invalid items are reported
+    per index and do not affect the rest. Items past MAX_BATCH_ITEMS are not
+    read: the response has `truncated` set and one error item at that index.
+    """
+    results: list[JobBatchItemResult] = []
+    chunk: list[tuple[int, JobCreateRequest]] = []
+
+    async def flush() -> None:
+        ids = await create_jobs_bulk(session, [req.model_dump() for _, req in chunk], enqueue=run)
+        results.extend(JobBatchItemResult(index=i, job_id=job_id) for (i, _), job_id in zip(chunk, ids))
+        chunk.clear()
+
+    index = -1
+    truncated = False
+    async for raw in _batch_items(request):
+        index += 1
+        if index >= MAX_BATCH_ITEMS:
+            # earlier chunks are already committed (and queued): report them
+            # rather than fail the request, so a retry doesn't duplicate them
+            results.append(JobBatchItemResult(
+                index=index,
+                error=f"batch exceeds {MAX_BATCH_ITEMS} items: this and later items were not read",
+            ))
+            truncated = True
+            break
+        if isinstance(raw, Exception):
+            results.append(JobBatchItemResult(index=index, error=str(raw)))
+            continue
+        try:
+            chunk.append((index, JobCreateRequest.model_validate(raw)))
+        except ValidationError as e:
+            results.append(JobBatchItemResult(index=index, error=str(e)))
+            continue
+        if len(chunk) >= BATCH_CHUNK:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    created = sum(1 for r in results if r.job_id)
+    if run and created:
+        notify_enqueued()
+
+    results.sort(key=lambda r: r.index)
+    return JobBatchResponse(
+        created=created, failed=len(results) - created, queued=run, truncated=truncated, items=results,
+    )
+
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(job_id: str, session: AsyncSession = Depends(get_session)):
     res = await session.execute(select(Job).where(Job.id == job_id))
@@ -68,24 +193,187 @@ async def get_job(job_id: str, session: AsyncSession = Depends(get_session)):
     return JobResponse.model_validate(job, from_attributes=True)
 
 
+def _ndjson_stream(stmt, schema):
+    # own session: the response outlives the request-scoped dependency session
+    async def gen():
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+            async for row in result.scalars():
+                yield schema.model_validate(row, from_attributes=True).model_dump_json() + "\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+def _page(rows, schema, response: Response, limit: int) -> list:
+    items = [schema.model_validate(r, from_attributes=True) for r in rows]
+    if len(items) == limit:
+        response.headers["X-Next-After-Id"] = str(items[-1].id)
+    return items
+
+
 @router.get("/{job_id}/events", response_model=list[AuditEventResponse])
-async def get_job_events(job_id: str, session: AsyncSession = Depends(get_session)):
+async def get_job_events(
+    job_id: str,
+    response: Response,
+    after_id: int = Query(0, ge=0, description="keyset cursor: return events with id > after_id"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT, description=f"default {DEFAULT_PAGE_LIMIT}; unlimited for ndjson"),
+    event_type: AuditEventType | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Keyset-paginated audit events. JSON pages carry X-Next-After-Id when more may follow;
+    format=ndjson streams all matching events with bounded memory.
+    """
     await _ensure_job_exists(session, job_id)
 
-    res = await session.execute(
-        select(AuditEvent).where(AuditEvent.job_id == job_id).order_by(AuditEvent.id.asc())
-    )
-    events = res.scalars().all()
-    return [AuditEventResponse.model_validate(e, from_attributes=True) for e in events]
+    stmt = select(AuditEvent).where(AuditEvent.job_id == job_id, AuditEvent.id > after_id)
+    if event_type is not None:
+        stmt = stmt.where(AuditEvent.event_type == event_type)
+    stmt = stmt.order_by(AuditEvent.id.asc())
+
+    if format == "ndjson":
+        return _ndjson_stream(stmt if limit is None else stmt.limit(limit), AuditEventResponse)
+
+    limit = limit or DEFAULT_PAGE_LIMIT
+    res = await session.execute(stmt.limit(limit))
+    return _page(res.scalars().all(), AuditEventResponse, response, limit)
 
 
 @router.get("/{job_id}/artifacts", response_model=list[ArtifactResponse])
-async def get_job_artifacts(job_id: str, session: AsyncSession = Depends(get_session)):
+async def get_job_artifacts(
+    job_id: str,
+    response: Response,
+    after_id: int = Query(0, ge=0, description="keyset cursor: return artifacts with id > after_id"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT, description=f"default {DEFAULT_PAGE_LIMIT}; unlimited for ndjson"),
+    name: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_session),
+):
+    """Keyset-paginated artifacts, optionally filtered by name (same paging contract as /events)."""
+    stmt = select(Artifact).where(Artifact.job_id == job_id, Artifact.id > after_id)
+    if name is not None:
+        stmt = stmt.where(Artifact.name == name)
+    stmt = stmt.order_by(Artifact.id.asc())
+
+    if format == "ndjson":
+        return _ndjson_stream(stmt if limit is None else stmt.limit(limit), ArtifactResponse)
+
+    limit = limit or DEFAULT_PAGE_LIMIT
+    res = await session.execute(stmt.limit(limit))
+    return _page(res.scalars().all(), ArtifactResponse, response, limit)
+
+
+@router.get("/{job_id}/timeline", response_model=TimelineResponse)
+async def get_job_timeline(job_id: str, session: AsyncSession = Depends(get_session)):
+    """Per-step spans (timing, LLM/queue time, tokens, cost units) of the job's runs, for a waterfall view."""
+    await _ensure_job_exists(session, job_id)
     res = await session.execute(
-        select(Artifact).where(Artifact.job_id == job_id).order_by(Artifact.id.asc())
+        select(AuditEvent)
+        .where(
+            AuditEvent.job_id == job_id,
+            AuditEvent.event_type.in_((AuditEventType.TOOL_RESULT, AuditEventType.ERROR)),
+        )
+        .order_by(AuditEvent.id.asc())
+    )
+    return build_timeline(job_id, res.scalars().all())
+
+
+def _sse(message: dict) -> str:
+    # transient messages (extraction progress) carry no id: they must not move Last-Event-ID
+    head = f"id: {message['id']}\n" if message.get("id") is not None else ""
+    return f"{head}event: {message['event_type']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def _stream_events_after(job_id: str, after_id: int) -> list[dict]:
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(
+            select(AuditEvent)
+            .where(
+                AuditEvent.job_id == job_id,
+                AuditEvent.id > after_id,
+                AuditEvent.event_type.in_(STREAM_EVENT_TYPES),
+            )
+            .order_by(AuditEvent.id.asc())
+        )
+        return [audit_event_message(e) for e in res.scalars().all()]
+
+
+def _is_final(message: dict) -> bool:
+    return (
+        message["event_type"] == AuditEventType.STATUS_CHANGED.value
+        and message["payload"].get("to") in FINAL_STATUS_VALUES
+    )
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Server-Sent Events of job progress (STATUS_CHANGED, TOOL_CALLED, TOOL_RESULT,
+    EXECUTOR_HALTED, ERROR). Live events come from the in-process event bus; the DB
+    is used for catch-up after Last-Event-ID and, periodically, for events written
+    by workers in other processes. The stream ends once the job reaches a final status.
+    Workers in this process also push transient `progress` events (partial extracted
+    fields); they have no id and are not replayed.
+    """
+    res = await session.execute(select(Job.status).where(Job.id == job_id))
+    status = res.scalar_one_or_none()
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def gen():
+        q = bus.subscribe(job_id)  # subscribe before catch-up: nothing falls in between
+        seen: set[int] = set()
+        db_watermark = last_event_id
+
+        async def catch_up():
+            nonlocal db_watermark
+            out = []
+            for m in await _stream_events_after(job_id, db_watermark):
+                db_watermark = m["id"]
+                if m["id"] not in seen:
+                    seen.add(m["id"])
+                    out.append(m)
+            return out
+
+        try:
+            for m in await catch_up():
+                yield _sse(m)
+                if _is_final(m):
+                    return
+            if status.value in FINAL_STATUS_VALUES:
+                return
+
+            while True:
+                try:
+                    m = await asyncio.wait_for(q.get(), timeout=settings.sse_catchup_interval_s)
+                    if m["event_type"] == PROGRESS_EVENT:
+                        yield _sse(m)
+                        continue
+                    batch = [] if m["id"] in seen or m["event_type"] not in STREAM_EVENT_VALUES else [m]
+                    for x in batch:
+                        seen.add(x["id"])
+                except asyncio.TimeoutError:
+                    batch = await catch_up()
+                    if not batch:
+                        yield ": keep-alive\n\n"
+
+                for x in batch:
+                    yield _sse(x)
+                    if _is_final(x):
+                        return
+        finally:
+            bus.unsubscribe(job_id, q)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    artifacts = res.scalars().all()
-    return [ArtifactResponse.model_validate(a, from_attributes=True) for a in artifacts]
 
 
 @router.post("/{job_id}/status", response_model=JobResponse)
@@ -94,53 +382,43 @@ async def update_job_status(
 ):
     try:
         job = await set_job_status(session, job_id=job_id, to_status=req.to_status, reason=req.reason)
+    except TransitionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     return JobResponse.model_validate(job, from_attributes=True)
 
 
-@router.post("/{job_id}/run")
-async def run_job_endpoint(job_id: str, session: AsyncSession = Depends(get_session)):
+@router.post("/{job_id}/run", status_code=202)
+async def run_job_endpoint(job_id: str, response: Response, session: AsyncSession = Depends(get_session)):
     """
-    Run is idempotent:
-    - If job already terminal, runner returns no-op payload.
-    - If policy denies a tool, we finalize job as FAILED and return 403.
-    - Any unexpected error finalizes job as FAILED to avoid leaving EXECUTING jobs around.
+    Run is asynchronous and idempotent:
+    - The job is queued and picked up by a background worker (app/runtime/worker.py).
+    - Returns 202; poll GET /jobs/{job_id} (status, run_requested_at, lease_owner) or /events.
+    - If job already terminal, returns 200 with a no-op payload.
+    - Policy denials / unexpected errors are finalized as FAILED by the worker.
     """
-    try:
-        return await run_job(session=session, job_id=job_id, tools=tool_registry)
-
-    except PermissionError as e:
-        # Policy deny must never leave the job in EXECUTING
-        try:
-            await set_job_status(session, job_id=job_id, to_status=JobStatus.FAILED, reason="policy_denied")
-        except Exception:
-            # do not mask original error if status update fails
-            pass
-
-        # Optional: audit an ERROR event for HTTP layer (runner already writes POLICY_DENIED)
-        await write_audit_event(
-            session,
-            job_id=job_id,
-            event_type=AuditEventType.ERROR,
-            payload={"error": str(e), "kind": "policy_denied"},
-        )
+    res = await session.execute(select(Job.status).where(Job.id == job_id))
+    status = res.scalar_one_or_none()
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found")
 
-        raise HTTPException(status_code=403, detail=str(e))
+    if status in TERMINAL_STATUSES:
+        response.status_code = 200
+        return {
+            "job_id": job_id,
+            "final_status": status,
+            "note": f"no-op: job already terminal ({status})",
+        }
 
-    except Exception as e:
-        # Any unexpected error: finalize status to avoid "stuck EXECUTING"
-        try:
-            await set_job_status(session, job_id=job_id, to_status=JobStatus.FAILED, reason="run_failed")
-        except Exception:
-            pass
-
-        await write_audit_event(
-            session,
-            job_id=job_id,
-            event_type=AuditEventType.ERROR,
-            payload={"error": str(e), "kind": "run_failed"},
-        )
+    queued = await enqueue_job(session, job_id=job_id)
+    notify_enqueued()
 
-        # keep default FastAPI 500 with stacktrace in logs
-        raise
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return {
+        "job_id": job_id,
+        "status": status,
+        "queued": queued,
+        "note": None if queued else "already queued or running",
+        "poll_url": f"/jobs/{job_id}",
+    }
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import REGISTRY
+from app.extraction import cache, json_repair, limiter
+from app.runtime.pricing import GLOBAL_BUDGET
+from app.runtime.retry import breaker_states
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -----------------------
+# Scrape-time collectors over the existing in-process stats
+# -----------------------
+
+
+@REGISTRY.collector
+def _extraction_cache():
+    stats = cache.STATS.snapshot()
+    yield (
+        "docops_extraction_cache_total",
+        "counter",
+        "Extraction cache lookups by result.",
+        [({"result": k}, v) for k, v in stats.items()],
+    )
+
+
+@REGISTRY.collector
+def _json_parse():
+    stats = json_repair.STATS.snapshot()
+    repairs = stats.pop("repairs")
+    yield (
+        "docops_llm_output_parse_total",
+        "counter",
+        "How model output got parsed.",
+        [({"outcome": k}, v) for k, v in stats.items()],
+    )
+    yield (
+        "docops_llm_output_repairs_total",
+        "counter",
+        "Local JSON repairs applied, by kind.",
+        [({"kind": k}, v) for k, v in repairs.items()],
+    )
+
+
+@REGISTRY.collector
+def _llm_limiters():
+    snap = limiter.snapshot()
+    gauges = (
+        ("docops_llm_inflight", "LLM calls holding a concurrency slot.", "inflight"),
+        ("docops_llm_queued", "LLM calls waiting for admission.", "queued"),
+    )
+    for name, help, key in gauges:
+        yield name, "gauge", help, [({"model": m}, s[key]) for m, s in snap.items()]
+    counters = (
+        ("docops_llm_admitted_total", "LLM calls admitted by the limiter.", "admitted"),
+        ("docops_llm_admission_timeouts_total", "LLM calls that timed out waiting for admission.", "timed_out"),
+        ("docops_llm_throttled_total", "Upstream 429 responses.", "throttled"),
+        ("docops_llm_admission_wait_seconds_total", "Total time spent waiting for admission.", "wait_s_total"),
+    )
+    for name, help, key in counters:
+        yield name, "counter", help, [({"model": m}, s[key]) for m, s in snap.items()]
+    yield (
+        "docops_llm_admission_wait_seconds",
+        "gauge",
+        "Admission wait percentiles over the recent window.",
+        [
+            ({"model": m, "quantile": q}, s[f"wait_s_p{p}"])
+            for m, s in snap.items()
+            for q, p in (("0.5", "50"), ("0.95", "95"), ("0.99", "99"))
+        ],
+    )
+
+
+@REGISTRY.collector
+def _circuit_breakers():
+    states = breaker_states()
+    yield (
+        "docops_circuit_breaker_open",
+        "gauge",
+        "Tool circuit breaker state (0 closed, 0.5 half-open, 1 open).",
+        [({"tool": t}, {"closed": 0.0, "half_open": 0.5}.get(s, 1.0)) for t, s in states.items()],
+    )
+
+
+@REGISTRY.collector
+def _global_budget():
+    yield (
+        "docops_cost_budget_spent_units",
+        "gauge",
+        "Cost units spent in the current rolling budget window.",
+        [({}, round(GLOBAL_BUDGET.spent(), 4))],
+    )
+    yield "docops_cost_budget_limit_units", "gauge", "Rolling cost budget (0: disabled).", [({}, GLOBAL_BUDGET.limit_units)]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
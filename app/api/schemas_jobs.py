@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from app.db.models import JobStatus
 
@@ -18,8 +20,26 @@ class JobResponse(BaseModel):
     schema_id: str | None = None
     error: str | None = None
     signals: dict = {}
+    # run queue: set while queued/running; lease_owner is the worker currently running it
+    run_requested_at: datetime | None = None
+    lease_owner: str | None = None
 
 
 class JobStatusUpdateRequest(BaseModel):
     to_status: JobStatus
     reason: str | None = None
+
+
+class JobBatchItemResult(BaseModel):
+    index: int
+    job_id: str | None = None
+    error: str | None = None
+
+
+class JobBatchResponse(BaseModel):
+    created: int
+    failed: int
+    queued: bool
+    # stopped at MAX_BATCH_ITEMS; items from that index on were not read
+    truncated: bool = False
+    items: list[JobBatchItemResult]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class TimelineSpan(BaseModel):
+    event_id: int
+    step_id: Optional[str] = None
+    tool: Optional[str] = None
+    outcome: str
+    cache: Optional[str] = None
+    start_ms: float
+    end_ms: float
+    duration_ms: float
+    queue_ms: float
+    llm_ms: float
+    backoff_ms: float
+    attempts: int
+    llm_calls: int
+    repair_calls: int = 0
+    tokens_in: int
+    tokens_out: int
+    cost_units: float
+
+
+class TimelineBreakdown(BaseModel):
+    wall_ms: float
+    llm_ms: float
+    queue_ms: float
+    backoff_ms: float
+    tool_ms: float
+    between_steps_ms: float
+    tokens_in: int
+    tokens_out: int
+    cost_units: float
+
+
+class TimelineResponse(BaseModel):
+    job_id: str
+    runs: int
+    total_ms: float
+    spans: List[TimelineSpan]
+    breakdown: TimelineBreakdown
@@ -1,10 +1,27 @@
 from __future__ import annotations
 from typing import Any, Dict
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.events_bus import bus
 from app.db.models import AuditEvent, AuditEventType
 
+# audit events added to a session, published to the event bus once they are committed
+_PENDING_KEY = "pending_audit_events"
+
+
+def audit_event_message(ev: AuditEvent) -> Dict[str, Any]:
+    return {
+        "id": ev.id,
+        "job_id": ev.job_id,
+        "event_type": ev.event_type.value,
+        "payload": ev.payload,
+        "created_at": ev.created_at.isoformat() if ev.created_at else None,
+    }
+
+
 async def write_audit_event(
     session: AsyncSession,
     *,
@@ -13,6 +30,20 @@ async def write_audit_event(
     payload: Dict[str, Any],
     commit: bool = True
 ) -> None:
-    session.add(AuditEvent(job_id=job_id, event_type=event_type, payload=payload))
+    ev = AuditEvent(job_id=job_id, event_type=event_type, payload=payload)
+    session.add(ev)
+    session.info.setdefault(_PENDING_KEY, []).append(ev)
     if commit:
         await session.commit()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    # only committed events are visible to subscribers (and they have ids by now)
+    for ev in session.info.pop(_PENDING_KEY, ()):
+        bus.publish(ev.job_id, audit_event_message(ev))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -4,6 +4,34 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     log_level: str = "INFO"
     database_url: str = "sqlite+aiosqlite:///./docops.db"
+    # connection pool (app/db/session.py); 0 = sized from worker_concurrency
+    db_pool_size: int = 0
+    db_max_overflow: int = 10
+
+    # Background workers (app/runtime/worker.py)
+    worker_enabled: bool = True  # run an in-process pool next to the API
+    worker_concurrency: int = 4
+    worker_poll_interval_s: float = 1.0
+    worker_lease_s: float = 60.0
+    worker_heartbeat_s: float = 15.0
+    worker_max_attempts: int = 3
+
+    # SSE job stream: DB catch-up interval (covers events written by workers in other processes)
+    sse_catchup_interval_s: float = 5.0
+
+    # Extraction result cache (app/extraction/cache.py)
+    extraction_cache_enabled: bool = True
+    extraction_cache_ttl_s: int = 7 * 24 * 3600
+    extraction_cache_max_entries: int = 50_000
+
+    # Tool circuit breakers (app/runtime/retry.py)
+    tool_breaker_failure_threshold: int = 5
+    tool_breaker_reset_s: float = 30.0
+
+    # Global spend guard (app/runtime/pricing.py): cost units (1 = $0.0001) per rolling window,
+    # per process; 0 disables
+    cost_budget_units: float = 200_000
+    cost_budget_window_s: float = 3600.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+log = logging.getLogger(__name__)
+
+QUEUE_MAXSIZE = 1000
+
+
+class EventBus:
+    """
+    In-process pub/sub of job events, keyed by job_id.
+    Subscribers get an asyncio.Queue; slow subscribers drop messages and
+    recover them from the DB (SSE catch-up), so publishing never blocks.
+    """
+
+    def __init__(self) -> None:
+        self._subs: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+        self._subs[job_id].add(q)
+        return q
+
+    def unsubscribe(self, job_id: str, q: asyncio.Queue) -> None:
+        subs = self._subs.get(job_id)
+        if subs is None:
+            return
+        subs.discard(q)
+        if not subs:
+            del self._subs[job_id]
+
+    def publish(self, job_id: str, message: Dict[str, Any]) -> None:
+        for q in self._subs.get(job_id, ()):
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                log.warning("event bus: subscriber queue full for job %s, dropping", job_id)
+
+
+bus = EventBus()
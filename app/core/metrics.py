@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# -----------------------
+# In-process metrics in the Prometheus text exposition format (GET /metrics).
+#
+# Counters and histograms are plain dicts keyed by the label values tuple;
+# recording is a dict lookup plus a few additions (no locks: everything runs
+# on the event loop). Each process exposes its own numbers: scrape every API
+# and worker process.
+# -----------------------
+
+# latency buckets, seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# long-running stages (time spent in a job status), seconds
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0, 21600.0, 86400.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+# a scrape-time collector yields (name, type, help, [(labels, value), ...])
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """with HIST.time("label"): ... observes the block's duration."""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (math.inf,)
+        for labels, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_num(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_num(cumulative)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: Histogram, labels: Tuple[str, ...]) -> None:
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Counter | Histogram] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets=buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Collector) -> Collector:
+        """Register a scrape-time source (e.g. an existing stats snapshot)."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# -----------------------
+# Application metrics
+# -----------------------
+
+TOOL_SECONDS = REGISTRY.histogram(
+    "docops_tool_call_seconds", "Duration of one tool call attempt.", ("tool", "outcome")
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "docops_llm_request_seconds", "Duration of one LLM call, after admission.", ("model", "kind", "outcome")
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "docops_llm_tokens", "Tokens used per LLM call (input + output).", ("model", "kind"), buckets=TOKEN_BUCKETS
+)
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    "docops_extraction_seconds", "Duration of a whole document extraction (all chunks).", ("schema_id",)
+)
+DB_COMMIT_SECONDS = REGISTRY.histogram(
+    "docops_db_commit_seconds", "Duration of session commits (flush + COMMIT)."
+)
+JOB_STATUS_SECONDS = REGISTRY.histogram(
+    "docops_job_status_seconds",
+    "Time a job spent in a status before leaving it (transitions seen by this process).",
+    ("status",),
+    buckets=STAGE_BUCKETS,
+)
+JOB_TRANSITIONS = REGISTRY.counter("docops_job_transitions_total", "Job status transitions.", ("to",))
+VERDICTS = REGISTRY.counter("docops_verdicts_total", "Verification verdicts.", ("domain", "verdict"))
+POLICY_DENIALS = REGISTRY.counter("docops_policy_denials_total", "Tool calls denied by policy.", ("tool",))
+COST_UNITS = REGISTRY.counter(
+    "docops_cost_units_total", "Cost units charged (tool calls + LLM usage, see app/runtime/pricing.py).", ("tool",)
+)
+BUDGET_EXCEEDED = REGISTRY.counter(
+    "docops_budget_exceeded_total", "Runs stopped by an execution limit.", ("limit",)
+)
+
+# -----------------------
+# Time in status
+# -----------------------
+
+MAX_TRACKED_JOBS = 100_000
+
+# job_id -> (status, monotonic time it was entered)
+_status_entered: Dict[str, Tuple[str, float]] = {}
+
+
+def record_transition(job_id: str, to_status: str, *, terminal: bool = False) -> None:
+    """Close the job's current status interval (if this process saw it start) and open the next."""
+    now = time.monotonic()
+    JOB_TRANSITIONS.inc(to_status)
+    entered = _status_entered.pop(job_id, None)
+    if entered is not None:
+        JOB_STATUS_SECONDS.observe(now - entered[1], entered[0])
+    if terminal:
+        return
+    if len(_status_entered) >= MAX_TRACKED_JOBS:
+        _status_entered.pop(next(iter(_status_entered)))
+    _status_entered[job_id] = (to_status, now)
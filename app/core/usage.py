@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List
+
+# -----------------------
+# Per-step resource usage.
+#
+# The executor opens a meter around each tool call (track_usage); code deep in
+# the call (the extraction engine) adds to whatever meter is current. The meter
+# lives in a ContextVar, so concurrently running steps (each its own task under
+# asyncio.gather) never see each other's numbers. Outside a step, recording is
+# a no-op.
+# -----------------------
+
+
+@dataclass
+class StepUsage:
+    # totals include repair calls, which are also counted on their own
+    llm_calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    repair_calls: int = 0
+    repair_tokens_in: int = 0
+    repair_tokens_out: int = 0
+    # time inside LLM calls (after admission) / waiting for admission by the limiter
+    llm_s: float = 0.0
+    queue_s: float = 0.0
+    # model -> [tokens_in, tokens_out] (pricing is per model, app/runtime/pricing.py)
+    by_model: Dict[str, List[int]] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_current: ContextVar[StepUsage | None] = ContextVar("step_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[StepUsage]:
+    usage = StepUsage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def record_llm_call(
+    *,
+    model: str,
+    kind: str,
+    llm_s: float,
+    queue_s: float,
+    tokens_in: int | None,
+    tokens_out: int | None,
+) -> None:
+    usage = _current.get()
+    if usage is None:
+        return
+    tokens_in, tokens_out = tokens_in or 0, tokens_out or 0
+    usage.llm_calls += 1
+    usage.llm_s += llm_s
+    usage.queue_s += queue_s
+    usage.tokens_in += tokens_in
+    usage.tokens_out += tokens_out
+    if kind == "repair":
+        usage.repair_calls += 1
+        usage.repair_tokens_in += tokens_in
+        usage.repair_tokens_out += tokens_out
+    per_model = usage.by_model.setdefault(model, [0, 0])
+    per_model[0] += tokens_in
+    per_model[1] += tokens_out
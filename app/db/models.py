@@ -3,7 +3,7 @@ from __future__ import annotations
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Enum, Text, Integer, JSON
+from sqlalchemy import String, DateTime, Enum, Text, Integer, JSON, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -40,9 +40,28 @@ class Job(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
 
-    source_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Document text lives in the content store (documents table), not in this hot row.
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     signals: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
 
+    # Run queue + lease (see app/runtime/queue.py). run_requested_at != NULL means "queued or running".
+    run_requested_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    run_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Document(Base):
+    """Content-addressed (deduplicated) document body, compressed. See app/domain/documents.py."""
+    __tablename__ = "documents"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)  # of the UTF-8 text
+    codec: Mapped[str] = mapped_column(String(16), nullable=False)  # "zlib" | "raw"
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
 
 class AuditEventType(str, enum.Enum):
     JOB_CREATED = "JOB_CREATED"
@@ -78,3 +97,39 @@ class Artifact(Base):
     payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class StepCheckpoint(Base):
+    """Completed plan step of a job run; lets a re-run resume instead of re-executing tools."""
+    __tablename__ = "step_checkpoints"
+    __table_args__ = (UniqueConstraint("job_id", "step_id", name="uq_step_checkpoints_job_step"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+
+    step_id: Mapped[str] = mapped_column(String(64), nullable=False)  # PlanStep.id
+    tool: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    output: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)  # raw tool result
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    # sha256 of (normalized text, schema_id, pipeline_id, model, prompt_version)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    schema_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    pipeline_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    model: Mapped[str] = mapped_column(String(128), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    fields: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # chunking provenance/conflicts of the cached extraction
+    meta: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # indexed for the TTL sweep
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    last_hit_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
@@ -1,14 +1,30 @@
 from __future__ import annotations
 
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import DB_COMMIT_SECONDS
+
+# Connections a busy worker can hold at once: its run session, the lease
+# heartbeat and the extraction cache. Overflow is headroom for API requests.
+CONNECTIONS_PER_WORKER = 3
+POOL_SIZE = settings.db_pool_size or max(5, settings.worker_concurrency * CONNECTIONS_PER_WORKER)
+POOL_CAPACITY = POOL_SIZE + settings.db_max_overflow
+# SQLite has a single writer: with a pool this size writers queue on the file
+# lock rather than on the pool, so give them as long as a pool checkout gets
+SQLITE_BUSY_TIMEOUT_S = 30.0
 
 engine: AsyncEngine = create_async_engine(
     settings.database_url,
     echo=False,
     future=True,
+    pool_size=POOL_SIZE,
+    max_overflow=settings.db_max_overflow,
+    connect_args={"timeout": SQLITE_BUSY_TIMEOUT_S} if settings.database_url.startswith("sqlite") else {},
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -17,6 +33,20 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+
+# commit latency (docops_db_commit_seconds); the sync Session underneath every AsyncSession
+@event.listens_for(Session, "before_commit")
+def _commit_started(session: Session) -> None:
+    session.info["commit_t0"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session: Session) -> None:
+    t0 = session.info.pop("commit_t0", None)
+    if t0 is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - t0)
+
+
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Document
+
+# -----------------------
+# Content store for job documents.
+# Text is stored once per sha256 (dedup across jobs), zlib-compressed, and only
+# loaded by the code that actually needs it (the runner) — never by job
+# listing / status polling, which only see jobs.content_sha256.
+# -----------------------
+
+COMPRESS_LEVEL = 6
+MIN_COMPRESS_BYTES = 512  # below this zlib overhead is not worth it
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _encode(raw: bytes) -> tuple[str, bytes]:
+    if len(raw) >= MIN_COMPRESS_BYTES:
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        if len(packed) < len(raw):
+            return "zlib", packed
+    return "raw", raw
+
+
+def _decode(codec: str, data: bytes) -> str:
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec != "raw":
+        raise ValueError(f"unknown document codec: {codec}")
+    return data.decode("utf-8")
+
+
+def _insert_ignore(dialect_name: str):
+    # INSERT .. ON CONFLICT DO NOTHING: concurrent uploads of the same document must not collide
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(Document).on_conflict_do_nothing(index_elements=[Document.sha256])
+
+
+async def put_documents(session: AsyncSession, texts: Iterable[str], *, commit: bool = False) -> List[str]:
+    """
+    Store texts (deduplicated) and return their sha256 ids in input order.
+    One SELECT for existing ids, one bulk INSERT for the new ones.
+    """
+    texts = list(texts)
+    shas = [content_hash(t) for t in texts]
+    if not shas:
+        return shas
+
+    unique = dict(zip(shas, texts))
+    res = await session.execute(select(Document.sha256).where(Document.sha256.in_(list(unique))))
+    existing = set(res.scalars().all())
+
+    rows = []
+    for sha, text in unique.items():
+        if sha in existing:
+            continue
+        raw = text.encode("utf-8")
+        codec, data = _encode(raw)
+        rows.append({"sha256": sha, "codec": codec, "size_bytes": len(raw), "data": data})
+
+    if rows:
+        stmt = _insert_ignore(session.get_bind().dialect.name)
+        if stmt is not None:
+            await session.execute(stmt, rows)
+        else:
+            session.add_all(Document(**r) for r in rows)
+
+    if commit:
+        await session.commit()
+    return shas
+
+
+async def put_document(session: AsyncSession, text: str, *, commit: bool = False) -> str:
+    return (await put_documents(session, [text], commit=commit))[0]
+
+
+async def get_document_text(session: AsyncSession, sha256: str | None) -> str | None:
+    if not sha256:
+        return None
+    res = await session.execute(select(Document.codec, Document.data).where(Document.sha256 == sha256))
+    row = res.one_or_none()
+    if row is None:
+        return None
+    return _decode(row.codec, row.data)
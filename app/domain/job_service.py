@@ -1,41 +1,171 @@
 from __future__ import annotations
 
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 
-from app.db.models import Job, JobStatus, AuditEventType
+from app.db.models import AuditEvent, Job, JobStatus, AuditEventType
 from app.core.audit import write_audit_event
-from app.domain.state_machine import ensure_transition_allowed
+from app.core.metrics import record_transition
+from app.domain.documents import put_documents
+from app.domain.state_machine import TransitionConflict, allowed_from, ensure_transition_allowed, is_terminal
 
 
-async def set_job_status(
+@dataclass(frozen=True)
+class TransitionResult:
+    ok: bool
+    from_status: JobStatus | None
+    to_status: JobStatus
+
+
+async def transition_job_status(
     session: AsyncSession,
     *,
     job_id: str,
     to_status: JobStatus,
+    from_status: JobStatus | None = None,
     reason: str | None = None,
-) -> Job:
-    res = await session.execute(select(Job).where(Job.id == job_id))
-    job = res.scalar_one_or_none()
-    if not job:
-        raise ValueError("job not found")
+    commit: bool = True,
+) -> TransitionResult:
+    """
+    Compare-and-swap transition: a single
+        UPDATE jobs SET status=:to WHERE id=:id AND status IN (:allowed_from)
+    with no row fetch. Pass from_status when the caller knows it (narrows the
+    CAS to exactly that status and is recorded in the audit event).
 
-    from_status = job.status
-    ensure_transition_allowed(from_status, to_status)
+    Returns ok=False on conflict (job missing, or moved by someone else).
+    Identity-mapped Job objects are NOT refreshed — callers that hold one update it themselves.
+    """
+    if from_status is not None:
+        ensure_transition_allowed(from_status, to_status)
+        expected = {from_status}
+    else:
+        expected = set(allowed_from(to_status))
 
-    job.status = to_status
-    await session.commit()
-    await session.refresh(job)
+    if not expected:
+        return TransitionResult(ok=False, from_status=from_status, to_status=to_status)
+
+    res = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(expected))
+        .values(status=to_status)
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount != 1:
+        return TransitionResult(ok=False, from_status=from_status, to_status=to_status)
 
     await write_audit_event(
         session,
         job_id=job_id,
         event_type=AuditEventType.STATUS_CHANGED,
         payload={
-            "from": from_status.value,
+            "from": from_status.value if from_status is not None else None,
             "to": to_status.value,
             "reason": reason,
         },
+        commit=commit,
+    )
+    record_transition(job_id, to_status.value, terminal=is_terminal(to_status))
+
+    return TransitionResult(ok=True, from_status=from_status, to_status=to_status)
+
+
+async def set_job_status(
+    session: AsyncSession,
+    *,
+    job_id: str,
+    to_status: JobStatus,
+    reason: str | None = None,
+    commit: bool = True,
+) -> Job:
+    """
+    Validated transition for callers that do not know the current status
+    (API, failure handling). Reads only the status column, then CAS-updates.
+
+    commit=False leaves the status change and its STATUS_CHANGED event pending
+    in the session; the caller commits them at its next checkpoint.
+    """
+    res = await session.execute(select(Job.status).where(Job.id == job_id))
+    from_status = res.scalar_one_or_none()
+    if from_status is None:
+        raise ValueError("job not found")
+
+    result = await transition_job_status(
+        session,
+        job_id=job_id,
+        from_status=from_status,
+        to_status=to_status,
+        reason=reason,
+        commit=commit,
     )
+    if not result.ok:
+        raise TransitionConflict(job_id=job_id, to_status=to_status)
+
+    res = await session.execute(
+        select(Job).where(Job.id == job_id).execution_options(populate_existing=True)
+    )
+    return res.scalar_one()
+
+
+async def create_jobs_bulk(
+    session: AsyncSession,
+    items: Sequence[Dict[str, Any]],
+    *,
+    enqueue: bool = False,
+    commit: bool = True,
+) -> List[str]:
+    """
+    Insert many jobs (+ their JOB_CREATED audit events) with bulk INSERTs:
+    one statement for documents, one for jobs, one for audit events.
+    items: dicts with filename, content_type, text (optional).
+    enqueue=True marks every job as queued for the worker pool.
+    Returns job ids in input order.
+    """
+    if not items:
+        return []
+
+    texts = [it["text"] for it in items if it.get("text")]
+    shas = iter(await put_documents(session, texts))
+
+    now = datetime.now(timezone.utc)
+    job_rows: List[Dict[str, Any]] = []
+    audit_rows: List[Dict[str, Any]] = []
+    for it in items:
+        job_id = str(uuid.uuid4())
+        sha = next(shas) if it.get("text") else None
+        job_rows.append(
+            {
+                "id": job_id,
+                "status": JobStatus.RECEIVED,
+                "filename": it["filename"],
+                "content_type": it["content_type"],
+                "content_sha256": sha,
+                "signals": {},
+                "run_requested_at": now if enqueue else None,
+                "run_attempts": 0,
+            }
+        )
+        audit_rows.append(
+            {
+                "job_id": job_id,
+                "event_type": AuditEventType.JOB_CREATED,
+                "payload": {
+                    "filename": it["filename"],
+                    "content_type": it["content_type"],
+                    "has_text": sha is not None,
+                    "batch": True,
+                },
+            }
+        )
 
-    return job
+    await session.execute(insert(Job), job_rows)
+    await session.execute(insert(AuditEvent), audit_rows)
+    if commit:
+        await session.commit()
+    for r in job_rows:
+        record_transition(r["id"], JobStatus.RECEIVED.value)
+    return [r["id"] for r in job_rows]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Set
+from typing import Dict, FrozenSet, Set
 
 from app.db.models import JobStatus
 
@@ -18,6 +18,12 @@ _ALLOWED: Dict[JobStatus, Set[JobStatus]] = {
     JobStatus.CANCELLED: set(),
 }
 
+# reverse index: to_status -> statuses it may be entered from (used by CAS updates)
+_ALLOWED_FROM: Dict[JobStatus, FrozenSet[JobStatus]] = {
+    to: frozenset(src for src, targets in _ALLOWED.items() if to in targets)
+    for to in JobStatus
+}
+
 @dataclass(frozen=True)
 class TransitionError(Exception):
     from_status: JobStatus
@@ -29,3 +35,19 @@ def ensure_transition_allowed(from_status: JobStatus, to_status: JobStatus) -> N
     allowed = _ALLOWED.get(from_status, set())
     if to_status not in allowed:
         raise TransitionError(from_status=from_status, to_status=to_status)
+
+
+@dataclass(frozen=True)
+class TransitionConflict(Exception):
+    """The job was not in an expected status when the conditional update ran (concurrent writer)."""
+    job_id: str
+    to_status: JobStatus
+    def __str__(self) -> str:
+        return f"transition conflict: job {self.job_id} could not move to {self.to_status}"
+
+def allowed_from(to_status: JobStatus) -> FrozenSet[JobStatus]:
+    return _ALLOWED_FROM.get(to_status, frozenset())
+
+
+def is_terminal(status: JobStatus) -> bool:
+    return not _ALLOWED.get(status)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Protocol
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# -----------------------
+# LLM backends of the extraction engine (EXTRACTION_BACKEND).
+#
+#   openai  the OpenAI Responses API (default). OPENAI_BASE_URL points it at
+#           any server speaking the same protocol, e.g. the bundled fake
+#           (`python -m app.extraction.fake_llm`).
+#   fake    the same fake, in process: no HTTP, no key (app/extraction/fake_llm.py).
+#
+# A backend only moves text: admission, usage accounting, parsing and repair
+# stay in the engine. Errors surface as the openai SDK's exception types
+# (RateLimitError, APITimeoutError, InternalServerError, ...) for every
+# backend, so retry and timeout handling is the same whichever one runs.
+# -----------------------
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_LLM_TIMEOUT_S = 60.0
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    # stopped by max_output_tokens
+    incomplete: bool = False
+
+
+class LLMStream(Protocol):
+    """Text deltas of one streamed call. `response` (usage) is set once the stream has finished."""
+
+    response: LLMResponse | None
+
+    def __aiter__(self) -> AsyncIterator[str]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class LLMBackend(Protocol):
+    name: str
+
+    async def complete(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> LLMResponse: ...
+
+    async def stream(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> LLMStream: ...
+
+    async def aclose(self) -> None: ...
+
+
+# -----------------------
+# OpenAI (Responses API)
+# -----------------------
+
+
+def _usage(resp: Any, text: str, *, incomplete: bool = False) -> LLMResponse:
+    usage = getattr(resp, "usage", None)
+    return LLMResponse(
+        text=text,
+        input_tokens=getattr(usage, "input_tokens", None),
+        output_tokens=getattr(usage, "output_tokens", None),
+        incomplete=incomplete,
+    )
+
+
+class _OpenAIStream:
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+        self._text: list[str] = []
+        self._deltas: Any = None
+        self.response: LLMResponse | None = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        self._deltas = self._iter_deltas()
+        return self._deltas
+
+    async def _iter_deltas(self) -> AsyncIterator[str]:
+        async for event in self._stream:
+            if event.type == "response.output_text.delta":
+                self._text.append(event.delta)
+                yield event.delta
+            elif event.type in ("response.incomplete", "response.completed"):
+                self.response = _usage(
+                    getattr(event, "response", None),
+                    "".join(self._text),
+                    incomplete=event.type == "response.incomplete",
+                )
+                return
+            elif event.type in ("response.failed", "error"):
+                raise RuntimeError(f"LLM stream failed: {event.type}")
+
+    async def aclose(self) -> None:
+        if self._deltas is not None:
+            await self._deltas.aclose()
+        # early exit: drop the connection instead of draining the rest
+        await self._stream.close()
+
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self) -> None:
+        # one long-lived client per process: keeps the HTTP connection pool warm
+        # and lets many extractions share it without blocking the event loop
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY is missing")
+
+        max_conn = int(os.getenv("OPENAI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            timeout=float(os.getenv("OPENAI_TIMEOUT_S", DEFAULT_LLM_TIMEOUT_S)),
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_conn, max_keepalive_connections=max_conn),
+            ),
+        )
+
+    @staticmethod
+    def _input(system: str, prompt: str) -> list[dict[str, str]]:
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ]
+
+    async def complete(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> LLMResponse:
+        resp = await self.client.responses.create(
+            model=model,
+            input=self._input(system, prompt),
+            temperature=0,
+            max_output_tokens=max_output_tokens,
+        )
+        return _usage(resp, resp.output_text, incomplete=getattr(resp, "status", None) == "incomplete")
+
+    async def stream(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> LLMStream:
+        stream = await self.client.responses.create(
+            model=model,
+            input=self._input(system, prompt),
+            temperature=0,
+            max_output_tokens=max_output_tokens,
+            stream=True,
+        )
+        return _OpenAIStream(stream)
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+# -----------------------
+# Selection
+# -----------------------
+
+
+def create_backend(name: str | None = None) -> LLMBackend:
+    name = (name or os.getenv("EXTRACTION_BACKEND") or "openai").lower()
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "fake":
+        from app.extraction.fake_llm import FakeBackend, FakeConfig
+
+        return FakeBackend(FakeConfig.from_env())
+    raise ValueError(f"unknown EXTRACTION_BACKEND: {name!r} (expected openai or fake)")
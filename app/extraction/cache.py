@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import ExtractionCacheEntry
+from app.db.session import AsyncSessionLocal
+from app.extraction.engine import (
+    PROMPT_VERSION,
+    ExtractionResult,
+    ProgressCallback,
+    _get_model,
+    _trim,
+    extract_document,
+)
+
+log = logging.getLogger(__name__)
+
+# -----------------------
+# Content-addressed cache in front of extract_document().
+# Identical documents (re-uploads, retries, duplicates) are served from the DB
+# instead of paying for another LLM call.
+# -----------------------
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+STATS = CacheStats()
+
+# single-flight: concurrent misses for the same key share one LLM call
+_inflight: Dict[str, asyncio.Future] = {}
+
+# eviction scans the table: run it every EVICT_EVERY_PUTS writes or EVICT_INTERVAL_S,
+# not on every miss (the table may exceed max_entries by that many rows meanwhile)
+EVICT_EVERY_PUTS = 100
+EVICT_INTERVAL_S = 60.0
+_puts_since_evict = 0
+_last_evict = float("-inf")
+
+
+def _normalize(text: str) -> str:
+    # same trimming the engine applies before prompting, plus whitespace/unicode normalization
+    return " ".join(unicodedata.normalize("NFC", _trim(text)).split())
+
+
+def cache_key(*, source_text: str, schema_id: str, pipeline_id: str, model: str, prompt_version: str) -> str:
+    h = hashlib.sha256()
+    for part in (_normalize(source_text), schema_id, pipeline_id, model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def _get(session: AsyncSession, key: str) -> ExtractionResult | None:
+    res = await session.execute(
+        select(
+            ExtractionCacheEntry.fields,
+            ExtractionCacheEntry.meta,
+            ExtractionCacheEntry.created_at,
+        ).where(ExtractionCacheEntry.key == key)
+    )
+    row = res.one_or_none()
+    if row is None:
+        return None
+
+    fields, meta, created_at = row
+    if created_at.tzinfo is None:  # SQLite drops tzinfo
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if created_at < _now() - timedelta(seconds=settings.extraction_cache_ttl_s):
+        await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.key == key))
+        await session.commit()
+        STATS.expired += 1
+        return None
+
+    await session.execute(
+        update(ExtractionCacheEntry)
+        .where(ExtractionCacheEntry.key == key)
+        .values(hit_count=ExtractionCacheEntry.hit_count + 1, last_hit_at=_now())
+    )
+    await session.commit()
+    return ExtractionResult.from_meta(fields, meta)
+
+
+def _evict_due() -> bool:
+    global _puts_since_evict, _last_evict
+    _puts_since_evict += 1
+    now = time.monotonic()
+    if _puts_since_evict < EVICT_EVERY_PUTS and now - _last_evict < EVICT_INTERVAL_S:
+        return False
+    _puts_since_evict = 0
+    _last_evict = now
+    return True
+
+
+async def _evict(session: AsyncSession) -> None:
+    # TTL first (indexed on created_at), then LRU down to max_entries
+    cutoff = _now() - timedelta(seconds=settings.extraction_cache_ttl_s)
+    res = await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.created_at < cutoff))
+    STATS.expired += res.rowcount or 0
+
+    count = (await session.execute(select(func.count()).select_from(ExtractionCacheEntry))).scalar_one()
+    overflow = count - settings.extraction_cache_max_entries
+    if overflow > 0:
+        oldest = (
+            select(ExtractionCacheEntry.key)
+            .order_by(ExtractionCacheEntry.last_hit_at.asc())
+            .limit(overflow)
+            .scalar_subquery()
+        )
+        res = await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.key.in_(oldest)))
+        STATS.evicted += res.rowcount or 0
+
+
+async def _put(
+    session: AsyncSession,
+    *,
+    key: str,
+    schema_id: str,
+    pipeline_id: str,
+    model: str,
+    result: ExtractionResult,
+) -> None:
+    await session.merge(
+        ExtractionCacheEntry(
+            key=key,
+            schema_id=schema_id,
+            pipeline_id=pipeline_id,
+            model=model,
+            prompt_version=PROMPT_VERSION,
+            fields=result.fields,
+            meta=result.to_meta(),
+            hit_count=0,
+            created_at=_now(),
+            last_hit_at=_now(),
+        )
+    )
+    if _evict_due():
+        await _evict(session)
+    await session.commit()
+
+
+async def cached_extract(
+    *,
+    schema_id: str,
+    pipeline_id: str,
+    source_text: str,
+    on_progress: ProgressCallback | None = None,
+) -> Tuple[ExtractionResult, bool]:
+    """
+    extract_document() with a persistent result cache.
+    Returns (result, cache_hit).
+    """
+    if not settings.extraction_cache_enabled or not _trim(source_text):
+        result = await extract_document(
+            schema_id=schema_id,
+            pipeline_id=pipeline_id,
+            source_text=source_text,
+            on_progress=on_progress,
+        )
+        return result, False
+
+    model = _get_model()
+    key = cache_key(
+        source_text=source_text,
+        schema_id=schema_id,
+        pipeline_id=pipeline_id,
+        model=model,
+        prompt_version=PROMPT_VERSION,
+    )
+
+    try:
+        async with AsyncSessionLocal() as session:
+            cached = await _get(session, key)
+    except Exception:
+        # cache is an optimization: never fail extraction because of it
+        log.exception("extraction cache lookup failed")
+        cached = None
+    if cached is not None:
+        STATS.hits += 1
+        return cached, True
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        try:
+            result = await asyncio.shield(pending)
+            STATS.hits += 1
+            return result, True
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # leader was cancelled (e.g. its job timed out): extract ourselves
+
+    STATS.misses += 1
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        result = await extract_document(
+            schema_id=schema_id,
+            pipeline_id=pipeline_id,
+            source_text=source_text,
+            on_progress=on_progress,
+        )
+        fut.set_result(result)
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved; followers re-raise it themselves
+        raise
+    finally:
+        if not fut.done():
+            fut.cancel()
+        _inflight.pop(key, None)
+
+    try:
+        async with AsyncSessionLocal() as session:
+            await _put(
+                session,
+                key=key,
+                schema_id=schema_id,
+                pipeline_id=pipeline_id,
+                model=model,
+                result=result,
+            )
+    except Exception:
+        log.exception("extraction cache write failed")
+    return result, False
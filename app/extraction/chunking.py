@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+# -----------------------
+# Splitting long documents into overlapping chunks and merging the per-chunk
+# extraction results back into one `fields` dict.
+# -----------------------
+
+# preferred cut points, strongest first
+_BOUNDARIES = ("\n\n", "\n", ". ", "; ", ", ", " ")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def _cut_point(text: str, start: int, hard_end: int) -> int:
+    # only look in the second half of the window, so chunks never get tiny
+    floor = start + (hard_end - start) // 2
+    for sep in _BOUNDARIES:
+        i = text.rfind(sep, floor, hard_end)
+        if i != -1:
+            return i + len(sep)
+    return hard_end
+
+
+def split_text(text: str, *, max_chars: int, overlap: int = 0) -> List[Chunk]:
+    """
+    Split text into chunks of at most max_chars, cutting on the strongest
+    structural boundary available (paragraph > line > sentence > clause > word).
+    Consecutive chunks share ~overlap chars, so a fact straddling a cut is
+    fully visible in at least one chunk.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    overlap = max(0, min(overlap, max_chars // 2))
+
+    n = len(text)
+    if n <= max_chars:
+        return [Chunk(index=0, start=0, end=n, text=text)] if text else []
+
+    chunks: List[Chunk] = []
+    start = 0
+    while start < n:
+        hard_end = min(start + max_chars, n)
+        end = hard_end if hard_end == n else _cut_point(text, start, hard_end)
+        chunks.append(Chunk(index=len(chunks), start=start, end=end, text=text[start:end]))
+        if end >= n:
+            break
+
+        # step back by `overlap`, then forward to the next word start
+        nxt = end - overlap
+        if overlap:
+            space = text.find(" ", nxt, end)
+            nxt = space + 1 if space != -1 else nxt
+        start = max(nxt, chunks[-1].start + 1)
+
+    return chunks
+
+
+# -----------------------
+# Merge
+# -----------------------
+
+def _is_empty(v: Any) -> bool:
+    return v is None or v == "" or v == [] or v == {}
+
+
+def _norm(v: Any) -> Any:
+    if isinstance(v, str):
+        return " ".join(v.split()).casefold()
+    return v
+
+
+@dataclass
+class MergeResult:
+    fields: Dict[str, Any] = field(default_factory=dict)
+    # field -> chunk index it was taken from (list of indices for merged lists)
+    provenance: Dict[str, Any] = field(default_factory=dict)
+    # later chunks disagreeing with the kept value
+    conflicts: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def merge_fields(per_chunk: List[Dict[str, Any]]) -> MergeResult:
+    """
+    Deterministic merge, in chunk order:
+    - scalars / objects: first non-empty value wins; differing later values are
+      recorded as conflicts (overlap duplicates with the same value are not)
+    - lists: concatenated across chunks, de-duplicated, order preserved
+    - a field that is empty everywhere keeps the first chunk's empty value
+    """
+    out = MergeResult()
+
+    for idx, fields in enumerate(per_chunk):
+        for key, value in (fields or {}).items():
+            if isinstance(value, list):
+                value = list(value)  # merged in place below; never alias the chunk's list
+
+            if key not in out.fields:
+                out.fields[key] = value
+                if not _is_empty(value):
+                    out.provenance[key] = [idx] if isinstance(value, list) else idx
+                continue
+
+            kept = out.fields[key]
+            if _is_empty(value):
+                continue
+            if _is_empty(kept):
+                out.fields[key] = value
+                out.provenance[key] = [idx] if isinstance(value, list) else idx
+                continue
+
+            if isinstance(kept, list) and isinstance(value, list):
+                seen = [_norm(x) for x in kept]
+                added = False
+                for item in value:
+                    if _norm(item) not in seen:
+                        kept.append(item)
+                        seen.append(_norm(item))
+                        added = True
+                if added:
+                    out.provenance[key].append(idx)
+                continue
+
+            if _norm(kept) != _norm(value):
+                out.conflicts.append(
+                    {"field": key, "kept_chunk": out.provenance[key], "chunk": idx, "value": value}
+                )
+
+    return out
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-from typing import Any, Dict
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
 
-from openai import OpenAI
+from openai import RateLimitError
 from pydantic import BaseModel, Field, ValidationError
 
-from app.extraction.schemas import SCHEMA_REGISTRY
+from app.core.metrics import EXTRACTION_SECONDS, LLM_SECONDS, LLM_TOKENS
+from app.core.usage import record_llm_call
+from app.extraction.backends import LLMBackend, LLMResponse, create_backend
+from app.extraction.chunking import Chunk, merge_fields, split_text
+from app.extraction.json_repair import STATS as PARSE_STATS, JSONRepairError, JSONStreamWatcher, repair_json
+from app.extraction.limiter import Lease, admission_timeout_s, estimate_tokens, get_limiter
+from app.extraction.schemas import compile_schema
 
+log = logging.getLogger(__name__)
+
+# Max text per LLM call; longer documents are extracted in chunks of this size.
 MAX_TEXT_CHARS = 12_000
+DEFAULT_CHUNK_OVERLAP = 400
+DEFAULT_MAX_CHUNKS = 64
 DEFAULT_MODEL = "gpt-4.1-mini"
+MAX_OUTPUT_TOKENS = 900
+# Bump whenever SYSTEM / _prompt change in a way that changes outputs (invalidates the result cache).
+PROMPT_VERSION = "3"
 
 SYSTEM = """You are a strict information extraction engine.
 
@@ -31,31 +50,101 @@ class ExtractedEnvelope(BaseModel):
     fields: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Called with {"chunk", "chunks", "fields", "final", "truncated"} as an
+# extraction makes progress (partial fields only with EXTRACTION_STREAMING=1).
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class ExtractionResult:
+    fields: Dict[str, Any] = field(default_factory=dict)
+    # field -> chunk index the value came from (list of indices for merged lists)
+    provenance: Dict[str, Any] = field(default_factory=dict)
+    conflicts: List[Dict[str, Any]] = field(default_factory=list)
+    # values rejected by the schema's coercion (set to null): {"field", "value", "error", "chunk"}
+    invalid: List[Dict[str, Any]] = field(default_factory=list)
+    chunks: int = 0
+    # chunks beyond EXTRACTION_MAX_CHUNKS were not extracted
+    truncated: bool = False
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {
+            "provenance": self.provenance,
+            "conflicts": self.conflicts,
+            "invalid": self.invalid,
+            "chunks": self.chunks,
+            "truncated": self.truncated,
+        }
+
+    @classmethod
+    def from_meta(cls, fields: Dict[str, Any], meta: Dict[str, Any] | None) -> "ExtractionResult":
+        meta = meta or {}
+        return cls(
+            fields=fields,
+            provenance=meta.get("provenance") or {},
+            conflicts=meta.get("conflicts") or [],
+            invalid=meta.get("invalid") or [],
+            chunks=int(meta.get("chunks") or 0),
+            truncated=bool(meta.get("truncated")),
+        )
+
+
 # -----------------------
 # Helpers
 # -----------------------
 
-def _get_openai_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is missing")
-    return OpenAI(api_key=api_key)
+# One backend per process (EXTRACTION_BACKEND, see backends.py): the OpenAI one
+# keeps a long-lived client so the HTTP connection pool stays warm.
+_backend: LLMBackend | None = None
+
+
+def _get_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+async def aclose_client() -> None:
+    """Close the shared backend (app shutdown)."""
+    global _backend
+    if _backend is not None:
+        backend, _backend = _backend, None
+        await backend.aclose()
 
 
 def _get_model() -> str:
     return os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
 
 
+def _streaming_enabled() -> bool:
+    return os.getenv("EXTRACTION_STREAMING", "0").lower() in ("1", "true", "yes")
+
+
 def _trim(text: str) -> str:
-    return (text or "").strip()[:MAX_TEXT_CHARS]
+    return (text or "").strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
 
 
-def _prompt(*, schema_id: str, text: str) -> str:
-    cfg = SCHEMA_REGISTRY.get(schema_id) or SCHEMA_REGISTRY["general.v1"]
-    instructions = cfg["instructions"]
+def _prompt(*, schema_id: str, text: str, part: tuple[int, int] | None = None) -> str:
+    schema = compile_schema(schema_id)
+    instructions = schema.spec.instructions
+
+    scope = ""
+    if part is not None:
+        scope = (
+            f"\nThe text is part {part[0] + 1} of {part[1]} of a longer document. "
+            "Extract only what appears in this part; use null / [] for everything else.\n"
+        )
 
     return f"""
-Extract structured information from the document text below.
+Extract structured information from the document text below.{scope}
 
 Hard rules:
 - Output must be VALID JSON.
@@ -65,7 +154,7 @@ Hard rules:
 
 Output schema:
 {{
-  "fields": {{}}
+  "fields": {schema.prompt_fields}
 }}
 
 Additional instructions:
@@ -95,67 +184,343 @@ def _extract_json_text(s: str) -> str:
     return s
 
 
-def _call_llm(prompt: str) -> str:
-    client = _get_openai_client()
-    model = _get_model()
+def _settle_usage(lease: Lease, resp: LLMResponse | None) -> None:
+    if resp is None or resp.input_tokens is None or resp.output_tokens is None:
+        return
+    lease.input_tokens = resp.input_tokens
+    lease.output_tokens = resp.output_tokens
+    lease.used_tokens = resp.input_tokens + resp.output_tokens
 
-    resp = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0,
-        max_output_tokens=900,
-    )
-    return resp.output_text
 
+def _retry_after_s(e: RateLimitError) -> float:
+    try:
+        return float(e.response.headers.get("retry-after", 1.0))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
 
-def _robust_parse(raw: str) -> ExtractedEnvelope:
+
+@asynccontextmanager
+async def _admitted(prompt: str, max_output_tokens: int, *, kind: str) -> AsyncIterator[Lease]:
+    """Hold an admission slot of the model's limiter for the duration of one call."""
+    model = _get_model()
+    limiter = get_limiter(model)
+    queued_at = time.perf_counter()
+    lease = await limiter.acquire(
+        estimate_tokens(SYSTEM + prompt, max_output_tokens),
+        timeout_s=admission_timeout_s(),
+    )
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        yield lease
+        outcome = "ok"
+    except RateLimitError as e:
+        # the SDK's own retries are exhausted: hold back everyone, not just this call
+        limiter.pause(_retry_after_s(e))
+        outcome = "rate_limited"
+        raise
+    finally:
+        lease.release()
+        elapsed = time.perf_counter() - t0
+        LLM_SECONDS.observe(elapsed, model, kind, outcome)
+        record_llm_call(
+            model=model,
+            kind=kind,
+            llm_s=elapsed,
+            queue_s=t0 - queued_at,
+            tokens_in=lease.input_tokens,
+            tokens_out=lease.output_tokens,
+        )
+        if lease.used_tokens is not None:
+            LLM_TOKENS.observe(lease.used_tokens, model, kind)
+
+
+async def _call_llm(prompt: str) -> str:
+    backend = _get_backend()
+
+    async with _admitted(prompt, MAX_OUTPUT_TOKENS, kind="extract") as lease:
+        resp = await backend.complete(
+            model=_get_model(),
+            system=SYSTEM,
+            prompt=prompt,
+            max_output_tokens=MAX_OUTPUT_TOKENS,
+        )
+        _settle_usage(lease, resp)
+    return resp.text
+
+
+async def _call_llm_stream(
+    prompt: str,
+    *,
+    on_fields: Callable[[str], Awaitable[None]] | None = None,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+) -> Tuple[str, bool]:
+    """
+    Streamed variant of _call_llm. Returns (text, truncated).
+
+    Stops reading as soon as the top-level JSON object is closed (anything the
+    model adds after it is never waited for) and calls on_fields(text_so_far)
+    each time another member of "fields" is complete. truncated=True when the
+    stream ended with the object still open (max_output_tokens hit).
+    """
+    backend = _get_backend()
+
+    watcher = JSONStreamWatcher()
+    reported = 0
+    async with _admitted(prompt, max_output_tokens, kind="extract_stream") as lease:
+        stream = await backend.stream(
+            model=_get_model(),
+            system=SYSTEM,
+            prompt=prompt,
+            max_output_tokens=max_output_tokens,
+        )
+        try:
+            async for delta in stream:
+                if watcher.feed(delta):
+                    break
+                if on_fields is not None and watcher.members_done > reported:
+                    reported = watcher.members_done
+                    await on_fields(watcher.text)
+        finally:
+            # early exit: drop the connection instead of draining the rest
+            await stream.aclose()
+        _settle_usage(lease, stream.response)
+        if lease.used_tokens is None:
+            # cut before the usage event: account an estimate instead of nothing
+            lease.input_tokens = len(SYSTEM + prompt) // 4
+            lease.output_tokens = len(watcher.text) // 4
+
+    return watcher.text, not watcher.complete
+
+
+async def _robust_parse(raw: str) -> ExtractedEnvelope:
     # 1) direct parse
     try:
         raw_json = _extract_json_text(raw)
         data = json.loads(raw_json)
-        return ExtractedEnvelope.model_validate(data)
+        env = ExtractedEnvelope.model_validate(data)
+        PARSE_STATS.direct += 1
+        return env
     except (json.JSONDecodeError, ValidationError):
         pass
 
-    # 2) repair pass
-    client = _get_openai_client()
-    model = _get_model()
+    # 2) local repair (fences, trailing commas, quotes, truncation, ...)
+    try:
+        data, repairs = repair_json(raw)
+        env = ExtractedEnvelope.model_validate(data)
+        PARSE_STATS.local_repair += 1
+        PARSE_STATS.record(repairs)
+        return env
+    except (JSONRepairError, ValidationError):
+        pass
+
+    # 3) model repair pass (last resort: costs another call)
+    backend = _get_backend()
 
     repair = f"Fix into VALID JSON only. Return only JSON.\nRAW:\n{raw}"
-    fixed = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": repair},
-        ],
-        temperature=0,
-        max_output_tokens=900,
-    ).output_text
+    async with _admitted(repair, MAX_OUTPUT_TOKENS, kind="repair") as lease:
+        fixed_resp = await backend.complete(
+            model=_get_model(),
+            system=SYSTEM,
+            prompt=repair,
+            max_output_tokens=MAX_OUTPUT_TOKENS,
+        )
+        _settle_usage(lease, fixed_resp)
+    fixed = fixed_resp.text
+
+    try:
+        data, _ = repair_json(fixed)
+        env = ExtractedEnvelope.model_validate(data)
+    except (JSONRepairError, ValidationError):
+        PARSE_STATS.failed += 1
+        raise
+    PARSE_STATS.llm_repair += 1
+    return env
+
+
+async def _report(on_progress: ProgressCallback | None, info: Dict[str, Any]) -> None:
+    if on_progress is None:
+        return
+    try:
+        await on_progress(info)
+    except Exception:
+        # progress is best-effort; never fail the extraction over it
+        log.exception("extraction progress callback failed")
+
+
+async def _extract_streamed(prompt: str, *, part: tuple[int, int], on_progress: ProgressCallback | None) -> str:
+    async def on_fields(text_so_far: str) -> None:
+        try:
+            partial = repair_json(text_so_far)[0].get("fields")
+        except (JSONRepairError, AttributeError):
+            return
+        if isinstance(partial, dict):
+            await _report(
+                on_progress,
+                {"chunk": part[0], "chunks": part[1], "fields": partial, "final": False, "truncated": False},
+            )
+
+    raw, truncated = await _call_llm_stream(prompt, on_fields=on_fields)
+    if truncated:
+        # cut off at max_output_tokens: known the moment the stream ends, so retry
+        # right away with a bigger budget; whatever still doesn't fit is closed by
+        # the local JSON repair
+        PARSE_STATS.stream_truncated += 1
+        await _report(
+            on_progress,
+            {"chunk": part[0], "chunks": part[1], "fields": None, "final": False, "truncated": True},
+        )
+        raw, _ = await _call_llm_stream(prompt, on_fields=on_fields, max_output_tokens=2 * MAX_OUTPUT_TOKENS)
+    return raw
+
+
+async def _extract_one(
+    *,
+    schema_id: str,
+    text: str,
+    part: tuple[int, int] | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> Dict[str, Any]:
+    prompt = _prompt(schema_id=schema_id, text=text, part=part)
+    if _streaming_enabled():
+        raw = await _extract_streamed(prompt, part=part or (0, 1), on_progress=on_progress)
+    else:
+        raw = await _call_llm(prompt)
+    env = await _robust_parse(raw)
+
+    chunk, chunks = part or (0, 1)
+    await _report(
+        on_progress,
+        {"chunk": chunk, "chunks": chunks, "fields": env.fields, "final": True, "truncated": False},
+    )
+    return env.fields
 
-    fixed_json = _extract_json_text(fixed)
-    data = json.loads(fixed_json)
-    return ExtractedEnvelope.model_validate(data)
+
+async def _extract_chunks(
+    *,
+    schema_id: str,
+    texts: List[str],
+    fanout: int,
+    on_progress: ProgressCallback | None = None,
+) -> List[Dict[str, Any]]:
+    sem = asyncio.Semaphore(max(1, fanout))
+    total = len(texts)
+
+    async def one(i: int, text: str) -> Dict[str, Any]:
+        async with sem:
+            return await _extract_one(schema_id=schema_id, text=text, part=(i, total), on_progress=on_progress)
+
+    tasks = [asyncio.create_task(one(i, t)) for i, t in enumerate(texts)]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        # one chunk failed (or we were cancelled): don't leave the others running
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 # -----------------------
 # Public API
 # -----------------------
 
-async def extract_fields(
+async def extract_document(
     *,
     schema_id: str,
     pipeline_id: str,
     source_text: str,
-) -> Dict[str, Any]:
+    on_progress: ProgressCallback | None = None,
+) -> ExtractionResult:
+    """
+    Extract fields from a document of any length.
+
+    Text up to EXTRACTION_CHUNK_CHARS goes out in a single call. Longer text is
+    split on paragraph/line/sentence boundaries (EXTRACTION_CHUNK_OVERLAP chars
+    shared between neighbours), chunks are extracted concurrently (at most
+    EXTRACTION_FANOUT in flight, by default all of them; the model's limiter
+    still bounds the actual calls) and merged in chunk order.
+
+    on_progress receives per-chunk results as they complete and, in streaming
+    mode (EXTRACTION_STREAMING=1), partial fields while the model is writing.
+    """
     # pipeline_id reserved for future routing
     text = _trim(source_text)
     if not text:
-        return {}
+        return ExtractionResult()
 
-    prompt = _prompt(schema_id=schema_id, text=text)
-    raw = _call_llm(prompt)
-    env = _robust_parse(raw)
-    return env.fields
+    with EXTRACTION_SECONDS.time(schema_id):
+        return await _extract_document(schema_id=schema_id, text=text, on_progress=on_progress)
+
+
+def _plan_chunks(text: str) -> Tuple[List[Chunk], bool]:
+    chunks = split_text(
+        text,
+        max_chars=_env_int("EXTRACTION_CHUNK_CHARS", MAX_TEXT_CHARS),
+        overlap=_env_int("EXTRACTION_CHUNK_OVERLAP", DEFAULT_CHUNK_OVERLAP),
+    )
+    max_chunks = _env_int("EXTRACTION_MAX_CHUNKS", DEFAULT_MAX_CHUNKS)
+    return chunks[:max_chunks], len(chunks) > max_chunks
+
+
+def _fanout() -> int:
+    # default: every chunk in flight at once, the limiter decides what actually runs
+    return max(1, _env_int("EXTRACTION_FANOUT", _env_int("EXTRACTION_MAX_CHUNKS", DEFAULT_MAX_CHUNKS)))
+
+
+def call_rounds(source_text: str) -> int:
+    """
+    Sequential rounds of LLM calls extract_document needs for this text: chunks
+    over what can be in flight at once (fanout, capped by the model's limiter
+    concurrency). Callers scale per-call timeouts with it.
+    """
+    text = _trim(source_text)
+    if not text:
+        return 1
+    chunks, _ = _plan_chunks(text)
+    parallel = min(_fanout(), get_limiter(_get_model()).max_concurrency)
+    return max(1, -(-len(chunks) // parallel))
+
+
+async def _extract_document(
+    *,
+    schema_id: str,
+    text: str,
+    on_progress: ProgressCallback | None,
+) -> ExtractionResult:
+    chunks, truncated = _plan_chunks(text)
+
+    if len(chunks) == 1:
+        per_chunk = [await _extract_one(schema_id=schema_id, text=text, on_progress=on_progress)]
+    else:
+        per_chunk = await _extract_chunks(
+            schema_id=schema_id,
+            texts=[c.text for c in chunks],
+            fanout=_fanout(),
+            on_progress=on_progress,
+        )
+
+    # coerce each chunk to the schema before merging, so "$1,200.00" and "1200"
+    # from neighbouring chunks agree instead of conflicting
+    schema = compile_schema(schema_id)
+    checked = [schema.validate(fields) for fields in per_chunk]
+    merged = merge_fields([c.fields for c in checked])
+    invalid = [{**err, "chunk": i} for i, c in enumerate(checked) for err in c.errors]
+    return ExtractionResult(
+        fields=merged.fields,
+        provenance=merged.provenance,
+        conflicts=merged.conflicts,
+        invalid=invalid,
+        chunks=len(chunks),
+        truncated=truncated,
+    )
+
+
+async def extract_fields(
+    *,
+    schema_id: str,
+    pipeline_id: str,
+    source_text: str,
+) -> Dict[str, Any]:
+    res = await extract_document(schema_id=schema_id, pipeline_id=pipeline_id, source_text=source_text)
+    return res.fields
@@ -0,0 +1,552 @@
+"""
+Deterministic stand-in for the LLM, for load tests and CI.
+
+    python -m app.extraction.fake_llm --port 8900 --latency lognormal:400,0.5 --rate-limit-rate 0.02
+    EXTRACTION_BACKEND=openai OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake ...
+
+or, without HTTP, EXTRACTION_BACKEND=fake (same behavior, configured by the
+FAKE_LLM_* variables, see FakeConfig.from_env).
+
+The server speaks the subset of the Responses API the engine uses (POST
+/v1/responses, plain and streamed). Replies are fixtures (FAKE_LLM_FIXTURES:
+a JSON list of {"match": "<substring of the document>", "fields": {...}} or
+{"match": ..., "output": "<raw text>"}) or else a naive, typed extraction of
+the fields the prompt asks for (labelled values, dates, amounts, currency,
+organisation names; see naive_fields). Latency, 429s, 5xx, hangs, truncated and malformed outputs are drawn
+from a RNG seeded by (seed, prompt, how often the prompt was seen): a run is
+reproducible, and a retried call gets a fresh draw like it would upstream.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+import httpx
+import openai
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.extraction.backends import LLMResponse
+
+CHARS_PER_TOKEN = 4
+STREAM_DELTA_CHARS = 24
+MAX_TRACKED_PROMPTS = 100_000
+
+_CURRENCY_RE = re.compile(r"\b(USD|EUR|GBP|JPY|CHF|INR|CAD|AUD)\b|([$€£¥])")
+_SYMBOL_CODES = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY"}
+_NUMBER_RE = re.compile(r"-?\d[\d,.]*")
+_SCHEMA_FIELD_RE = re.compile(r'^\s*"(\w+)": (list of \w+|\w+)', re.MULTILINE)
+_LABEL_LINE_RE = re.compile(r"^\s*([A-Za-z][\w ]{0,40}?)\s*:\s*(.+?)\s*$", re.MULTILINE)
+_DATE_RE = re.compile(
+    r"\b(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{4}"
+    r"|\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?[A-Z][a-z]{2,8}\.?,?\s+\d{4}|[A-Z][a-z]{2,8}\.?\s+\d{1,2}(?:st|nd|rd|th)?,\s+\d{4})\b"
+)
+_ORG_RE = re.compile(r"\b[A-Z][\w&'-]*(?:\s+[A-Z][\w&'-]*){0,3}\s+(?:Ltd|LLC|Inc|Corp|GmbH|PLC|LLP|AG)\b\.?")
+# string fields that name the issuing organisation, filled with the first one found if unlabelled
+_ORG_FIELDS = frozenset({"vendor", "supplier", "seller", "issuer"})
+
+
+# -----------------------
+# Configuration
+# -----------------------
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """fixed:MS | uniform:LO_MS,HI_MS | lognormal:MEDIAN_MS,SIGMA -> sampler returning seconds."""
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(x) for x in args.split(",")] if args else []
+        if kind == "fixed" and len(values) == 1:
+            return lambda rng: values[0] / 1000
+        if kind == "uniform" and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1]) / 1000
+        if kind == "lognormal" and len(values) == 2:
+            mu = math.log(max(values[0], 1e-3))
+            return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"bad latency spec: {spec!r} (fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA)")
+
+
+@dataclass
+class FakeConfig:
+    latency: str = "fixed:50"
+    # share of the latency before the first streamed delta
+    ttft_share: float = 0.3
+    # per call, drawn in this order
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    truncate_rate: float = 0.0
+    malformed_rate: float = 0.0
+    retry_after_s: float = 1.0
+    # how long a "timeout" call hangs (the client's timeout should fire first)
+    hang_s: float = 120.0
+    seed: int = 0
+    fixtures: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_env(cls) -> "FakeConfig":
+        env = os.getenv
+        fixtures_path = env("FAKE_LLM_FIXTURES")
+        return cls(
+            latency=env("FAKE_LLM_LATENCY", cls.latency),
+            ttft_share=float(env("FAKE_LLM_TTFT_SHARE", cls.ttft_share)),
+            rate_limit_rate=float(env("FAKE_LLM_429_RATE", cls.rate_limit_rate)),
+            error_rate=float(env("FAKE_LLM_ERROR_RATE", cls.error_rate)),
+            timeout_rate=float(env("FAKE_LLM_TIMEOUT_RATE", cls.timeout_rate)),
+            truncate_rate=float(env("FAKE_LLM_TRUNCATE_RATE", cls.truncate_rate)),
+            malformed_rate=float(env("FAKE_LLM_MALFORMED_RATE", cls.malformed_rate)),
+            retry_after_s=float(env("FAKE_LLM_RETRY_AFTER_S", cls.retry_after_s)),
+            hang_s=float(env("FAKE_LLM_HANG_S", cls.hang_s)),
+            seed=int(env("FAKE_LLM_SEED", cls.seed)),
+            fixtures=load_fixtures(fixtures_path) if fixtures_path else [],
+        )
+
+
+def load_fixtures(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    if not isinstance(fixtures, list) or not all(isinstance(x, dict) and "match" in x for x in fixtures):
+        raise ValueError(f"{path}: expected a JSON list of {{'match': ..., 'fields'|'output': ...}}")
+    return fixtures
+
+
+# -----------------------
+# Replies
+# -----------------------
+
+
+@dataclass
+class FakeReply:
+    # ok | rate_limited | error | timeout
+    outcome: str
+    latency_s: float
+    text: str = ""
+    incomplete: bool = False
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+def _document(prompt: str) -> str:
+    _, sep, text = prompt.rpartition("\nText:\n")
+    return text if sep else prompt
+
+
+def _label_value(text: str, name: str) -> str | None:
+    """Text after the field's label ("Invoice No: X", "Term. X", "Total due $X") up to the end of the sentence."""
+    words = name.split("_")
+    if len(words) > 1 and words[-1] in ("number", "no", "id"):
+        label = r"\s+".join(re.escape(w) for w in words[:-1]) + r"\s*(?:no\b\.?|number\b|id\b|#)"
+    else:
+        label = r"\s+".join(re.escape(w) for w in words) + r"\b"
+    for m in re.finditer(rf"(?i)\b{label}\s*[:#.]?\s*([^\n;]+)", text):
+        # up to the end of the sentence (decimals and "No." survive)
+        value = re.split(r"\.(?:\s|$)", m.group(1))[0].strip()
+        if value:
+            return value
+    return None
+
+
+def _typed_value(text: str, name: str, kind: str) -> Any:
+    if kind == "currency":
+        m = _CURRENCY_RE.search(text)
+        return (m.group(1) or _SYMBOL_CODES[m.group(2)]) if m else None
+    if kind.startswith("list"):
+        # list of names (parties, ...): the organisations the text mentions
+        return list(dict.fromkeys(_ORG_RE.findall(text))) if kind == "list of string" else []
+
+    value = _label_value(text, name)
+    if kind in ("number", "integer"):
+        m = _NUMBER_RE.search(value) if value else None
+        return m.group() if m else None
+    if kind == "date":
+        # labelled but not next to its label ("as of the Effective Date ..."): the first date of the document
+        m = (_DATE_RE.search(value) or _DATE_RE.search(text)) if value else None
+        return m.group() if m else None
+    if value is not None:
+        value = re.split(r"\s{2,}", value)[0]
+    elif name in _ORG_FIELDS:
+        m = _ORG_RE.search(text)
+        value = m.group() if m else None
+    return value
+
+
+def naive_fields(prompt: str) -> Dict[str, Any]:
+    """
+    Fields of the prompt's output schema, filled by type from the document:
+    labelled values (strings cut at a fixed-width column gap, numbers and
+    dates picked out of the label's sentence), the first currency, the
+    organisation names for lists and issuer fields (or all "<label>: <value>"
+    lines if untyped). Values are verbatim source text, so on ordinary
+    invoices and contracts the reply is schema-valid and grounded.
+    """
+    text = _document(prompt)
+    schema_fields = _SCHEMA_FIELD_RE.findall(prompt.partition("\nText:\n")[0])
+    if not schema_fields:
+        return {k.strip().lower().replace(" ", "_"): v for k, v in _LABEL_LINE_RE.findall(text)[:20]}
+    return {name: _typed_value(text, name, kind) for name, kind in schema_fields}
+
+
+def _malformed(text: str, rng: random.Random) -> str:
+    variant = rng.randrange(4)
+    if variant == 0:
+        return f"```json\n{text[:-1]},}}\n```"  # fenced, trailing comma
+    if variant == 1:
+        return text.replace('"', "'")  # python-style quotes
+    if variant == 2:
+        return f"Sure! Here is the JSON you asked for:\n{text}\nLet me know if you need anything else."
+    return "I could not find structured data in this document."
+
+
+class FakeLLM:
+    def __init__(self, config: FakeConfig) -> None:
+        self.config = config
+        self._latency = parse_latency(config.latency)
+        self._seen: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {"requests": 0}
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        if len(self._seen) >= MAX_TRACKED_PROMPTS:
+            self._seen.clear()
+        n = self._seen.get(digest, 0)
+        self._seen[digest] = n + 1
+        return random.Random(f"{self.config.seed}:{digest}:{n}")
+
+    def _output(self, prompt: str) -> str:
+        text = _document(prompt)
+        for fx in self.config.fixtures:
+            if fx["match"] in text:
+                if "output" in fx:
+                    return str(fx["output"])
+                return json.dumps({"fields": fx.get("fields") or {}})
+        return json.dumps({"fields": naive_fields(prompt)})
+
+    def reply(self, prompt: str, *, max_output_tokens: int) -> FakeReply:
+        cfg = self.config
+        rng = self._rng(prompt)
+        latency = self._latency(rng)
+        input_tokens = len(prompt) // CHARS_PER_TOKEN
+
+        draw = rng.random()
+        outcome = "ok"
+        for name, rate in (
+            ("rate_limited", cfg.rate_limit_rate),
+            ("error", cfg.error_rate),
+            ("timeout", cfg.timeout_rate),
+        ):
+            if draw < rate:
+                outcome = name
+                break
+            draw -= rate
+        self.stats["requests"] += 1
+        self.stats[outcome] = self.stats.get(outcome, 0) + 1
+        if outcome != "ok":
+            return FakeReply(outcome=outcome, latency_s=latency, input_tokens=input_tokens)
+
+        text = self._output(prompt)
+        incomplete = False
+        if rng.random() < cfg.truncate_rate:
+            text = text[: max(1, int(len(text) * rng.uniform(0.3, 0.8)))]
+            incomplete = True
+            self.stats["truncated"] = self.stats.get("truncated", 0) + 1
+        elif rng.random() < cfg.malformed_rate:
+            text = _malformed(text, rng)
+            self.stats["malformed"] = self.stats.get("malformed", 0) + 1
+        max_chars = max_output_tokens * CHARS_PER_TOKEN
+        if len(text) > max_chars:
+            text, incomplete = text[:max_chars], True
+
+        return FakeReply(
+            outcome="ok",
+            latency_s=latency,
+            text=text,
+            incomplete=incomplete,
+            input_tokens=input_tokens,
+            output_tokens=max(1, len(text) // CHARS_PER_TOKEN),
+        )
+
+
+def _deltas(text: str) -> List[str]:
+    return [text[i : i + STREAM_DELTA_CHARS] for i in range(0, len(text), STREAM_DELTA_CHARS)] or [""]
+
+
+# -----------------------
+# In-process backend (EXTRACTION_BACKEND=fake)
+# -----------------------
+
+_REQUEST = httpx.Request("POST", "http://fake-llm/v1/responses")
+
+
+def _raise_for(reply: FakeReply, config: FakeConfig) -> None:
+    if reply.outcome == "rate_limited":
+        response = httpx.Response(
+            429, headers={"retry-after": str(config.retry_after_s)}, request=_REQUEST
+        )
+        raise openai.RateLimitError("Rate limit reached (fake)", response=response, body=None)
+    if reply.outcome == "error":
+        response = httpx.Response(500, request=_REQUEST)
+        raise openai.InternalServerError("Internal server error (fake)", response=response, body=None)
+
+
+class _FakeStream:
+    def __init__(self, reply: FakeReply, ttft_s: float, delta_s: float) -> None:
+        self._reply = reply
+        self._ttft_s = ttft_s
+        self._delta_s = delta_s
+        self._deltas: Any = None
+        self.response: LLMResponse | None = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        self._deltas = self._iter_deltas()
+        return self._deltas
+
+    async def _iter_deltas(self) -> AsyncIterator[str]:
+        await asyncio.sleep(self._ttft_s)
+        for delta in _deltas(self._reply.text):
+            yield delta
+            await asyncio.sleep(self._delta_s)
+        self.response = LLMResponse(
+            text=self._reply.text,
+            input_tokens=self._reply.input_tokens,
+            output_tokens=self._reply.output_tokens,
+            incomplete=self._reply.incomplete,
+        )
+
+    async def aclose(self) -> None:
+        if self._deltas is not None:
+            await self._deltas.aclose()
+
+
+class FakeBackend:
+    """
+    The fake without HTTP. Behaves like the OpenAI backend against the fake
+    server: the SDK's retries of 429/5xx/timeouts (OPENAI_MAX_RETRIES, default
+    2, honoring retry-after) and its timeout (OPENAI_TIMEOUT_S) included.
+    """
+
+    name = "fake"
+
+    def __init__(self, config: FakeConfig | None = None) -> None:
+        self.llm = FakeLLM(config or FakeConfig.from_env())
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", 2))
+        self.timeout_s = float(os.getenv("OPENAI_TIMEOUT_S", 60.0))
+
+    async def _reply(self, prompt: str, max_output_tokens: int) -> FakeReply:
+        attempt = 0
+        while True:
+            reply = self.llm.reply(prompt, max_output_tokens=max_output_tokens)
+            try:
+                if reply.outcome == "timeout" or reply.latency_s >= self.timeout_s:
+                    # a hang, or a reply slower than the client waits
+                    await asyncio.sleep(min(self.llm.config.hang_s, self.timeout_s))
+                    raise openai.APITimeoutError(request=_REQUEST)
+                _raise_for(reply, self.llm.config)
+                return reply
+            except (openai.RateLimitError, openai.InternalServerError, openai.APITimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                if reply.outcome == "rate_limited":
+                    delay = min(self.llm.config.retry_after_s, 60.0)
+                else:
+                    delay = min(0.5 * 2 ** (attempt - 1), 8.0)
+                await asyncio.sleep(delay * random.uniform(0.75, 1.0))
+
+    async def complete(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> LLMResponse:
+        reply = await self._reply(system + prompt, max_output_tokens)
+        if reply.outcome == "ok":
+            await asyncio.sleep(reply.latency_s)
+        return LLMResponse(
+            text=reply.text,
+            input_tokens=reply.input_tokens,
+            output_tokens=reply.output_tokens,
+            incomplete=reply.incomplete,
+        )
+
+    async def stream(self, *, model: str, system: str, prompt: str, max_output_tokens: int) -> _FakeStream:
+        reply = await self._reply(system + prompt, max_output_tokens)
+        ttft = reply.latency_s * self.llm.config.ttft_share
+        n = len(_deltas(reply.text))
+        return _FakeStream(reply, ttft, (reply.latency_s - ttft) / n)
+
+    async def aclose(self) -> None:
+        return None
+
+
+# -----------------------
+# HTTP server (Responses API subset)
+# -----------------------
+
+
+def _input_text(body: Dict[str, Any]) -> str:
+    parts: List[str] = []
+    items = body.get("input")
+    if isinstance(items, str):
+        return items
+    for item in items or []:
+        content = item.get("content") if isinstance(item, dict) else None
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(str(c.get("text", "")) for c in content if isinstance(c, dict))
+    return "".join(parts)
+
+
+def _response_object(body: Dict[str, Any], reply: FakeReply, *, status: str) -> Dict[str, Any]:
+    resp_id = f"resp_{uuid.uuid4().hex}"
+    return {
+        "id": resp_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "fake"),
+        "status": status,
+        "incomplete_details": {"reason": "max_output_tokens"} if status == "incomplete" else None,
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{resp_id[5:]}",
+                "status": "completed" if status == "completed" else "incomplete",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": reply.text, "annotations": []}],
+            }
+        ]
+        if status != "in_progress"
+        else [],
+        "usage": {
+            "input_tokens": reply.input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": reply.output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": reply.input_tokens + reply.output_tokens,
+        }
+        if status != "in_progress"
+        else None,
+        "parallel_tool_calls": False,
+        "tool_choice": "none",
+        "tools": [],
+        "temperature": body.get("temperature"),
+        "max_output_tokens": body.get("max_output_tokens"),
+    }
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _error(status: int, kind: str, message: str, headers: Dict[str, str] | None = None) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": message, "type": kind, "param": None, "code": kind}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def create_app(config: FakeConfig | None = None) -> FastAPI:
+    llm = FakeLLM(config or FakeConfig.from_env())
+    app = FastAPI(title="fake LLM (Responses API subset)")
+    app.state.llm = llm
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"service": "fake-llm", "stats": llm.stats}
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        max_output_tokens = int(body.get("max_output_tokens") or 4096)
+        reply = llm.reply(_input_text(body), max_output_tokens=max_output_tokens)
+        cfg = llm.config
+
+        if reply.outcome == "timeout":
+            await asyncio.sleep(cfg.hang_s)
+        if reply.outcome == "rate_limited":
+            return _error(
+                429, "rate_limit_exceeded", "Rate limit reached (fake)", {"retry-after": str(cfg.retry_after_s)}
+            )
+        if reply.outcome == "error":
+            return _error(500, "server_error", "Internal server error (fake)")
+
+        status = "incomplete" if reply.incomplete else "completed"
+        if not body.get("stream"):
+            await asyncio.sleep(reply.latency_s)
+            return JSONResponse(_response_object(body, reply, status=status))
+
+        async def events() -> AsyncIterator[str]:
+            seq = 0
+            created = _response_object(body, reply, status="in_progress")
+            yield _sse({"type": "response.created", "sequence_number": seq, "response": created})
+            ttft = reply.latency_s * cfg.ttft_share
+            await asyncio.sleep(ttft)
+            deltas = _deltas(reply.text)
+            for delta in deltas:
+                seq += 1
+                yield _sse(
+                    {
+                        "type": "response.output_text.delta",
+                        "sequence_number": seq,
+                        "item_id": "msg_0",
+                        "output_index": 0,
+                        "content_index": 0,
+                        "delta": delta,
+                        "logprobs": [],
+                    }
+                )
+                await asyncio.sleep((reply.latency_s - ttft) / len(deltas))
+            seq += 1
+            done = _response_object(body, reply, status=status)
+            yield _sse({"type": f"response.{status}", "sequence_number": seq, "response": done})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    defaults = FakeConfig.from_env()
+    ap.add_argument("--latency", default=defaults.latency)
+    ap.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    ap.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    ap.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate)
+    ap.add_argument("--truncate-rate", type=float, default=defaults.truncate_rate)
+    ap.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate)
+    ap.add_argument("--seed", type=int, default=defaults.seed)
+    ap.add_argument("--fixtures", default=None)
+    args = ap.parse_args()
+
+    config = FakeConfig(
+        latency=args.latency,
+        ttft_share=defaults.ttft_share,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        truncate_rate=args.truncate_rate,
+        malformed_rate=args.malformed_rate,
+        retry_after_s=defaults.retry_after_s,
+        hang_s=defaults.hang_s,
+        seed=args.seed,
+        fixtures=load_fixtures(args.fixtures) if args.fixtures else defaults.fixtures,
+    )
+    parse_latency(config.latency)  # fail fast on a bad spec
+
+    import uvicorn
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+# -----------------------
+# Deterministic local repair of almost-JSON model output.
+#
+# One pass over the text rebuilds a valid JSON document while tracking the
+# open containers, so output cut off at max_output_tokens can be closed
+# instead of sent back to the model. Repairs never invent content: dangling
+# keys get null, unfinished literals are completed only when unambiguous.
+# -----------------------
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+@dataclass
+class ParseStats:
+    # how model output got parsed (engine._robust_parse)
+    direct: int = 0
+    local_repair: int = 0
+    llm_repair: int = 0
+    failed: int = 0
+    # streamed responses that hit max_output_tokens (EXTRACTION_STREAMING=1)
+    stream_truncated: int = 0
+    # which local repairs fired
+    repairs: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, kinds: List[str]) -> None:
+        for k in kinds:
+            self.repairs[k] = self.repairs.get(k, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "direct": self.direct,
+            "local_repair": self.local_repair,
+            "llm_repair": self.llm_repair,
+            "failed": self.failed,
+            "stream_truncated": self.stream_truncated,
+            "repairs": dict(self.repairs),
+        }
+
+
+STATS = ParseStats()
+
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*$", re.MULTILINE)
+_NUMBER_RE = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_JSON_LITERALS = ("true", "false", "null")
+_DELIMS = set(",:[]{}\"'") | set(" \t\r\n")
+
+
+def _strip_fences(s: str) -> Tuple[str, bool]:
+    out = _FENCE_RE.sub("", s)
+    return out, out != s
+
+
+class _Scanner:
+    """Rebuilds one top-level JSON value starting at text[pos]."""
+
+    def __init__(self, text: str, pos: int) -> None:
+        self.text = text
+        self.pos = pos
+        self.out: List[str] = []
+        # open containers: ["{" | "[", state]; object states: key/colon/value/comma, array: value/comma
+        self.stack: List[List[str]] = []
+        self.repairs: List[str] = []
+
+    def _fix(self, kind: str) -> None:
+        if kind not in self.repairs:
+            self.repairs.append(kind)
+
+    # -- output helpers --
+
+    def _emit(self, s: str) -> None:
+        self.out.append(s)
+
+    def _drop_trailing_comma(self) -> bool:
+        for i in range(len(self.out) - 1, -1, -1):
+            piece = self.out[i]
+            if piece.isspace():
+                continue
+            if piece == ",":
+                del self.out[i]
+                return True
+            return False
+        return False
+
+    def _before_value(self) -> None:
+        # a value (or key) is starting in the current container
+        if not self.stack:
+            return
+        top = self.stack[-1]
+        if top[1] == "comma":
+            self._emit(",")
+            self._fix("missing_comma")
+            top[1] = "key" if top[0] == "{" else "value"
+        elif top[1] == "colon":
+            self._emit(":")
+            self._fix("missing_colon")
+            top[1] = "value"
+
+    def _after_value(self) -> None:
+        if self.stack:
+            self.stack[-1][1] = "comma"
+
+    def _in_key_position(self) -> bool:
+        return bool(self.stack) and self.stack[-1][0] == "{" and self.stack[-1][1] in ("key", "comma")
+
+    def _close_dangling(self) -> None:
+        # object left waiting for a value: keep the key, value unknown
+        top = self.stack[-1]
+        if top[0] == "{" and top[1] == "colon":
+            self._emit(":null")
+            self._fix("dangling_key")
+        elif top[0] == "{" and top[1] == "value":
+            self._emit("null")
+            self._fix("dangling_key")
+
+    # -- lexing --
+
+    def _string(self, quote: str) -> bool:
+        text, n = self.text, len(self.text)
+        self._emit('"')
+        if quote == "'":
+            self._fix("single_quotes")
+        i = self.pos + 1
+        while i < n:
+            ch = text[i]
+            if ch == "\\":
+                if i + 1 >= n:
+                    self._fix("dangling_escape")
+                    i += 1
+                    break
+                nxt = text[i + 1]
+                if nxt == "'":
+                    self._emit("'")
+                elif nxt in '"\\/bfnrtu':
+                    self._emit(ch + nxt)
+                else:
+                    self._emit("\\\\" + nxt)
+                    self._fix("invalid_escape")
+                i += 2
+                continue
+            if ch == quote:
+                self._emit('"')
+                self.pos = i + 1
+                return True
+            if ch == '"':
+                self._emit('\\"')
+            elif ch == "\n":
+                self._emit("\\n")
+                self._fix("control_chars")
+            elif ch == "\r":
+                self._emit("\\r")
+                self._fix("control_chars")
+            elif ch == "\t":
+                self._emit("\\t")
+                self._fix("control_chars")
+            else:
+                self._emit(ch)
+            i += 1
+
+        # ran off the end inside a string
+        self._emit('"')
+        self._fix("unterminated_string")
+        self.pos = n
+        return False
+
+    def _bare(self) -> None:
+        text, n = self.text, len(self.text)
+        i = self.pos
+        while i < n and text[i] not in _DELIMS:
+            i += 1
+        token = text[self.pos : i]
+        at_end = i >= n
+        self.pos = i
+
+        if self._in_key_position():
+            self._before_value()
+            self._emit(json.dumps(token))
+            self._fix("unquoted_key")
+            self.stack[-1][1] = "colon"
+            return
+
+        self._before_value()
+        if token in _JSON_LITERALS or (_NUMBER_RE.fullmatch(token) is not None):
+            self._emit(token)
+        elif token in _PY_LITERALS:
+            self._emit(_PY_LITERALS[token])
+            self._fix("python_literal")
+        elif at_end and any(lit.startswith(token) for lit in _JSON_LITERALS):
+            self._emit(next(lit for lit in _JSON_LITERALS if lit.startswith(token)))
+            self._fix("truncated_literal")
+        elif at_end and _NUMBER_RE.match(token):
+            # "12." / "1e" cut off mid-number
+            self._emit(_NUMBER_RE.match(token).group(0))
+            self._fix("truncated_number")
+        else:
+            self._emit(json.dumps(token))
+            self._fix("unquoted_value")
+        self._after_value()
+
+    # -- main loop --
+
+    def scan(self) -> Tuple[str, int]:
+        text, n = self.text, len(self.text)
+        while self.pos < n:
+            ch = text[self.pos]
+
+            if ch.isspace():
+                self._emit(ch)
+                self.pos += 1
+            elif ch in "\"'":
+                is_key = self._in_key_position()
+                mark = len(self.out)
+                self._before_value()
+                terminated = self._string(ch)
+                if is_key and not terminated:
+                    # key name cut off: drop the partial key rather than invent a field
+                    del self.out[mark:]
+                    self._drop_trailing_comma()
+                    self._fix("partial_key")
+                    self.stack[-1][1] = "comma"
+                elif is_key:
+                    self.stack[-1][1] = "colon"
+                else:
+                    self._after_value()
+            elif ch in "{[":
+                self._before_value()
+                self._emit(ch)
+                self.stack.append([ch, "key" if ch == "{" else "value"])
+                self.pos += 1
+            elif ch in "}]":
+                self.pos += 1
+                if not self.stack:
+                    self._fix("extra_closer")
+                    continue
+                if self._drop_trailing_comma():
+                    self._fix("trailing_comma")
+                self._close_dangling()
+                opener = self.stack.pop()[0]
+                closer = "}" if opener == "{" else "]"
+                if ch != closer:
+                    self._fix("mismatched_bracket")
+                self._emit(closer)
+                self._after_value()
+                if not self.stack:
+                    return "".join(self.out), self.pos
+            elif ch == ":":
+                self.pos += 1
+                if self.stack and self.stack[-1][1] == "colon":
+                    self._emit(":")
+                    self.stack[-1][1] = "value"
+                else:
+                    self._fix("stray_colon")
+            elif ch == ",":
+                self.pos += 1
+                top = self.stack[-1] if self.stack else None
+                if top is not None and top[1] == "comma":
+                    self._emit(",")
+                    top[1] = "key" if top[0] == "{" else "value"
+                else:
+                    self._fix("extra_comma")
+            else:
+                self._bare()
+                if not self.stack:
+                    return "".join(self.out), self.pos
+
+        # input ended with containers still open: output was truncated
+        if self.stack:
+            self._fix("truncated")
+        while self.stack:
+            self._drop_trailing_comma()
+            self._close_dangling()
+            opener = self.stack.pop()[0]
+            self._emit("}" if opener == "{" else "]")
+            self._after_value()
+        return "".join(self.out), n
+
+
+def _deep_merge(a: Any, b: Any) -> Any:
+    # first value wins; dicts are merged key by key
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = dict(a)
+        for k, v in b.items():
+            out[k] = _deep_merge(out[k], v) if k in out else v
+        return out
+    return a
+
+
+def repair_json(raw: str) -> Tuple[Any, List[str]]:
+    """
+    Parse almost-JSON. Returns (value, repairs applied). Handles code fences,
+    prose around the JSON, trailing/missing commas, single quotes, unquoted
+    keys, Python literals, raw newlines in strings, unterminated strings and
+    brackets (truncated output) and several concatenated objects (deep-merged,
+    first value wins). Raises JSONRepairError if nothing usable is found.
+    """
+    text, fenced = _strip_fences(raw or "")
+    repairs: List[str] = ["code_fence"] if fenced else []
+
+    values: List[Any] = []
+    pos = 0
+    while True:
+        starts = [i for i in (text.find("{", pos), text.find("[", pos)) if i != -1]
+        if not starts:
+            break
+        start = min(starts)
+        if not values and text[:start].strip():
+            repairs.append("surrounding_text")
+
+        scanner = _Scanner(text, start)
+        out, pos = scanner.scan()
+        try:
+            values.append(json.loads(out))
+        except json.JSONDecodeError as e:
+            raise JSONRepairError(f"unrepairable JSON: {e}") from e
+        for k in scanner.repairs:
+            if k not in repairs:
+                repairs.append(k)
+
+    if not values:
+        raise JSONRepairError("no JSON object found")
+
+    value = values[0]
+    if len(values) > 1:
+        repairs.append("concatenated")
+        for extra in values[1:]:
+            value = _deep_merge(value, extra)
+    return value, repairs
+
+
+class JSONStreamWatcher:
+    """
+    Incremental structure tracker for streamed model output.
+
+    feed() deltas as they arrive; it reports when the top-level value is
+    closed (the rest of the stream can be dropped) and counts completed
+    members at `member_depth` (2 = entries of {"fields": {...}}), so the
+    caller knows when a new field is available to surface early.
+    """
+
+    def __init__(self, *, member_depth: int = 2) -> None:
+        self.member_depth = member_depth
+        self.buffer: List[str] = []
+        self.complete = False
+        self.members_done = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._has_member = False
+
+    @property
+    def text(self) -> str:
+        # joined lazily and kept joined: feed() stays O(delta), a read only joins what arrived since the last one
+        if len(self.buffer) > 1:
+            self.buffer[:] = ["".join(self.buffer)]
+        return self.buffer[0] if self.buffer else ""
+
+    def feed(self, delta: str) -> bool:
+        """Consume a delta. Returns True once the top-level value has closed."""
+        if self.complete:
+            return True
+
+        for i, ch in enumerate(delta):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == self.member_depth:
+                    self._has_member = True
+            elif ch in "{[":
+                self._started = True
+                self._depth += 1
+            elif ch in "}]" and self._started:
+                if self._depth == self.member_depth and self._has_member:
+                    self.members_done += 1
+                    self._has_member = False
+                self._depth -= 1
+                if self._depth == 0:
+                    self.buffer.append(delta[: i + 1])
+                    self.complete = True
+                    return True
+            elif ch == "," and self._depth == self.member_depth and self._has_member:
+                self.members_done += 1
+                self._has_member = False
+            elif not ch.isspace() and self._depth == self.member_depth:
+                self._has_member = True
+
+        self.buffer.append(delta)
+        return False
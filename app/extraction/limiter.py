@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator
+
+# -----------------------
+# Admission control for LLM calls, per model, per process.
+#
+# A call is admitted when (a) fewer than max_concurrency calls to that model are
+# in flight and (b) the requests-per-minute and tokens-per-minute buckets can
+# pay for it. Waiters are served strictly FIFO (a big request at the head is
+# not starved by small ones behind it) and give up after their deadline.
+#
+# Limits come from LLM_MAX_CONCURRENCY / LLM_RPM / LLM_TPM, overridable per
+# model with LLM_LIMITS='{"gpt-4.1-mini": {"rpm": 500, "tpm": 200000, "concurrency": 16}}'.
+# rpm/tpm = 0 disables that bucket.
+#
+# The admission deadline is LLM_ADMISSION_TIMEOUT_S, cut short to the budget
+# left of the enclosing tool call (call_deadline) so a queued call gives up with
+# AdmissionTimeout (transient, retried) before the tool itself times out.
+# -----------------------
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+DEFAULT_ADMISSION_TIMEOUT_S = 15.0
+# kept free for the call itself when admission is cut to the tool's deadline
+DEADLINE_MARGIN_S = 1.0
+WAIT_SAMPLES = 1000
+
+
+class AdmissionTimeout(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    """Continuous-refill bucket; capacity = one minute of budget."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        # settle an estimate: positive delta = used more than reserved (may go into debt)
+        self.level = min(self.capacity, self.level - delta)
+
+
+@dataclass
+class LimiterStats:
+    admitted: int = 0
+    timed_out: int = 0
+    throttled: int = 0  # upstream 429s reported back
+    wait_s_total: float = 0.0
+    wait_s_max: float = 0.0
+    waits: Deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES))
+
+    def record_wait(self, wait_s: float) -> None:
+        self.admitted += 1
+        self.wait_s_total += wait_s
+        self.wait_s_max = max(self.wait_s_max, wait_s)
+        self.waits.append(wait_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.waits)
+
+        def pct(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        return {
+            "admitted": self.admitted,
+            "timed_out": self.timed_out,
+            "throttled": self.throttled,
+            "wait_s_total": round(self.wait_s_total, 6),
+            "wait_s_max": round(self.wait_s_max, 6),
+            "wait_s_p50": round(pct(0.50), 6),
+            "wait_s_p95": round(pct(0.95), 6),
+            "wait_s_p99": round(pct(0.99), 6),
+        }
+
+
+@dataclass
+class _Waiter:
+    fut: asyncio.Future
+    tokens: int
+    enqueued: float
+
+
+class Lease:
+    """An admitted call. Set used_tokens (if known) before release to settle the TPM estimate."""
+
+    def __init__(self, limiter: "ModelLimiter", tokens: int) -> None:
+        self.limiter = limiter
+        self.tokens = tokens
+        self.used_tokens: int | None = None
+        # reported usage split (informational, not used for limiting)
+        self.input_tokens: int | None = None
+        self.output_tokens: int | None = None
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._release(self)
+
+    async def __aenter__(self) -> "Lease":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class ModelLimiter:
+    def __init__(self, model: str, *, max_concurrency: int, rpm: int, tpm: int) -> None:
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = TokenBucket(rpm) if rpm > 0 else None
+        self.tpm = TokenBucket(tpm) if tpm > 0 else None
+        self.stats = LimiterStats()
+
+        self._inflight = 0
+        self._queue: Deque[_Waiter] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+        self._paused_until = 0.0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._queue if not w.fut.done())
+
+    async def acquire(self, tokens: int, *, timeout_s: float | None = None) -> Lease:
+        """Wait (FIFO) until the call fits all limits. Raises AdmissionTimeout after timeout_s."""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(fut=loop.create_future(), tokens=max(1, tokens), enqueued=time.monotonic())
+        self._queue.append(waiter)
+        self._pump()
+
+        try:
+            return await asyncio.wait_for(waiter.fut, timeout=timeout_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.fut.done() and not waiter.fut.cancelled() and waiter.fut.exception() is None:
+                # admitted in the same tick we gave up: hand the slot back
+                waiter.fut.result().release()
+            self._pump()
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.timed_out += 1
+                raise AdmissionTimeout(
+                    f"LLM admission for {self.model} timed out after {timeout_s:.1f}s "
+                    f"({self.queued} queued, {self._inflight} in flight)"
+                ) from e
+            raise
+
+    def pause(self, seconds: float) -> None:
+        """Upstream said 429: admit nothing new for a while."""
+        self.stats.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._schedule(seconds)
+
+    def _release(self, lease: Lease) -> None:
+        self._inflight -= 1
+        if self.tpm is not None and lease.used_tokens is not None:
+            self.tpm.adjust(lease.used_tokens - lease.tokens)
+        self._pump()
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._pump()
+
+    def _pump(self) -> None:
+        while self._queue:
+            head = self._queue[0]
+            if head.fut.done():  # timed out / cancelled
+                self._queue.popleft()
+                continue
+            if self._inflight >= self.max_concurrency:
+                return  # next release pumps
+
+            now = time.monotonic()
+            delay = self._paused_until - now
+            if self.rpm is not None:
+                delay = max(delay, self.rpm.delay_for(1, now))
+            if self.tpm is not None:
+                delay = max(delay, self.tpm.delay_for(head.tokens, now))
+            if delay > 0:
+                self._schedule(delay)
+                return
+
+            if self.rpm is not None:
+                self.rpm.take(1)
+            if self.tpm is not None:
+                self.tpm.take(head.tokens)
+            self._inflight += 1
+            self._queue.popleft()
+            self.stats.record_wait(now - head.enqueued)
+            head.fut.set_result(Lease(self, head.tokens))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "inflight": self._inflight,
+            "queued": self.queued,
+            **self.stats.snapshot(),
+        }
+
+
+# -----------------------
+# Process-wide registry
+# -----------------------
+
+_limiters: Dict[str, ModelLimiter] = {}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _limits_for(model: str) -> Dict[str, int]:
+    limits = {
+        "concurrency": int(_env_number("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        "rpm": int(_env_number("LLM_RPM", DEFAULT_RPM)),
+        "tpm": int(_env_number("LLM_TPM", DEFAULT_TPM)),
+    }
+    try:
+        overrides = json.loads(os.getenv("LLM_LIMITS", "{}")).get(model) or {}
+    except (ValueError, AttributeError):
+        overrides = {}
+    for k in limits:
+        if k in overrides:
+            limits[k] = int(overrides[k])
+    return limits
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    limiter = _limiters.get(model)
+    if limiter is None:
+        limits = _limits_for(model)
+        limiter = ModelLimiter(model, max_concurrency=limits["concurrency"], rpm=limits["rpm"], tpm=limits["tpm"])
+        _limiters[model] = limiter
+    return limiter
+
+
+_call_deadline: ContextVar[float | None] = ContextVar("llm_call_deadline", default=None)
+
+
+@contextmanager
+def call_deadline(timeout_s: float) -> Iterator[None]:
+    """Bound admission waits of the LLM calls made inside to this tool call's budget."""
+    token = _call_deadline.set(time.monotonic() + timeout_s)
+    try:
+        yield
+    finally:
+        _call_deadline.reset(token)
+
+
+def admission_timeout_s() -> float:
+    timeout_s = _env_number("LLM_ADMISSION_TIMEOUT_S", DEFAULT_ADMISSION_TIMEOUT_S)
+    deadline = _call_deadline.get()
+    if deadline is not None:
+        timeout_s = min(timeout_s, max(0.0, deadline - time.monotonic() - DEADLINE_MARGIN_S))
+    return timeout_s
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int) -> int:
+    # ~4 chars/token for the prompt, worst case for the output; settled after the call
+    return len(prompt) // 4 + max_output_tokens
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return {model: lim.snapshot() for model, lim in _limiters.items()}
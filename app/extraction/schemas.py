@@ -1,12 +1,350 @@
 from __future__ import annotations
 
-# MVP: один домен general
-# Day 7: расширим на legal/finance/hr/medical и сделаем разные схемы
-SCHEMA_REGISTRY: dict[str, dict] = {
-    "general.v1": {
-        "instructions": (
-            "Extract key facts into a flat 'fields' object. "
-            "Use only what is explicitly in the text. No inventions."
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Tuple
+
+# -----------------------
+# Extraction schemas: typed field definitions per schema_id (routes are picked
+# by app/runtime/router.py). A schema drives the extraction prompt, the
+# coercion of model output (numbers, dates, currencies) and the presence
+# checks of verification_rules.verify. Each schema is compiled once into a
+# tuple of per-field coercer functions (compile_schema).
+# -----------------------
+
+FieldType = Literal["string", "number", "integer", "date", "currency", "list", "object"]
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str
+    type: FieldType = "string"
+    description: str = ""
+    # verification: a missing required field fails the "<name>_present" check (SOFT)
+    required: bool = False
+    # element type of a list field
+    items: FieldType = "string"
+
+
+@dataclass(frozen=True)
+class SchemaSpec:
+    schema_id: str
+    domain: str
+    instructions: str
+    fields: Tuple[FieldSpec, ...] = ()
+
+    @property
+    def typed(self) -> bool:
+        # an untyped schema (general) accepts whatever flat fields the model finds
+        return bool(self.fields)
+
+
+_RULES = "Use only what is explicitly in the text. No inventions."
+
+SCHEMA_REGISTRY: Dict[str, SchemaSpec] = {
+    spec.schema_id: spec
+    for spec in (
+        SchemaSpec(
+            schema_id="general.v1",
+            domain="general",
+            instructions=f"Extract key facts into a flat 'fields' object. {_RULES}",
+        ),
+        SchemaSpec(
+            schema_id="finance.invoice.v1",
+            domain="finance",
+            instructions=f"The document is an invoice. {_RULES}",
+            fields=(
+                FieldSpec("vendor", "string", "issuer of the invoice", required=True),
+                FieldSpec("invoice_number", "string"),
+                FieldSpec("invoice_date", "date"),
+                FieldSpec("due_date", "date"),
+                FieldSpec("total", "number", "amount due, without currency symbol", required=True),
+                FieldSpec("currency", "currency", "ISO 4217 code, e.g. USD", required=True),
+                FieldSpec("line_items", "list", "{description, quantity, amount} per line", items="object"),
+            ),
+        ),
+        SchemaSpec(
+            schema_id="legal.contract.v1",
+            domain="legal",
+            instructions=f"The document is a contract. {_RULES}",
+            fields=(
+                FieldSpec("parties", "list", "names of the contracting parties", required=True),
+                FieldSpec("effective_date", "date", required=True),
+                FieldSpec("term", "string", "duration of the agreement"),
+                FieldSpec("governing_law", "string", "jurisdiction whose law governs", required=True),
+                FieldSpec("termination", "string", "termination conditions"),
+                FieldSpec("payment_terms", "string"),
+            ),
+        ),
+    )
+}
+
+DEFAULT_SCHEMA_ID = "general.v1"
+
+
+def get_schema(schema_id: str) -> SchemaSpec:
+    return SCHEMA_REGISTRY.get(schema_id) or SCHEMA_REGISTRY[DEFAULT_SCHEMA_ID]
+
+
+# -----------------------
+# Coercers: value -> normalized value; ValueError for garbage
+# -----------------------
+
+CURRENCY_SYMBOLS = {"$": "USD", "us$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR", "₽": "RUB", "₩": "KRW"}
+CURRENCY_NAMES = {
+    "dollar": "USD",
+    "dollars": "USD",
+    "us dollar": "USD",
+    "us dollars": "USD",
+    "euro": "EUR",
+    "euros": "EUR",
+    "pound": "GBP",
+    "pounds": "GBP",
+    "pound sterling": "GBP",
+    "pounds sterling": "GBP",
+    "sterling": "GBP",
+    "yen": "JPY",
+    "rupee": "INR",
+    "rupees": "INR",
+    "swiss franc": "CHF",
+    "swiss francs": "CHF",
+}
+_CURRENCY_CODE_RE = re.compile(r"^[A-Za-z]{3}$")
+
+# an amount with an optional currency marker on either side; (12.00) is negative
+_AMOUNT_RE = re.compile(
+    r"^(\()?\s*(-)?\s*(?:[A-Za-z]{3}|US\$|[$€£¥₹₽₩])?\s*(-)?\s*(\d[\d,.' ]*)\s*(?:[A-Za-z]{3}|[$€£¥₹₽₩])?\s*(\))?$"
+)
+
+MONTHS = {
+    m: i
+    for i, names in enumerate(
+        (
+            ("jan", "january"),
+            ("feb", "february"),
+            ("mar", "march"),
+            ("apr", "april"),
+            ("may",),
+            ("jun", "june"),
+            ("jul", "july"),
+            ("aug", "august"),
+            ("sep", "sept", "september"),
+            ("oct", "october"),
+            ("nov", "november"),
+            ("dec", "december"),
         ),
-    },
+        start=1,
+    )
+    for m in names
+}
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ].*)?$")
+_YMD_RE = re.compile(r"^(\d{4})[/.](\d{1,2})[/.](\d{1,2})$")
+_NUMERIC_DATE_RE = re.compile(r"^(\d{1,2})([/.\-])(\d{1,2})\2(\d{4})$")
+_DAY_MONTH_RE = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?([A-Za-z]+)\.?,?\s+(\d{4})$")
+_MONTH_DAY_RE = re.compile(r"^([A-Za-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})$")
+
+
+def _is_empty(v: Any) -> bool:
+    return v is None or v == "" or v == [] or v == {}
+
+
+def _to_string(v: Any) -> str:
+    if isinstance(v, str):
+        return " ".join(v.split())
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return str(v)
+    raise ValueError("expected a string")
+
+
+def parse_number(v: Any) -> int | float:
+    if isinstance(v, bool):
+        raise ValueError("expected a number")
+    if isinstance(v, (int, float)):
+        return v
+    if not isinstance(v, str):
+        raise ValueError("expected a number")
+
+    m = _AMOUNT_RE.match(v.strip())
+    if m is None:
+        raise ValueError("expected a number")
+    paren_open, minus1, minus2, digits, paren_close = m.groups()
+    digits = digits.replace(" ", "").replace("'", "")
+
+    if "," in digits and "." in digits:
+        # the later separator is the decimal one: 1,234.50 / 1.234,50
+        if digits.rfind(",") > digits.rfind("."):
+            digits = digits.replace(".", "").replace(",", ".")
+        else:
+            digits = digits.replace(",", "")
+    elif "," in digits:
+        groups = digits.split(",")
+        thousands = len(groups) > 2 or len(groups[-1]) == 3
+        digits = digits.replace(",", "") if thousands else digits.replace(",", ".")
+    elif digits.count(".") > 1:
+        digits = digits.replace(".", "")  # 1.234.567
+
+    try:
+        number = float(digits)
+    except ValueError:
+        raise ValueError("expected a number") from None
+    if (paren_open and paren_close) or minus1 or minus2:
+        number = -number
+    return int(number) if number.is_integer() and "." not in digits else number
+
+
+def _to_integer(v: Any) -> int:
+    number = parse_number(v)
+    if isinstance(number, float):
+        if not number.is_integer():
+            raise ValueError("expected an integer")
+        number = int(number)
+    return number
+
+
+def _to_date(v: Any) -> str:
+    if not isinstance(v, str):
+        raise ValueError("expected a date")
+    s = v.strip()
+
+    try:
+        if m := _ISO_DATE_RE.match(s) or _YMD_RE.match(s):
+            y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        elif m := _NUMERIC_DATE_RE.match(s):
+            a, sep, b, y = int(m.group(1)), m.group(2), int(m.group(3)), int(m.group(4))
+            if a > 12 or sep in ".-":
+                d, mo = a, b  # 31/01/2024, 04.03.2024
+            elif b > 12:
+                mo, d = a, b  # 01/31/2024
+            else:
+                raise ValueError("ambiguous date (day/month order)")
+        elif m := _DAY_MONTH_RE.match(s):
+            d, mo, y = int(m.group(1)), MONTHS[m.group(2).lower()], int(m.group(3))
+        elif m := _MONTH_DAY_RE.match(s):
+            mo, d, y = MONTHS[m.group(1).lower()], int(m.group(2)), int(m.group(3))
+        else:
+            raise ValueError("expected a date")
+        return date(y, mo, d).isoformat()
+    except KeyError:
+        raise ValueError("expected a date") from None
+
+
+def _to_currency(v: Any) -> str:
+    if not isinstance(v, str):
+        raise ValueError("expected a currency")
+    s = " ".join(v.split()).strip(" .")
+    key = s.lower()
+    if key in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[key]
+    if key in CURRENCY_NAMES:
+        return CURRENCY_NAMES[key]
+    if _CURRENCY_CODE_RE.match(s):
+        return s.upper()
+    raise ValueError("expected a currency (ISO 4217 code)")
+
+
+def _to_object(v: Any) -> Dict[str, Any]:
+    if not isinstance(v, dict):
+        raise ValueError("expected an object")
+    return v
+
+
+_SCALAR_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "number": parse_number,
+    "integer": _to_integer,
+    "date": _to_date,
+    "currency": _to_currency,
+    "object": _to_object,
 }
+
+
+def _list_coercer(item: Callable[[Any], Any]) -> Callable[[Any], List[Any]]:
+    def coerce(v: Any) -> List[Any]:
+        values = v if isinstance(v, list) else [v]
+        return [item(x) for x in values if not _is_empty(x)]
+
+    return coerce
+
+
+def _present(v: Any) -> bool:
+    return not _is_empty(v)
+
+
+# -----------------------
+# Compiled schemas
+# -----------------------
+
+
+@dataclass
+class ValidationResult:
+    fields: Dict[str, Any] = field(default_factory=dict)
+    # {"field", "value", "error"} per rejected value (the field is set to null)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # keys the schema does not define (dropped from typed schemas)
+    unknown: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    spec: SchemaSpec
+    # (name, coercer, required)
+    coercers: Tuple[Tuple[str, Callable[[Any], Any], bool], ...]
+    # the `fields` object shown to the model
+    prompt_fields: str
+
+    def validate(self, fields: Any) -> ValidationResult:
+        """Coerce model output to the schema. Garbage values become null and are reported."""
+        out = ValidationResult()
+        if not isinstance(fields, dict):
+            out.errors.append({"field": None, "value": _preview(fields), "error": "fields must be an object"})
+            return out
+        if not self.spec.typed:
+            out.fields = dict(fields)
+            return out
+
+        for name, coerce, _ in self.coercers:
+            value = fields.get(name)
+            if _is_empty(value):
+                out.fields[name] = value
+                continue
+            try:
+                out.fields[name] = coerce(value)
+            except ValueError as e:
+                out.fields[name] = None
+                out.errors.append({"field": name, "value": _preview(value), "error": str(e)})
+        out.unknown = [k for k in fields if k not in out.fields]
+        return out
+
+    def missing_required(self, fields: Dict[str, Any]) -> List[str]:
+        return [name for name, _, required in self.coercers if required and not _present(fields.get(name))]
+
+
+def _preview(value: Any, limit: int = 80) -> str:
+    s = repr(value)
+    return s if len(s) <= limit else s[: limit - 3] + "..."
+
+
+def _render_fields(spec: SchemaSpec) -> str:
+    if not spec.typed:
+        return "{}"
+    lines = []
+    for f in spec.fields:
+        kind = f"list of {f.items}" if f.type == "list" else f.type
+        note = f" ({f.description})" if f.description else ""
+        lines.append(f'    "{f.name}": {kind}{note}')
+    return "{\n" + ",\n".join(lines) + "\n  }"
+
+
+@lru_cache(maxsize=None)
+def compile_schema(schema_id: str) -> CompiledSchema:
+    spec = get_schema(schema_id)
+    coercers = []
+    for f in spec.fields:
+        if f.type == "list":
+            coerce = _list_coercer(_SCALAR_COERCERS[f.items])
+        else:
+            coerce = _SCALAR_COERCERS[f.type]
+        coercers.append((f.name, coerce, f.required))
+    return CompiledSchema(spec=spec, coercers=tuple(coercers), prompt_fields=_render_fields(spec))
@@ -1,17 +1,41 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.routes_health import router as health_router
 from app.api.routes_jobs import router as jobs_router
+from app.api.routes_metrics import router as metrics_router
+from app.core.config import settings
+from app.extraction.engine import aclose_client
+from app.runtime.worker import WorkerPool
 from app.ui.routes_ui import router as ui_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs run in background workers, never inside the HTTP request.
+    # Set WORKER_ENABLED=false to run workers only as separate processes
+    # (`python -m app.runtime.worker`).
+    pool: WorkerPool | None = None
+    if settings.worker_enabled:
+        pool = WorkerPool(concurrency=settings.worker_concurrency)
+        await pool.start()
+    try:
+        yield
+    finally:
+        if pool is not None:
+            await pool.stop()
+        await aclose_client()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Agentic Document Ops Platform", version="0.1.0")
+    app = FastAPI(title="Agentic Document Ops Platform", version="0.1.0", lifespan=lifespan)
 
     app.include_router(health_router)
     app.include_router(jobs_router)
+    app.include_router(metrics_router)
     app.include_router(ui_router)
 
     return app
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+# -----------------------
+# Resolution of plan data bindings ($job.*, $steps.*, $signals.*, $result).
+# -----------------------
+
+
+def _get_path(value: Any, path: list[str]) -> Any:
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def resolve(
+    value: Any,
+    *,
+    job: Dict[str, Any],
+    steps: Dict[str, Dict[str, Any] | None],
+    signals: Dict[str, Any],
+    result: Dict[str, Any] | None = None,
+) -> Any:
+    """
+    Replace binding strings inside value (recursively through dicts/lists).
+    Unknown paths and outputs of skipped steps resolve to None.
+    """
+    if isinstance(value, dict):
+        return {k: resolve(v, job=job, steps=steps, signals=signals, result=result) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, job=job, steps=steps, signals=signals, result=result) for v in value]
+    if not isinstance(value, str) or not value.startswith("$"):
+        return value
+
+    if value.startswith("$job."):
+        return job.get(value[len("$job."):])
+    if value.startswith("$signals."):
+        # signal names contain dots themselves: the rest is the whole name
+        return signals.get(value[len("$signals."):])
+    if value.startswith("$steps."):
+        _, step_id, *path = value.split(".")
+        return _get_path(steps.get(step_id), path)
+    if value == "$result" or value.startswith("$result."):
+        return _get_path(result, value.split(".")[1:])
+    return value
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Literal, Optional, Union
-from pydantic import BaseModel, Field, model_validator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class WhenEquals(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     signal: str
     equals: Any
 
 
 class WhenIn(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     signal: str
     in_: List[Any] = Field(alias="in")
 
@@ -18,14 +23,48 @@ When = Union[WhenEquals, WhenIn]
 
 
 class RetryPolicy(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     max_retries: int = 0
-    backoff_ms: int = 0
+    backoff_ms: int = 0  # first retry delay; doubles per retry, full jitter
+    max_backoff_ms: int = 10_000
 
 
 StepType = Literal["extract", "verify", "action", "halt"]
 
+# Data bindings: string values (in inputs, emits, artifact_from) starting with one
+# of these prefixes are resolved at run time (see app/runtime/bindings.py).
+#   $job.<field>          job context: id, source_text, domain, pipeline_id, schema_id
+#   $steps.<id>[.<path>]  output of an earlier step (implies depends_on <id>)
+#   $signals.<name>       current value of a signal (implies depends_on the step emitting it)
+#   $result[.<path>]      this step's own output (emits / artifact_from only)
+BINDING_PREFIXES = ("$job.", "$steps.", "$signals.", "$result")
+
+
+def _step_refs(value: Any) -> List[str]:
+    if isinstance(value, str) and value.startswith("$steps."):
+        return [value.split(".")[1]]
+    if isinstance(value, dict):
+        return [r for v in value.values() for r in _step_refs(v)]
+    if isinstance(value, list):
+        return [r for v in value for r in _step_refs(v)]
+    return []
+
+
+def _signal_refs(value: Any) -> List[str]:
+    if isinstance(value, str) and value.startswith("$signals."):
+        return [value[len("$signals."):]]
+    if isinstance(value, dict):
+        return [r for v in value.values() for r in _signal_refs(v)]
+    if isinstance(value, list):
+        return [r for v in value for r in _signal_refs(v)]
+    return []
+
 
 class PlanStep(BaseModel):
+    # shared by every run of a compiled plan (see compile_plan): never mutated after validation
+    model_config = ConfigDict(frozen=True)
+
     id: str
     type: StepType
     tool: Optional[str] = None
@@ -34,8 +73,23 @@ class PlanStep(BaseModel):
     retry: Optional[RetryPolicy] = None
     reason: Optional[str] = None
 
+    # steps that must finish (or be skipped) first; $steps.<id> bindings and reads
+    # (`when`, $signals.<name>) of a signal another step emits are added implicitly (Plan)
+    depends_on: List[str] = Field(default_factory=list)
+    # signals to set from this step's output, e.g. {"verification.verdict": "$result.report.verdict"}
+    emits: Dict[str, Any] = Field(default_factory=dict)
+    # persist (part of) the output as a job artifact
+    artifact: Optional[str] = None
+    artifact_from: str = "$result"
+
     @model_validator(mode="after")
     def validate_step(self):
+        for ref in _step_refs(self.inputs):
+            if ref not in self.depends_on:
+                self.depends_on.append(ref)
+        if self.id in self.depends_on:
+            raise ValueError(f"step {self.id} depends on itself")
+
         if self.type == "halt":
             if not self.reason:
                 raise ValueError("halt step requires reason")
@@ -48,6 +102,8 @@ class PlanStep(BaseModel):
 
 
 class PlanLimits(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     max_steps: int = 12
     max_tool_calls: int = 10
     max_cost_units: int = 200
@@ -69,4 +125,107 @@ class Plan(BaseModel):
         if len(ids) != len(set(ids)):
             raise ValueError("duplicate step ids")
 
+        # a step reading a signal runs after the step that emits it
+        writers: Dict[str, str] = {}
+        for s in self.steps:
+            for name in s.emits:
+                if name in writers:
+                    raise ValueError(f"signal {name} is emitted by both {writers[name]} and {s.id}")
+                writers[name] = s.id
+        for i, s in enumerate(self.steps):
+            reads = _signal_refs(s.inputs) + _signal_refs(s.emits)
+            if s.when is not None:
+                reads.append(s.when.signal)
+            added = [w for w in dict.fromkeys(writers.get(n) for n in reads) if w and w != s.id and w not in s.depends_on]
+            if added:
+                # steps may be shared between plans: copy instead of mutating
+                self.steps[i] = s.model_copy(update={"depends_on": [*s.depends_on, *added]})
+
+        known = set(ids)
+        for s in self.steps:
+            missing = [d for d in s.depends_on if d not in known]
+            if missing:
+                raise ValueError(f"step {s.id} depends on unknown steps: {missing}")
+
+        self.waves()  # rejects cycles
         return self
+
+    def waves(self) -> List[List[PlanStep]]:
+        """
+        Steps grouped into dependency levels: every step of a wave depends only on
+        steps of earlier waves. Plan order is kept inside a wave.
+        """
+        level: Dict[str, int] = {}
+        remaining = list(self.steps)
+        while remaining:
+            progressed = []
+            for s in remaining:
+                if all(d in level for d in s.depends_on):
+                    level[s.id] = 1 + max((level[d] for d in s.depends_on), default=-1)
+                    progressed.append(s)
+            if not progressed:
+                raise ValueError(f"dependency cycle among steps: {[s.id for s in remaining]}")
+            remaining = [s for s in remaining if s.id not in level]
+
+        out: List[List[PlanStep]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for s in self.steps:
+            out[level[s.id]].append(s)
+        return out
+
+
+# -----------------------
+# Compiled plans
+# -----------------------
+
+# signals -> does the step run
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _always(signals: Dict[str, Any]) -> bool:
+    return True
+
+
+def compile_when(when: When | None) -> Predicate:
+    """Turn a `when` condition into a plain callable over the signals dict."""
+    if when is None:
+        return _always
+
+    signal = when.signal
+    if isinstance(when, WhenEquals):
+        expected = when.equals
+        return lambda signals: signals.get(signal) == expected
+
+    options = tuple(when.in_)
+    return lambda signals: signals.get(signal) in options
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    step: PlanStep
+    matches: Predicate
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    A validated plan with its waves and predicates precomputed. Templates are
+    built once per route and shared; a run only binds its job_id
+    (dataclasses.replace), nothing is re-validated.
+    """
+
+    job_id: str
+    limits: PlanLimits
+    steps: Tuple[PlanStep, ...]
+    waves: Tuple[Tuple[CompiledStep, ...], ...]
+
+
+def compile_plan(plan: Plan) -> CompiledPlan:
+    return CompiledPlan(
+        job_id=plan.job_id,
+        limits=plan.limits,
+        steps=tuple(plan.steps),
+        waves=tuple(
+            tuple(CompiledStep(step=s, matches=compile_when(s.when)) for s in wave)
+            for wave in plan.waves()
+        ),
+    )
@@ -1,12 +1,20 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import write_audit_event
+from app.core.metrics import BUDGET_EXCEEDED, COST_UNITS, POLICY_DENIALS, TOOL_SECONDS
+from app.core.usage import StepUsage, track_usage
 from app.db.models import AuditEventType
+from app.runtime.dsl import RetryPolicy
 from app.runtime.policy import ToolPolicy
+from app.runtime.pricing import GLOBAL_BUDGET, TOOL_CALL_UNITS, usage_cost_units
+from app.runtime.retry import backoff_s, get_breaker
+from app.tools.errors import is_retryable, is_upstream_failure
 
 
 @dataclass
@@ -19,34 +27,97 @@ class ExecLimits:
 class ExecState:
     steps: int = 0
     tool_calls: int = 0
-    cost_units: int = 0
+    cost_units: float = 0.0
+    # run clock: spans are offsets from `started` (monotonic); started_at places the run in wall time
+    started: float = field(default_factory=time.monotonic)
+    started_at: float = field(default_factory=time.time)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"steps": self.steps, "tool_calls": self.tool_calls, "cost_units": round(self.cost_units, 4)}
 
 class BudgetExceeded(RuntimeError): ...
 class StepLimitExceeded(RuntimeError): ...
 
+# audit events buffered by a concurrently running step, written later in plan order
+AuditSink = List[Tuple[AuditEventType, Dict[str, Any]]]
+
 class BoundedExecutor:
-    def __init__(self, *, limits: ExecLimits) -> None:
+    def __init__(self, *, limits: ExecLimits, autocommit: bool = True) -> None:
         self.limits = limits
+        # autocommit=False: TOOL_CALLED/TOOL_RESULT events stay pending until the
+        # caller's next checkpoint commit (see runner). POLICY_DENIED is always committed.
+        self.autocommit = autocommit
 
-    def _charge(self, state: ExecState, cost: int = 1) -> None:
-        state.cost_units += cost
-        if state.cost_units > self.limits.max_cost_units:
+    def _charge(self, state: ExecState, *, tool_name: str, cost: float = TOOL_CALL_UNITS) -> None:
+        """Charge a call up front; refused if the job's or the global budget would be exceeded."""
+        if GLOBAL_BUDGET.exceeded():
+            BUDGET_EXCEEDED.inc("global_cost_units")
+            raise BudgetExceeded("global cost budget exceeded (rolling window)")
+        if state.cost_units + cost > self.limits.max_cost_units:
+            BUDGET_EXCEEDED.inc("max_cost_units")
             raise BudgetExceeded("max_cost_units exceeded")
+        self._spend(state, tool_name=tool_name, cost=cost)
 
-    async def run_tool(
+    def _spend(self, state: ExecState, *, tool_name: str, cost: float) -> None:
+        # usage is charged after the fact and never refused: it has been spent already.
+        # A call that crosses the budget completes; the next one is refused.
+        state.cost_units += cost
+        GLOBAL_BUDGET.charge(cost)
+        COST_UNITS.inc(tool_name, value=cost)
+
+    async def _audit(
         self,
-        *,
         session: AsyncSession,
+        *,
         job_id: str,
-        tool_name: str,
-        tool_fn,
-        inputs: Dict[str, Any],
-        ctx: Dict[str, Any],
+        event_type: AuditEventType,
+        payload: Dict[str, Any],
+        sink: AuditSink | None,
+    ) -> None:
+        if sink is not None:
+            sink.append((event_type, payload))
+            return
+        await write_audit_event(session, job_id=job_id, event_type=event_type, payload=payload, commit=self.autocommit)
+
+    async def flush_audit(self, session: AsyncSession, *, job_id: str, sink: AuditSink) -> None:
+        """Write a step's buffered events (call in plan order for a deterministic trail)."""
+        for event_type, payload in sink:
+            await write_audit_event(session, job_id=job_id, event_type=event_type, payload=payload, commit=self.autocommit)
+        sink.clear()
+
+    def _span(
+        self,
         state: ExecState,
-        policy: ToolPolicy,
+        *,
+        start: float,
+        attempts: int,
+        cost_units: float,
+        backoff_s: float,
+        usage: StepUsage,
     ) -> Dict[str, Any]:
-        # 0) POLICY CHECK (deny-by-default) — before any logging or budget charging
+        """Timing and cost of one step (TOOL_RESULT / tool_failed payloads, GET /jobs/{id}/timeline)."""
+        end = time.monotonic()
+        return {
+            "run_started_at": round(state.started_at, 3),
+            "start_ms": round((start - state.started) * 1000, 3),
+            "end_ms": round((end - state.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            "queue_ms": round(usage.queue_s * 1000, 3),
+            "llm_ms": round(usage.llm_s * 1000, 3),
+            "backoff_ms": round(backoff_s * 1000, 3),
+            "attempts": attempts,
+            "llm_calls": usage.llm_calls,
+            "repair_calls": usage.repair_calls,
+            "tokens_in": usage.tokens_in,
+            "tokens_out": usage.tokens_out,
+            "cost_units": round(cost_units, 4),
+            "state": state.snapshot(),
+        }
+
+    async def check_policy(self, session: AsyncSession, *, job_id: str, tool_name: str, policy: ToolPolicy) -> None:
+        """Deny-by-default: writes and commits POLICY_DENIED, then raises PermissionError."""
         if not policy.is_allowed(tool_name):
+            POLICY_DENIALS.inc(tool_name)
             await write_audit_event(
                 session,
                 job_id=job_id,
@@ -55,36 +126,163 @@ class BoundedExecutor:
             )
             raise PermissionError(f"tool not allowed by policy: {tool_name}")
 
-        # 1) BUDGET / LIMITS
+    async def run_tool(
+        self,
+        *,
+        session: AsyncSession,
+        job_id: str,
+        tool_name: str,
+        tool_fn,
+        inputs: Dict[str, Any],
+        ctx: Dict[str, Any],
+        state: ExecState,
+        policy: ToolPolicy,
+        retry: RetryPolicy | None = None,
+        audit_sink: AuditSink | None = None,
+        step_id: str | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Run one plan step's tool under policy, limits and retry policy.
+        With audit_sink, TOOL_CALLED/ERROR/TOOL_RESULT events are buffered there
+        instead of written, so several steps can run concurrently and the caller
+        writes their events in plan order (flush_audit). POLICY_DENIED is always
+        written and committed immediately.
+        """
+        # 0) POLICY CHECK (deny-by-default) — before any logging or budget charging
+        await self.check_policy(session, job_id=job_id, tool_name=tool_name, policy=policy)
+
+        # 1) BUDGET / LIMITS (a step counts once; every attempt is a tool call and costs)
         if state.steps >= self.limits.max_steps:
+            BUDGET_EXCEEDED.inc("max_steps")
             raise StepLimitExceeded("max_steps exceeded")
-        if state.tool_calls >= self.limits.max_tool_calls:
-            raise BudgetExceeded("max_tool_calls exceeded")
-
         state.steps += 1
-        state.tool_calls += 1
-        self._charge(state, cost=1)
 
         # 2) REDACT INPUTS FOR AUDIT
         allow_keys = policy.allowed_audit_keys(tool_name)
         safe_inputs = {k: inputs.get(k) for k in allow_keys if k in inputs}
 
-        await write_audit_event(
-            session,
-            job_id=job_id,
-            event_type=AuditEventType.TOOL_CALLED,
-            payload={"tool": tool_name, "inputs": safe_inputs},
-        )
+        # 3) EXECUTE TOOL (retrying transient failures per the step's RetryPolicy)
+        max_retries = retry.max_retries if retry else 0
+        breaker = get_breaker(tool_name)
+        attempt = 0
+        charged = 0.0
+        usage_charged = 0.0
+        backoff_total = 0.0
+        start = time.monotonic()
+        with track_usage() as usage:
+            try:
+                while True:
+                    attempt += 1
+                    if state.tool_calls >= self.limits.max_tool_calls:
+                        BUDGET_EXCEEDED.inc("max_tool_calls")
+                        raise BudgetExceeded("max_tool_calls exceeded")
+                    state.tool_calls += 1
+                    self._charge(state, tool_name=tool_name)
+                    charged += TOOL_CALL_UNITS
+
+                    called: Dict[str, Any] = {"tool": tool_name, "inputs": safe_inputs}
+                    if step_id is not None:
+                        called["step_id"] = step_id
+                    if attempt > 1:
+                        called["attempt"] = attempt
+                    await self._audit(
+                        session,
+                        job_id=job_id,
+                        event_type=AuditEventType.TOOL_CALLED,
+                        payload=called,
+                        sink=audit_sink,
+                    )
+
+                    try:
+                        breaker.before_call()  # CircuitOpenError: fail fast, not retried
+                        t0 = time.perf_counter()
+                        try:
+                            result = await tool_fn(inputs=inputs, ctx=ctx)
+                        except Exception as e:
+                            TOOL_SECONDS.observe(time.perf_counter() - t0, tool_name, "error")
+                            if is_upstream_failure(e):
+                                breaker.record_failure()
+                            elif is_retryable(e):
+                                # our own deadline or queueing (local timeouts, pool starvation):
+                                # says nothing about the backend
+                                breaker.release()
+                            else:
+                                breaker.record_success()  # backend answered; the call itself was bad
+                            raise
+                        except BaseException:
+                            # cancelled (lease lost, shutdown): no verdict on the tool, but the
+                            # half-open trial slot must not stay taken for the life of the process
+                            breaker.release()
+                            raise
+                        finally:
+                            # what this attempt consumed (LLM tokens), failed or not
+                            used = usage_cost_units(usage) - usage_charged
+                            if used > 0:
+                                self._spend(state, tool_name=tool_name, cost=used)
+                                usage_charged += used
+                                charged += used
+                        TOOL_SECONDS.observe(time.perf_counter() - t0, tool_name, "ok")
+                        breaker.record_success()
+                        break
+                    except Exception as e:
+                        if not is_retryable(e) or attempt > max_retries:
+                            raise
+                        delay_s = backoff_s(retry, attempt)
+                        await self._audit(
+                            session,
+                            job_id=job_id,
+                            event_type=AuditEventType.ERROR,
+                            payload={
+                                "kind": "tool_attempt_failed",
+                                "tool": tool_name,
+                                "attempt": attempt,
+                                "error": f"{type(e).__name__}: {e}",
+                                "retry_in_ms": int(delay_s * 1000),
+                            },
+                            sink=audit_sink,
+                        )
+                        backoff_total += delay_s
+                        await asyncio.sleep(delay_s)
+            except Exception as e:
+                # the step's span is kept even when it fails (limits included)
+                failed: Dict[str, Any] = {
+                    "kind": "tool_failed",
+                    "tool": tool_name,
+                    "attempt": attempt,
+                    "error": f"{type(e).__name__}: {e}",
+                }
+                if step_id is not None:
+                    failed["step_id"] = step_id
+                failed["span"] = self._span(
+                    state, start=start, attempts=attempt, cost_units=charged, backoff_s=backoff_total, usage=usage
+                )
+                await self._audit(
+                    session,
+                    job_id=job_id,
+                    event_type=AuditEventType.ERROR,
+                    payload=failed,
+                    sink=audit_sink,
+                )
+                raise
+
+        span = self._span(state, start=start, attempts=attempt, cost_units=charged, backoff_s=backoff_total, usage=usage)
 
-        # 3) EXECUTE TOOL
-        result = await tool_fn(inputs=inputs, ctx=ctx)
+        # 4) AUDIT RESULT (no sensitive content, only keys + tool-declared meta, e.g. cache hit)
+        payload: Dict[str, Any] = {"tool": tool_name, "result_keys": list(result.keys())}
+        if step_id is not None:
+            payload["step_id"] = step_id
+        if isinstance(result.get("meta"), dict):
+            payload["meta"] = result["meta"]
+        if attempt > 1:
+            payload["attempts"] = attempt
+        payload["span"] = span
 
-        # 4) AUDIT RESULT (no sensitive content, only keys)
-        await write_audit_event(
+        await self._audit(
             session,
             job_id=job_id,
             event_type=AuditEventType.TOOL_RESULT,
-            payload={"tool": tool_name, "result_keys": list(result.keys())},
+            payload=payload,
+            sink=audit_sink,
         )
 
         return result
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from app.extraction.schemas import CURRENCY_NAMES, CURRENCY_SYMBOLS, MONTHS, parse_number
+
+# -----------------------
+# Source grounding: do extracted values actually occur in the document?
+#
+# The source is indexed once per verification: one regex pass tokenizes the
+# lowercased text into word tokens (numbers without leading zeros, "4th" ->
+# "4") with their character spans, plus token -> positions. A value is looked
+# up by its own tokens: the rarest token anchors the candidate windows and
+# only those windows are compared, so the cost of a lookup depends on how
+# often its words occur, not on the length of the document. Numbers are
+# matched by value ("1,440.00" == 1440, "(120.00)" == -120), dates in their usual renderings,
+# currencies by code, symbol or name. Tokens that do not occur at all are
+# matched fuzzily against the document's vocabulary through a trigram index
+# (built only when needed), which tolerates OCR noise and small typos.
+# -----------------------
+
+# a window matches when its mean token score reaches FUZZY_MIN_SCORE; a single
+# source token counts as a fuzzy stand-in from FUZZY_MIN_TOKEN_SCORE similarity
+FUZZY_MIN_SCORE = 0.8
+FUZZY_MIN_TOKEN_SCORE = 0.6
+FUZZY_MIN_TOKEN_LEN = 4
+MAX_VALUES = 200
+
+_TOKEN_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d[\d,.']*\d|\d")
+# a sign in front of a number: "-5", "- $5", "(120.00)", "(USD 120.00)"
+_NEG_PREFIX_RE = re.compile(r"(?:-|\()\s*(?:[A-Za-z]{3}|US\$|[$€£¥₹₽₩])?\s*$")
+_PAREN_SUFFIX_RE = re.compile(r"\s*(?:[A-Za-z]{3}|[$€£¥₹₽₩])?\s*\)")
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_ORDINALS = ("st", "nd", "rd", "th")
+
+_MONTH_NAMES: Dict[int, List[str]] = {}
+for _name, _num in MONTHS.items():
+    _MONTH_NAMES.setdefault(_num, []).append(_name)
+
+
+def _norm_token(tk: str) -> str:
+    if tk[0].isdigit():
+        if tk.isdigit():
+            return tk.lstrip("0") or "0"
+        if tk.endswith(_ORDINALS) and tk[:-2].isdigit():
+            return tk[:-2].lstrip("0") or "0"
+    return tk
+
+
+def tokenize(text: str) -> List[str]:
+    return [_norm_token(tk) for tk in _TOKEN_RE.findall(text.lower())]
+
+
+def _trigrams(tk: str) -> Set[str]:
+    padded = f" {tk} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class Match:
+    start: int
+    end: int
+    score: float  # 1.0 = exact
+    method: str  # text | fuzzy | number | date | currency
+
+
+class SourceIndex:
+    def __init__(self, text: str) -> None:
+        self.text = text or ""
+        lowered = self.text.lower()
+        if len(lowered) != len(self.text):
+            # lower() changed lengths (rare scripts): spans must come from the original
+            lowered = self.text
+
+        self.tokens: List[str] = []
+        self.spans: List[Tuple[int, int]] = []
+        self.positions: Dict[str, List[int]] = {}
+        for m in _TOKEN_RE.finditer(lowered):
+            tk = _norm_token(m.group().lower())
+            self.positions.setdefault(tk, []).append(len(self.tokens))
+            self.tokens.append(tk)
+            self.spans.append(m.span())
+
+        self._numbers: Dict[float, Tuple[int, int]] | None = None
+        self._trigram_index: Dict[str, Set[str]] | None = None
+        self._similar: Dict[str, List[Tuple[str, float]]] = {}
+
+    # -- lazily built indexes --
+
+    def _number_index(self) -> Dict[float, Tuple[int, int]]:
+        if self._numbers is None:
+            self._numbers = {}
+            text = self.text
+            for m in _NUMBER_RE.finditer(text):
+                try:
+                    value = float(parse_number(m.group()))
+                except ValueError:
+                    continue
+                self._numbers.setdefault(round(value, 6), m.span())
+                # negative as parse_number reads it: "-5", "(120.00)"; indexed with its sign
+                start, end = m.span()
+                neg = _NEG_PREFIX_RE.search(text, max(0, start - 8), start)
+                if neg is None:
+                    continue
+                if neg.group().startswith("("):
+                    close = _PAREN_SUFFIX_RE.match(text, end, end + 8)
+                    if close is None:
+                        continue
+                    end = close.end()
+                self._numbers.setdefault(round(-value, 6), (neg.start(), end))
+        return self._numbers
+
+    def _similar_tokens(self, tk: str) -> List[Tuple[str, float]]:
+        """Vocabulary tokens close to tk (fuzzy), best first."""
+        if tk in self._similar:
+            return self._similar[tk]
+        out: List[Tuple[str, float]] = []
+        if len(tk) >= FUZZY_MIN_TOKEN_LEN and not tk.isdigit():
+            if self._trigram_index is None:
+                self._trigram_index = {}
+                for word in self.positions:
+                    if len(word) >= FUZZY_MIN_TOKEN_LEN - 1:
+                        for g in _trigrams(word):
+                            self._trigram_index.setdefault(g, set()).add(word)
+
+            grams = _trigrams(tk)
+            shared: Dict[str, int] = {}
+            for g in grams:
+                for word in self._trigram_index.get(g, ()):
+                    shared[word] = shared.get(word, 0) + 1
+            for word, n in shared.items():
+                # cheap filter before the exact ratio
+                if n * 3 < len(grams):
+                    continue
+                ratio = SequenceMatcher(None, tk, word, autojunk=False).ratio()
+                if ratio >= FUZZY_MIN_TOKEN_SCORE:
+                    out.append((word, ratio))
+            out.sort(key=lambda x: -x[1])
+        self._similar[tk] = out
+        return out
+
+    # -- lookups --
+
+    def find_tokens(self, query: List[str], *, fuzzy: bool = True) -> Match | None:
+        """Best window of the source whose tokens match the query tokens in order."""
+        n = len(query)
+        if n == 0:
+            return None
+
+        # acceptable source tokens (and their score) per query position
+        allowed: List[Dict[str, float]] = []
+        for tk in query:
+            options = {tk: 1.0} if tk in self.positions else {}
+            if fuzzy and not options:
+                options.update(self._similar_tokens(tk))
+            allowed.append(options)
+
+        # unmatched positions score 0: give up when even the best window can't reach the threshold
+        # (a hallucinated value would otherwise scan every occurrence of its commonest word)
+        if sum(max(options.values(), default=0.0) for options in allowed) / n < FUZZY_MIN_SCORE:
+            return None
+
+        # anchor on the query token with the fewest occurrences
+        best_k, best_positions = -1, None
+        for k, options in enumerate(allowed):
+            occ = [p for word in options for p in self.positions[word]]
+            if occ and (best_positions is None or len(occ) < len(best_positions)):
+                best_k, best_positions = k, occ
+        if best_positions is None:
+            return None
+
+        best: Match | None = None
+        tokens = self.tokens
+        for p in best_positions:
+            start = p - best_k
+            if start < 0 or start + n > len(tokens):
+                continue
+            score = sum(allowed[i].get(tokens[start + i], 0.0) for i in range(n)) / n
+            if score >= FUZZY_MIN_SCORE and (best is None or score > best.score):
+                best = Match(
+                    start=self.spans[start][0],
+                    end=self.spans[start + n - 1][1],
+                    score=round(score, 3),
+                    method="text" if score == 1.0 else "fuzzy",
+                )
+                if score == 1.0:
+                    break
+        return best
+
+    def find_text(self, value: str) -> Match | None:
+        return self.find_tokens(tokenize(value))
+
+    def find_number(self, value: float) -> Match | None:
+        numbers = self._number_index()
+        span = numbers.get(round(float(value), 6))
+        if span is None and value < 0:
+            # the sign may be in the wording ("Credit: 120.00", "refund of 5")
+            span = numbers.get(round(-float(value), 6))
+        if span is None:
+            return None
+        return Match(start=span[0], end=span[1], score=1.0, method="number")
+
+    def find_date(self, iso: str) -> Match | None:
+        m = _ISO_DATE_RE.match(iso)
+        if m is None:
+            return self.find_text(iso)
+        y, mo, d = m.group(1), str(int(m.group(2))), str(int(m.group(3)))
+        variants = [[y, mo, d], [d, mo, y], [mo, d, y]]
+        for name in _MONTH_NAMES.get(int(mo), []):
+            variants += [[d, name, y], [name, d, y], [d, "of", name, y]]
+        for v in variants:
+            found = self.find_tokens(v, fuzzy=False)
+            if found is not None:
+                return Match(start=found.start, end=found.end, score=1.0, method="date")
+        return None
+
+    def find_currency(self, code: str) -> Match | None:
+        code = code.strip()
+        found = self.find_tokens([code.lower()], fuzzy=False)
+        if found is not None:
+            return Match(start=found.start, end=found.end, score=1.0, method="currency")
+        for sym, c in CURRENCY_SYMBOLS.items():
+            if c == code.upper():
+                i = self.text.find(sym) if not sym.isalpha() else self.text.lower().find(sym)
+                if i != -1:
+                    return Match(start=i, end=i + len(sym), score=1.0, method="currency")
+        for name, c in CURRENCY_NAMES.items():
+            if c == code.upper():
+                found = self.find_tokens(tokenize(name), fuzzy=False)
+                if found is not None:
+                    return Match(start=found.start, end=found.end, score=1.0, method="currency")
+        return None
+
+
+# -----------------------
+# Grounding extracted fields
+# -----------------------
+
+
+@dataclass
+class GroundingReport:
+    checked: int = 0
+    # path -> [start, end] in source_text
+    spans: Dict[str, List[int]] = field(default_factory=dict)
+    # path -> score, for values matched only approximately
+    fuzzy: Dict[str, float] = field(default_factory=dict)
+    ungrounded: List[str] = field(default_factory=list)
+
+    @property
+    def grounded(self) -> int:
+        return self.checked - len(self.ungrounded)
+
+    def to_details(self, limit: int = 50) -> Dict[str, Any]:
+        return {
+            "checked": self.checked,
+            "grounded": self.grounded,
+            "ungrounded": self.ungrounded[:limit],
+            "fuzzy": dict(list(self.fuzzy.items())[:limit]),
+            "spans": dict(list(self.spans.items())[:limit]),
+        }
+
+
+def _leaves(value: Any, path: str) -> Iterator[Tuple[str, Any]]:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _leaves(v, f"{path}.{k}")
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _leaves(v, f"{path}[{i}]")
+    elif value is not None and not isinstance(value, bool):
+        yield path, value
+
+
+def ground_fields(
+    index: SourceIndex,
+    fields: Dict[str, Any],
+    *,
+    types: Dict[str, str] | None = None,
+) -> GroundingReport:
+    """
+    Look up every scalar value of fields (nested lists/objects included) in the
+    source. types (field name -> schema field type) selects date/currency
+    matching; untyped fields are matched as text or numbers.
+    """
+    types = types or {}
+    report = GroundingReport()
+    for name, top in fields.items():
+        kind = types.get(name)
+        for path, value in _leaves(top, name):
+            if report.checked >= MAX_VALUES:
+                return report
+
+            if isinstance(value, (int, float)):
+                match = index.find_number(value)
+            elif isinstance(value, str):
+                if not tokenize(value):
+                    continue
+                if kind == "date":
+                    match = index.find_date(value)
+                elif kind == "currency":
+                    match = index.find_currency(value)
+                else:
+                    match = index.find_text(value)
+            else:
+                continue
+
+            report.checked += 1
+            if match is None:
+                report.ungrounded.append(path)
+                continue
+            report.spans[path] = [match.start, match.end]
+            if match.score < 1.0:
+                report.fuzzy[path] = match.score
+    return report
@@ -1,20 +1,44 @@
 from __future__ import annotations
 
-from app.runtime.dsl import Plan, PlanLimits, PlanStep, WhenEquals
+from dataclasses import replace
+from functools import lru_cache
 
+from app.runtime.router import route_document
+from app.runtime.dsl import CompiledPlan, Plan, PlanLimits, PlanStep, RetryPolicy, WhenEquals, compile_plan
 
-def build_plan(*, job_id: str, source_text: str) -> tuple[Plan, dict]:
+# job_id of cached plan templates; replaced per run
+TEMPLATE_JOB_ID = "template"
+
+
+def build_plan(*, job_id: str, source_text: str) -> tuple[CompiledPlan, dict]:
     # Routing decision (single source of truth)
-    domain = "general"
-    pipeline_id = "general.default"
-    schema_id = "general.v1"
+    decision = route_document(source_text)
+    domain = decision.domain
+    pipeline_id = decision.pipeline_id
+    schema_id = decision.schema_id
+
+    routing = {
+        "domain": domain,
+        "pipeline_id": pipeline_id,
+        "schema_id": schema_id,
+        "confidence": decision.confidence,
+    }
+
+    # only the job id is per run: the plan itself is compiled once per route
+    return replace(compile_route_plan(domain, pipeline_id, schema_id), job_id=job_id), routing
+
 
+@lru_cache(maxsize=64)
+def compile_route_plan(domain: str, pipeline_id: str, schema_id: str) -> CompiledPlan:
     limits = PlanLimits(
         max_steps=12,
         max_tool_calls=8,
-        max_cost_units=20,
+        # cost units (app/runtime/pricing.py): tool calls + LLM tokens, $0.20 per job
+        max_cost_units=2000,
     )
 
+    # Data flows through bindings ($job.*, $steps.<id>.*, $result.*; see runtime.bindings):
+    # a step runs once the steps it reads from are done, independent steps run together.
     steps = [
         PlanStep(
             id="extract",
@@ -23,7 +47,13 @@ def build_plan(*, job_id: str, source_text: str) -> tuple[Plan, dict]:
             inputs={
                 "schema_id": schema_id,
                 "pipeline_id": pipeline_id,
+                "source_text": "$job.source_text",
             },
+            # model timeouts / 429s / 5xx are retried; bad output is not
+            retry=RetryPolicy(max_retries=2, backoff_ms=500),
+            emits={"extraction.ok": True},
+            artifact="extracted_json",
+            artifact_from="$result.extracted",
         ),
         PlanStep(
             id="verify",
@@ -32,48 +62,69 @@ def build_plan(*, job_id: str, source_text: str) -> tuple[Plan, dict]:
             inputs={
                 "domain": domain,
                 "schema_id": schema_id,
+                "source_text": "$job.source_text",
+                "extracted": "$steps.extract.extracted",
             },
+            emits={"verification.verdict": "$result.report.verdict"},
+            artifact="verification_report",
+            artifact_from="$result.report",
         ),
         PlanStep(
             id="export_json",
             type="action",
             tool="actions.export_json",
-            inputs={},
+            depends_on=["verify"],
+            inputs={"extracted": "$steps.extract.extracted"},
+            artifact="export_result",
         ),
         PlanStep(
             id="ticket_warn",
             type="action",
             tool="actions.create_ticket",
             when=WhenEquals(signal="verification.verdict", equals="WARN"),
-            inputs={"reason": "verification_warn"},
+            inputs={
+                "queue": "docops-review",
+                "title": "verification_warn",
+                "report": "$steps.verify.report",
+            },
+            artifact="ticket",
         ),
         PlanStep(
             id="ticket_fail",
             type="action",
             tool="actions.create_ticket",
             when=WhenEquals(signal="verification.verdict", equals="FAIL"),
-            inputs={"reason": "verification_fail"},
+            inputs={
+                "queue": "docops-failures",
+                "title": "verification_fail",
+                "report": "$steps.verify.report",
+            },
+            artifact="ticket",
         ),
         PlanStep(
             id="email_pass",
             type="action",
             tool="actions.draft_email",
             when=WhenEquals(signal="verification.verdict", equals="PASS"),
+            depends_on=["verify"],
             inputs={
                 "to": "ops@example.com",
                 "template_id": f"{domain}_processed",
+                "extracted": "$steps.extract.extracted",
             },
+            artifact="email_draft",
         ),
         PlanStep(
             id="halt_on_fail",
             type="halt",
             when=WhenEquals(signal="verification.verdict", equals="FAIL"),
+            depends_on=["export_json", "ticket_warn", "ticket_fail", "email_pass"],
             reason="verification_failed",
         ),
     ]
 
     plan = Plan(
-        job_id=job_id,
+        job_id=TEMPLATE_JOB_ID,
         domain=domain,
         pipeline_id=pipeline_id,
         schema_id=schema_id,
@@ -81,10 +132,4 @@ def build_plan(*, job_id: str, source_text: str) -> tuple[Plan, dict]:
         steps=steps,
     )
 
-    routing = {
-        "domain": domain,
-        "pipeline_id": pipeline_id,
-        "schema_id": schema_id,
-    }
-
-    return plan, routing
+    return compile_plan(plan)
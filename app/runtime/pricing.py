@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Deque, Dict, List
+
+from app.core.config import settings
+from app.core.usage import StepUsage
+
+# -----------------------
+# Cost accounting: usage -> cost units.
+#
+# 1 cost unit = COST_UNIT_USD. Every tool call costs TOOL_CALL_UNITS (the
+# executor's own overhead, and what keeps a loop of free calls bounded); LLM
+# calls add their tokens at the model's list price. Budgets (plan
+# max_cost_units per job, GLOBAL_BUDGET per rolling window) are in cost units.
+# -----------------------
+
+COST_UNIT_USD = 0.0001
+TOOL_CALL_UNITS = 1.0
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    # USD per million tokens
+    input: float
+    output: float
+
+
+PRICES: Dict[str, ModelPrice] = {
+    "gpt-4.1": ModelPrice(input=2.00, output=8.00),
+    "gpt-4.1-mini": ModelPrice(input=0.40, output=1.60),
+    "gpt-4.1-nano": ModelPrice(input=0.10, output=0.40),
+    "gpt-4o": ModelPrice(input=2.50, output=10.00),
+    "gpt-4o-mini": ModelPrice(input=0.15, output=0.60),
+    "gpt-5": ModelPrice(input=1.25, output=10.00),
+    "gpt-5-mini": ModelPrice(input=0.25, output=2.00),
+    "gpt-5-nano": ModelPrice(input=0.05, output=0.40),
+}
+# unknown models are priced high rather than free
+DEFAULT_PRICE = ModelPrice(input=10.00, output=30.00)
+
+
+@lru_cache(maxsize=8)
+def _overrides(raw: str) -> Dict[str, ModelPrice]:
+    # LLM_PRICES='{"my-model": [0.5, 1.5]}' (USD per million input / output tokens)
+    return {model: ModelPrice(input=float(p[0]), output=float(p[1])) for model, p in json.loads(raw).items()}
+
+
+def price_for(model: str) -> ModelPrice:
+    raw = os.getenv("LLM_PRICES")
+    if raw:
+        price = _overrides(raw).get(model)
+        if price is not None:
+            return price
+    price = PRICES.get(model)
+    if price is None:
+        # dated snapshots ("gpt-4.1-mini-2025-04-14") are priced like their base model
+        base = max((m for m in PRICES if model.startswith(m + "-")), key=len, default=None)
+        price = PRICES[base] if base else DEFAULT_PRICE
+    return price
+
+
+def usage_cost_units(usage: StepUsage) -> float:
+    usd = 0.0
+    for model, (tokens_in, tokens_out) in usage.by_model.items():
+        price = price_for(model)
+        usd += (tokens_in * price.input + tokens_out * price.output) / 1_000_000
+    return usd / COST_UNIT_USD
+
+
+# -----------------------
+# Global rolling budget (per process)
+# -----------------------
+
+
+class RollingBudget:
+    """
+    Cost units spent over the last window_s seconds, kept in BUCKETS time
+    buckets (memory stays constant however many calls are charged).
+    limit_units <= 0 disables the budget.
+    """
+
+    BUCKETS = 60
+
+    def __init__(self, *, window_s: float, limit_units: float) -> None:
+        self.window_s = window_s
+        self.limit_units = limit_units
+        self._bucket_s = window_s / self.BUCKETS
+        # [bucket start, units]
+        self._buckets: Deque[List[float]] = deque()
+        self._total = 0.0
+
+    def _expire(self, now: float) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self.window_s:
+            self._total -= self._buckets.popleft()[1]
+
+    def charge(self, units: float, *, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        start = now - now % self._bucket_s
+        if self._buckets and self._buckets[-1][0] == start:
+            self._buckets[-1][1] += units
+        else:
+            self._buckets.append([start, units])
+        self._total += units
+
+    def spent(self, *, now: float | None = None) -> float:
+        self._expire(time.monotonic() if now is None else now)
+        return max(self._total, 0.0)
+
+    def exceeded(self, *, now: float | None = None) -> bool:
+        return self.limit_units > 0 and self.spent(now=now) >= self.limit_units
+
+
+GLOBAL_BUDGET = RollingBudget(window_s=settings.cost_budget_window_s, limit_units=settings.cost_budget_units)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.events_bus import bus
+from app.db.models import Job
+from app.db.session import AsyncSessionLocal
+from app.extraction.chunking import merge_fields
+
+PROGRESS_SIGNAL = "extraction.progress"
+PROGRESS_EVENT = "progress"
+DEFAULT_MIN_WRITE_INTERVAL_S = 0.5
+
+
+class ExtractionProgress:
+    """
+    on_progress sink for one job run (see engine.ProgressCallback).
+
+    Every update is published on the event bus right away (SSE "progress"
+    events, not persisted as audit events). Intermediate state is also written
+    to signals["extraction.progress"] through its own short session, at most
+    once per min_write_interval_s, so pollers of GET /jobs/{id} see partial
+    fields while the run's own transaction is still open.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        *,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        min_write_interval_s: float = DEFAULT_MIN_WRITE_INTERVAL_S,
+    ) -> None:
+        self.job_id = job_id
+        self.session_factory = session_factory
+        self.min_write_interval_s = min_write_interval_s
+
+        self._chunks: Dict[int, Dict[str, Any]] = {}
+        self._done: Set[int] = set()
+        self._total = 1
+        self._truncated = False
+        self._last_write = 0.0
+        self._lock = asyncio.Lock()
+
+    def snapshot(self) -> Dict[str, Any] | None:
+        if not self._chunks and not self._done:
+            return None
+        fields = merge_fields([self._chunks[i] for i in sorted(self._chunks)]).fields
+        return {
+            "fields": fields,
+            "fields_done": sum(1 for v in fields.values() if v not in (None, "", [], {})),
+            "chunks": self._total,
+            "chunks_done": len(self._done),
+            "truncated": self._truncated,
+            "done": len(self._done) >= self._total,
+        }
+
+    async def __call__(self, info: Dict[str, Any]) -> None:
+        chunk = int(info.get("chunk", 0))
+        self._total = int(info.get("chunks", 1))
+        if isinstance(info.get("fields"), dict):
+            self._chunks[chunk] = info["fields"]
+        if info.get("truncated"):
+            self._truncated = True
+        if info.get("final"):
+            self._done.add(chunk)
+
+        progress = self.snapshot()
+        if progress is None:
+            return
+
+        bus.publish(
+            self.job_id,
+            {
+                "id": None,
+                "job_id": self.job_id,
+                "event_type": PROGRESS_EVENT,
+                "payload": progress,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+        # the finished state reaches signals with the run's own checkpoint commit
+        if progress["done"] or time.monotonic() - self._last_write < self.min_write_interval_s:
+            return
+        async with self._lock:
+            self._last_write = time.monotonic()
+            await self._persist(progress)
+
+    async def _persist(self, progress: Dict[str, Any]) -> None:
+        async with self.session_factory() as session:
+            res = await session.execute(select(Job.signals).where(Job.id == self.job_id))
+            signals = dict(res.scalar_one_or_none() or {})
+            signals[PROGRESS_SIGNAL] = progress
+            await session.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(signals=signals)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Job
+
+# -----------------------
+# DB-backed run queue with leases.
+#
+# A job is "queued" while jobs.run_requested_at is set. A worker claims it by
+# writing lease_owner/lease_expires_at with a conditional UPDATE, so several
+# worker processes can share one table. A crashed worker simply stops renewing
+# its lease; once it expires the job is claimable again.
+# -----------------------
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease_free(now: datetime):
+    return or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now)
+
+
+async def enqueue_job(session: AsyncSession, *, job_id: str) -> bool:
+    """
+    Mark job as requested to run. Idempotent: a job that is already queued
+    (or running) keeps its original position. Returns True if newly queued.
+    """
+    res = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.run_requested_at.is_(None))
+        .values(run_requested_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return res.rowcount == 1
+
+
+async def claim_next_job(
+    session: AsyncSession,
+    *,
+    owner: str,
+    lease_s: float,
+    scan: int = 8,
+) -> str | None:
+    """
+    Claim the oldest queued job whose lease is free. Returns job_id or None.
+    Only ids are selected here — never the full job row.
+    """
+    now = _now()
+    res = await session.execute(
+        select(Job.id)
+        .where(Job.run_requested_at.is_not(None), _lease_free(now))
+        .order_by(Job.run_requested_at.asc())
+        .limit(scan)
+    )
+    candidates = list(res.scalars().all())
+
+    for job_id in candidates:
+        upd = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.run_requested_at.is_not(None), _lease_free(now))
+            .values(
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_s),
+                run_attempts=Job.run_attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        if upd.rowcount == 1:
+            return job_id
+
+    return None
+
+
+async def renew_lease(session: AsyncSession, *, job_id: str, owner: str, lease_s: float) -> bool:
+    """Heartbeat. Returns False if the lease was lost (expired and taken by another worker)."""
+    res = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner)
+        .values(lease_expires_at=_now() + timedelta(seconds=lease_s))
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return res.rowcount == 1
+
+
+async def release_job(
+    session: AsyncSession,
+    *,
+    job_id: str,
+    owner: str,
+    done: bool = True,
+    retry_in_s: float | None = None,
+) -> None:
+    """
+    Drop the lease. done=True also removes the job from the queue;
+    done=False (shutdown) leaves it queued so another worker picks it up immediately,
+    and gives back this claim's attempt: only crashes count towards max_attempts.
+    With retry_in_s the job stays unclaimable that long (an ownerless lease
+    running out then), e.g. until an open circuit breaker lets calls through.
+    """
+    values: dict = {"lease_owner": None, "lease_expires_at": None}
+    if done:
+        values["run_requested_at"] = None
+        values["run_attempts"] = 0
+    else:
+        values["run_attempts"] = Job.run_attempts - 1
+        if retry_in_s:
+            values["lease_expires_at"] = _now() + timedelta(seconds=retry_in_s)
+
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def get_run_attempts(session: AsyncSession, *, job_id: str) -> int:
+    res = await session.execute(select(Job.run_attempts).where(Job.id == job_id))
+    return int(res.scalar_one_or_none() or 0)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Dict
+
+from app.core.config import settings
+from app.runtime.dsl import RetryPolicy
+from app.tools.errors import CircuitOpenError
+
+# -----------------------
+# Retry timing (PlanStep.retry) and per-tool circuit breakers.
+# -----------------------
+
+
+def backoff_s(policy: RetryPolicy, retry: int, *, rng: random.Random | None = None) -> float:
+    """
+    Delay before retry number `retry` (1-based): exponential from backoff_ms,
+    capped at max_backoff_ms, with "full jitter" (uniform in [0, delay]) so
+    jobs that failed together don't retry together.
+    """
+    if policy.backoff_ms <= 0:
+        return 0.0
+    delay_ms = min(policy.max_backoff_ms, policy.backoff_ms * (2 ** (retry - 1)))
+    return (rng or random).uniform(0, delay_ms) / 1000.0
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive upstream failures;
+    open -> half-open after `reset_s`: one trial call is let through, its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int, reset_s: float) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_s:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            raise CircuitOpenError(
+                f"circuit open for tool {self.name} ({self.failures} consecutive failures)",
+                retry_in_s=self.retry_in_s(),
+            )
+        if state == "half_open":
+            self._trial_in_flight = True
+
+    def retry_in_s(self) -> float:
+        """Seconds until a trial call may be let through (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_s - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """The call ended without an outcome (cancelled): free the half-open trial slot."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()  # (re)open
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(tool_name: str) -> CircuitBreaker:
+    breaker = _breakers.get(tool_name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            tool_name,
+            failure_threshold=settings.tool_breaker_failure_threshold,
+            reset_s=settings.tool_breaker_reset_s,
+        )
+        _breakers[tool_name] = breaker
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    return {name: b.state for name, b in _breakers.items()}
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import string
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Tuple
+
+# -----------------------
+# Deterministic document routing (no LLM).
+#
+# Every route has a signature of weighted features; a feature is a set of
+# alternative keywords or two-word phrases ("bill to", "governing law").
+# All signatures are compiled once into a single lookup table, so routing a
+# document is: normalize + tokenize its head (C-level str ops), build the sets
+# of words and adjacent word pairs, intersect them with the table. A feature
+# counts once per document (repeating a keyword does not make a document
+# "more" of a kind). The best route wins if its score and its margin over the
+# runner-up are high enough; otherwise the document goes to the general route.
+# -----------------------
+
+# only the head of a document is scanned: titles, headers and the first
+# paragraphs carry the routing signal, and the cost stays flat for long documents
+SCAN_CHARS = 8_000
+MIN_SCORE = 3.0
+MIN_CONFIDENCE = 0.6
+
+# punctuation splits words. One char -> one ASCII char only: that keeps
+# str.translate on its fast path (a multi-char replacement would drop it)
+_NORMALIZE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+# currency symbols count as the code word (found by substring test)
+_SYMBOLS = {"$": "usd", "€": "eur", "£": "gbp"}
+
+
+@dataclass(frozen=True)
+class Route:
+    domain: str
+    pipeline_id: str
+    schema_id: str
+
+
+GENERAL = Route(domain="general", pipeline_id="general.default", schema_id="general.v1")
+
+
+@dataclass(frozen=True)
+class Signature:
+    route: Route
+    # (alternatives, weight); an alternative is one lowercase word or two words
+    features: Tuple[Tuple[Tuple[str, ...], float], ...]
+
+
+SIGNATURES: Tuple[Signature, ...] = (
+    Signature(
+        route=Route(domain="finance", pipeline_id="finance.invoice", schema_id="finance.invoice.v1"),
+        features=(
+            (("invoice", "invoices"), 3.0),
+            (("invoice number", "invoice no", "invoice id"), 2.0),
+            (("bill to", "billed to", "sold to"), 2.0),
+            (("amount due", "balance due", "total due"), 2.0),
+            (("subtotal", "sub total"), 1.5),
+            (("vat", "gst", "sales tax"), 1.0),
+            (("payment terms",), 1.0),
+            (("net 30", "net 7", "net 10", "net 15", "net 45", "net 60", "net 90"), 1.0),
+            (("due date",), 1.0),
+            (("remit", "remittance"), 1.0),
+            (("purchase order", "po number"), 1.0),
+            (("iban", "swift", "bic"), 1.0),
+            (("usd", "eur", "gbp"), 0.5),
+        ),
+    ),
+    Signature(
+        route=Route(domain="legal", pipeline_id="legal.contract", schema_id="legal.contract.v1"),
+        features=(
+            (("witness whereof",), 2.0),
+            (("whereas",), 2.0),
+            (("governing law",), 2.5),
+            (("agreement", "contract"), 2.0),
+            (("and between",), 2.0),
+            (("hereinafter", "hereto", "hereby", "herein", "thereof", "hereunder"), 1.5),
+            (("effective date",), 1.5),
+            (("indemnify", "indemnifies", "indemnification"), 1.5),
+            (("parties",), 1.0),
+            (("terminate", "termination"), 1.0),
+            (("jurisdiction",), 1.0),
+            (("confidential", "confidentiality"), 0.5),
+        ),
+    ),
+)
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    route: Route
+    # confidence in the chosen route, 0..1 (for the general fallback: that no route applies)
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    # features that matched, as "<domain>:<first alternative>"
+    matched: Tuple[str, ...] = ()
+
+    @property
+    def domain(self) -> str:
+        return self.route.domain
+
+    @property
+    def pipeline_id(self) -> str:
+        return self.route.pipeline_id
+
+    @property
+    def schema_id(self) -> str:
+        return self.route.schema_id
+
+
+class Router:
+    def __init__(
+        self,
+        signatures: Tuple[Signature, ...],
+        *,
+        fallback: Route = GENERAL,
+        scan_chars: int = SCAN_CHARS,
+        min_score: float = MIN_SCORE,
+        min_confidence: float = MIN_CONFIDENCE,
+    ) -> None:
+        self.signatures = signatures
+        self.fallback = fallback
+        self.scan_chars = scan_chars
+        self.min_score = min_score
+        self.min_confidence = min_confidence
+
+        # feature id -> (signature index, weight, label)
+        self._features: List[Tuple[int, float, str]] = []
+        # word / (word, word) -> feature ids
+        self._table: Dict[str | Tuple[str, str], List[int]] = {}
+        for si, sig in enumerate(signatures):
+            for alternatives, weight in sig.features:
+                fid = len(self._features)
+                self._features.append((si, weight, f"{sig.route.domain}:{alternatives[0]}"))
+                for alt in alternatives:
+                    words = alt.lower().split()
+                    if len(words) not in (1, 2):
+                        raise ValueError(f"router feature must be one or two words: {alt!r}")
+                    key = words[0] if len(words) == 1 else (words[0], words[1])
+                    self._table.setdefault(key, []).append(fid)
+        self._words: FrozenSet[str] = frozenset(k for k in self._table if isinstance(k, str))
+        self._pairs: FrozenSet[Tuple[str, str]] = frozenset(k for k in self._table if isinstance(k, tuple))
+
+    def route(self, text: str) -> RoutingDecision:
+        head = (text or "")[: self.scan_chars]
+        tokens = head.lower().translate(_NORMALIZE).split()
+        hits = set(self._words.intersection(tokens))
+        hits.update(self._words.intersection(w for sym, w in _SYMBOLS.items() if sym in head))
+        hits.update(self._pairs.intersection(zip(tokens, tokens[1:])))
+
+        fired = sorted({fid for key in hits for fid in self._table[key]})
+        scores = [0.0] * len(self.signatures)
+        for fid in fired:
+            si, weight, _ = self._features[fid]
+            scores[si] += weight
+
+        by_domain = {sig.route.domain: scores[i] for i, sig in enumerate(self.signatures)}
+        matched = tuple(self._features[fid][2] for fid in fired)
+        if not self.signatures:
+            return RoutingDecision(route=self.fallback, confidence=1.0, scores=by_domain, matched=matched)
+
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        top = scores[ranked[0]]
+        second = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        # share of the evidence held by the winner, damped for thin evidence
+        confidence = top / (top + second + 1.0)
+
+        if top >= self.min_score and confidence >= self.min_confidence:
+            route = self.signatures[ranked[0]].route
+            return RoutingDecision(route=route, confidence=round(confidence, 3), scores=by_domain, matched=matched)
+        return RoutingDecision(
+            route=self.fallback,
+            confidence=round(1.0 - confidence, 3),
+            scores=by_domain,
+            matched=matched,
+        )
+
+
+ROUTER = Router(SIGNATURES)
+
+
+def route_document(text: str) -> RoutingDecision:
+    return ROUTER.route(text)
@@ -1,40 +1,39 @@
 from __future__ import annotations
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models import Job, JobStatus, AuditEventType
 from app.core.audit import write_audit_event
-from app.domain.job_service import set_job_status
-from app.runtime.executor import BoundedExecutor, ExecLimits, ExecState
+from app.core.metrics import VERDICTS
+from app.domain.documents import get_document_text
+from app.domain.job_service import transition_job_status
+from app.domain.state_machine import TransitionConflict
+from app.runtime.bindings import resolve
+from app.runtime.dsl import PlanStep
+from app.runtime.executor import AuditSink, BoundedExecutor, ExecLimits, ExecState
 from app.runtime.planner import build_plan
-from app.runtime.store import upsert_artifact, merge_signals
+from app.runtime.progress import PROGRESS_SIGNAL, ExtractionProgress
+from app.runtime.store import load_step_checkpoints, merge_signals, save_step_checkpoint, upsert_artifact
 from app.runtime.default_policy import DEFAULT_POLICY
 from app.tools.registry import ToolRegistry
 
 
+# runs of these jobs are no-ops
+TERMINAL_STATUSES = frozenset({
+    JobStatus.SUCCEEDED,
+    JobStatus.FAILED,
+    JobStatus.NEEDS_REVIEW,
+})
+
+
 # -----------------------
 # helpers (resume-safe)
 # -----------------------
 
-def _when_matches(when: dict | None, signals: dict) -> bool:
-    if when is None:
-        return True
-
-    sig = when.get("signal")
-    val = signals.get(sig)
-
-    if "equals" in when:
-        return val == when["equals"]
-    if "in" in when:
-        return val in when["in"]
-    if "in_" in when:  # defensive: non-aliased dump
-        return val in when["in_"]
-
-    return False
-
-
 def _status_order(s: JobStatus) -> int:
     return {
         JobStatus.RECEIVED: 10,
@@ -62,13 +61,21 @@ async def _advance_status(
     if _status_order(job.status) > _status_order(to_status):
         return
 
-    await set_job_status(
+    # One conditional UPDATE (CAS on the status we hold), committed by the caller
+    # at the next checkpoint. Losing the CAS means another worker moved the job.
+    res = await transition_job_status(
         session,
         job_id=job.id,
+        from_status=job.status,
         to_status=to_status,
         reason=reason,
+        commit=False,
     )
-    await session.refresh(job)
+    if not res.ok:
+        raise TransitionConflict(job_id=job.id, to_status=to_status)
+
+    # keep the in-memory row in sync without reloading it (and without marking it dirty)
+    set_committed_value(job, "status", to_status)
 
 
 async def _reload_job(session: AsyncSession, job_id: str) -> Job:
@@ -92,11 +99,7 @@ async def run_job(
     job = await _reload_job(session, job_id)
 
     # idempotency: already terminal
-    if job.status in {
-        JobStatus.SUCCEEDED,
-        JobStatus.FAILED,
-        JobStatus.NEEDS_REVIEW,
-    }:
+    if job.status in TERMINAL_STATUSES:
         return {
             "job_id": job_id,
             "final_status": job.status,
@@ -104,9 +107,14 @@ async def run_job(
             "note": f"no-op: job already terminal ({job.status})",
         }
 
-    if not job.source_text:
+    if not job.content_sha256:
         raise ValueError("job has no source_text")
 
+    # the only place a run touches the document body (content store, not the jobs row)
+    source_text = await get_document_text(session, job.content_sha256)
+    if not source_text:
+        raise ValueError("job document missing from content store")
+
     # PREPROCESSED
     if job.status == JobStatus.RECEIVED:
         await _advance_status(
@@ -122,7 +130,7 @@ async def run_job(
 
     plan, routing = build_plan(
         job_id=job_id,
-        source_text=job.source_text,
+        source_text=source_text,
     )
 
     domain = routing["domain"]
@@ -136,7 +144,9 @@ async def run_job(
             "routing.domain": domain,
             "routing.pipeline_id": pipeline_id,
             "routing.schema_id": schema_id,
+            "routing.confidence": routing["confidence"],
         },
+        commit=False,
     )
 
     await _advance_status(
@@ -160,6 +170,16 @@ async def run_job(
         reason="execution_started",
     )
 
+    # Steps completed by a previous (crashed) run are not re-executed:
+    # their recorded outputs are replayed into the run state instead.
+    # Read before the checkpoint commit, which then ends the transaction: the
+    # session holds no pooled connection while the waves' tools run (the tools
+    # and the lease heartbeat open sessions of their own).
+    checkpoints = await load_step_checkpoints(session, job_id=job_id)
+
+    # checkpoint: preprocess/route/plan transitions + routing signals in one commit
+    await session.commit()
+
     # -----------------------
     # EXECUTION
     # -----------------------
@@ -169,96 +189,136 @@ async def run_job(
             max_steps=plan.limits.max_steps,
             max_tool_calls=plan.limits.max_tool_calls,
             max_cost_units=plan.limits.max_cost_units,
-        )
+        ),
+        autocommit=False,
     )
     state = ExecState()
 
     signals: Dict[str, Any] = dict(job.signals or {})
+    progress = ExtractionProgress(job_id)
     ctx_base = {
         "job_id": job_id,
         "domain": domain,
+        "on_progress": progress,
+    }
+    # what $job.<field> bindings in step inputs resolve to
+    job_ctx = {
+        "id": job_id,
+        "source_text": source_text,
+        "domain": domain,
+        "pipeline_id": pipeline_id,
+        "schema_id": schema_id,
     }
 
-    extracted: dict | None = None
-    verification_report: dict | None = None
-
-    for step in plan.steps:
-        if step.type == "halt":
-            when_dict = step.when.model_dump(by_alias=True) if step.when else None
-            if _when_matches(when_dict, signals):
-                await write_audit_event(
-                    session,
-                    job_id=job_id,
-                    event_type=AuditEventType.EXECUTOR_HALTED,
-                    payload={"reason": step.reason},
+    # step id -> output (None: skipped by its `when`)
+    outputs: Dict[str, Dict[str, Any] | None] = {}
+
+    # The plan runs wave by wave (CompiledPlan.waves): every step of a wave depends only on
+    # earlier waves, so the wave's tools run concurrently. Their audit events are
+    # buffered and written afterwards in plan order, together with artifacts and
+    # step checkpoints, in one commit per wave: the trail never depends on which
+    # tool happened to finish first. A matching halt step stops the run before its wave.
+    for wave in plan.waves:
+        runnable: List[PlanStep] = []
+        halt: PlanStep | None = None
+        for compiled in wave:
+            step = compiled.step
+            if not compiled.matches(signals):
+                outputs[step.id] = None
+                continue
+            if step.type == "halt":
+                halt = halt or step
+                continue
+            runnable.append(step)
+
+        if halt is not None:
+            await write_audit_event(
+                session,
+                job_id=job_id,
+                event_type=AuditEventType.EXECUTOR_HALTED,
+                payload={"reason": halt.reason},
+                commit=False,
+            )
+            break
+
+        # policy is checked up front, one step at a time (a denial is written and committed)
+        for step in runnable:
+            if step.id not in checkpoints:
+                await executor.check_policy(session, job_id=job_id, tool_name=step.tool, policy=DEFAULT_POLICY)
+
+        sinks: Dict[str, AuditSink] = {step.id: [] for step in runnable}
+
+        async def run_step(step: PlanStep) -> Dict[str, Any]:
+            if step.id in checkpoints:
+                sinks[step.id].append(
+                    (
+                        AuditEventType.TOOL_RESULT,
+                        {
+                            "tool": step.tool,
+                            "step_id": step.id,
+                            "result_keys": list(checkpoints[step.id].keys()),
+                            "meta": {"checkpoint": "reused"},
+                        },
+                    )
                 )
-                break
-            continue
-
-        when_dict = step.when.model_dump(by_alias=True) if step.when else None
-        if not _when_matches(when_dict, signals):
-            continue
-
-        tool_fn = tools.get(step.tool)
-        inputs = dict(step.inputs)
-
-        if step.type == "extract":
-            inputs["source_text"] = job.source_text
-
-        if step.type == "verify":
-            inputs["source_text"] = job.source_text
-            inputs["extracted"] = extracted or {}
-
-        if step.tool in {"actions.export_json", "actions.draft_email"}:
-            inputs["extracted"] = extracted or {}
-
-        if step.tool == "actions.create_ticket":
-            inputs["report"] = verification_report or {}
-
-        result = await executor.run_tool(
-            session=session,
-            job_id=job_id,
-            tool_name=step.tool,
-            tool_fn=tool_fn,
-            inputs=inputs,
-            ctx={**ctx_base, "signals": signals},
-            state=state,
-            policy=DEFAULT_POLICY,
-        )
+                return checkpoints[step.id]
 
-        if step.type == "extract":
-            extracted = result.get("extracted", {})
-            await upsert_artifact(session, job_id=job_id, name="extracted_json", payload=extracted)
-            signals["extraction.ok"] = True
-
-        if step.type == "verify":
-            verification_report = result.get("report", {})
-            await upsert_artifact(
-                session,
+            return await executor.run_tool(
+                session=session,
                 job_id=job_id,
-                name="verification_report",
-                payload=verification_report,
+                tool_name=step.tool,
+                tool_fn=tools.get(step.tool),
+                inputs=resolve(step.inputs, job=job_ctx, steps=outputs, signals=signals),
+                ctx={**ctx_base, "signals": signals},
+                state=state,
+                policy=DEFAULT_POLICY,
+                retry=step.retry,
+                audit_sink=sinks[step.id],
+                step_id=step.id,
             )
-            signals["verification.verdict"] = verification_report.get("verdict")
 
-        if step.tool == "actions.export_json":
-            await upsert_artifact(session, job_id=job_id, name="export_result", payload=result)
+        results = await asyncio.gather(*(run_step(step) for step in runnable), return_exceptions=True)
+
+        failure: BaseException | None = None
+        for step, result in zip(runnable, results):
+            await executor.flush_audit(session, job_id=job_id, sink=sinks[step.id])
+            if isinstance(result, BaseException):
+                failure = failure or result
+                continue
+
+            outputs[step.id] = result
+            if step.id not in checkpoints:
+                if step.artifact:
+                    payload = resolve(step.artifact_from, job=job_ctx, steps=outputs, signals=signals, result=result)
+                    await upsert_artifact(session, job_id=job_id, name=step.artifact, payload=payload or {}, commit=False)
+                await save_step_checkpoint(
+                    session,
+                    job_id=job_id,
+                    step_id=step.id,
+                    tool=step.tool,
+                    output=result,
+                    commit=False,
+                )
+            for name, value in step.emits.items():
+                signals[name] = resolve(value, job=job_ctx, steps=outputs, signals=signals, result=result)
 
-        if step.tool == "actions.draft_email":
-            await upsert_artifact(session, job_id=job_id, name="email_draft", payload=result)
+        # checkpoint: the wave's events, artifacts and step records in one commit —
+        # a step is either fully recorded or re-run (events of a failed step are kept)
+        await session.commit()
+        if failure is not None:
+            raise failure
 
-        if step.tool == "actions.create_ticket":
-            await upsert_artifact(session, job_id=job_id, name="ticket", payload=result)
+    final_progress = progress.snapshot()
+    if final_progress is not None:
+        signals[PROGRESS_SIGNAL] = final_progress
 
     # -----------------------
     # FINALIZATION
     # -----------------------
 
-    job = await _reload_job(session, job_id)
-    await merge_signals(session, job=job, new_signals=signals)
-    await session.refresh(job)
+    await merge_signals(session, job=job, new_signals=signals, commit=False)
 
-    verdict = (job.signals or {}).get("verification.verdict")
+    verdict = signals.get("verification.verdict")
 
     await _advance_status(
         session,
@@ -282,7 +342,9 @@ async def run_job(
     else:
         await _advance_status(session, job=job, to_status=JobStatus.SUCCEEDED, reason="done_no_verdict")
 
-    job = await _reload_job(session, job_id)
+    # checkpoint: signals + final transitions (+ any halt event) in one commit
+    await session.commit()
+    VERDICTS.inc(domain, verdict or "none")
 
     return {
         "job_id": job_id,
@@ -1,14 +1,41 @@
 from __future__ import annotations
+from typing import Any, Dict
+
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Artifact, Job
+from app.db.models import Artifact, Job, StepCheckpoint
 
-async def upsert_artifact(session: AsyncSession, *, job_id: str, name: str, payload: dict) -> None:
+async def upsert_artifact(
+    session: AsyncSession, *, job_id: str, name: str, payload: dict, commit: bool = True
+) -> None:
     session.add(Artifact(job_id=job_id, name=name, payload=payload))
-    await session.commit()
+    if commit:
+        await session.commit()
 
-async def merge_signals(session: AsyncSession, *, job: Job, new_signals: dict) -> Job:
+async def merge_signals(session: AsyncSession, *, job: Job, new_signals: dict, commit: bool = True) -> Job:
     job.signals = {**(job.signals or {}), **new_signals}
-    await session.commit()
-    await session.refresh(job)
+    if commit:
+        await session.commit()
+        await session.refresh(job)
     return job
+
+async def save_step_checkpoint(
+    session: AsyncSession,
+    *,
+    job_id: str,
+    step_id: str,
+    tool: str | None,
+    output: Dict[str, Any],
+    commit: bool = True,
+) -> None:
+    session.add(StepCheckpoint(job_id=job_id, step_id=step_id, tool=tool, output=output))
+    if commit:
+        await session.commit()
+
+async def load_step_checkpoints(session: AsyncSession, *, job_id: str) -> Dict[str, Dict[str, Any]]:
+    """step_id -> recorded tool output for every completed step of the job."""
+    res = await session.execute(
+        select(StepCheckpoint.step_id, StepCheckpoint.output).where(StepCheckpoint.job_id == job_id)
+    )
+    return {step_id: output for step_id, output in res.all()}
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.db.models import AuditEvent, AuditEventType
+
+# -----------------------
+# Job timeline: the step spans recorded by the executor (TOOL_RESULT and
+# tool_failed ERROR payloads, see BoundedExecutor._span), placed on one axis.
+#
+# Offsets are relative to the start of the job's first run. Within a run they
+# come from the monotonic clock; separate runs (resume after a crash) are
+# placed by their wall-clock start. Gaps between the steps of a run are the
+# runner's own time: wave checkpoint commits and policy checks.
+# -----------------------
+
+
+def _span_events(events: Iterable[AuditEvent]) -> Iterable[Tuple[AuditEvent, Dict[str, Any]]]:
+    for e in events:
+        payload = e.payload or {}
+        span = payload.get("span")
+        if not isinstance(span, dict):
+            continue
+        if e.event_type == AuditEventType.TOOL_RESULT or (
+            e.event_type == AuditEventType.ERROR and payload.get("kind") == "tool_failed"
+        ):
+            yield e, span
+
+
+def _covered_ms(intervals: List[Tuple[float, float]]) -> float:
+    total, end = 0.0, float("-inf")
+    for s, e in sorted(intervals):
+        if e <= end:
+            continue
+        total += e - max(s, end)
+        end = e
+    return total
+
+
+def build_timeline(job_id: str, events: Iterable[AuditEvent]) -> Dict[str, Any]:
+    found = list(_span_events(events))
+    origin = min((span["run_started_at"] for _, span in found), default=0.0)
+
+    spans: List[Dict[str, Any]] = []
+    # run start -> [start_ms, end_ms] of the run's steps, on the job axis
+    runs: Dict[float, List[Tuple[float, float]]] = {}
+    for e, span in found:
+        shift = (span["run_started_at"] - origin) * 1000
+        start, end = span["start_ms"] + shift, span["end_ms"] + shift
+        runs.setdefault(span["run_started_at"], []).append((start, end))
+
+        meta = e.payload.get("meta") or {}
+        spans.append(
+            {
+                "event_id": e.id,
+                "step_id": e.payload.get("step_id"),
+                "tool": e.payload.get("tool"),
+                "outcome": "ok" if e.event_type == AuditEventType.TOOL_RESULT else "error",
+                "cache": meta.get("cache"),
+                **{k: v for k, v in span.items() if k not in ("run_started_at", "start_ms", "end_ms", "state")},
+                "start_ms": round(start, 3),
+                "end_ms": round(end, 3),
+            }
+        )
+    spans.sort(key=lambda s: (s["start_ms"], s["event_id"]))
+
+    # runs are measured from their first to their last step
+    wall_ms = sum(max(e for _, e in iv) - min(s for s, _ in iv) for iv in runs.values())
+    steps_ms = sum(_covered_ms(iv) for iv in runs.values())
+    llm_ms = sum(s["llm_ms"] for s in spans)
+    queue_ms = sum(s["queue_ms"] for s in spans)
+    backoff_ms = sum(s["backoff_ms"] for s in spans)
+    return {
+        "job_id": job_id,
+        "runs": len(runs),
+        "total_ms": round(max((s["end_ms"] for s in spans), default=0.0), 3),
+        "spans": spans,
+        # step figures are summed over steps: concurrent steps overlap, so they can exceed wall_ms
+        "breakdown": {
+            "wall_ms": round(wall_ms, 3),
+            "llm_ms": round(llm_ms, 3),
+            "queue_ms": round(queue_ms, 3),
+            "backoff_ms": round(backoff_ms, 3),
+            # step time outside LLM calls, admission and backoff: tool code and its I/O
+            "tool_ms": round(sum(s["duration_ms"] for s in spans) - llm_ms - queue_ms - backoff_ms, 3),
+            "between_steps_ms": round(wall_ms - steps_ms, 3),
+            "tokens_in": sum(s["tokens_in"] for s in spans),
+            "tokens_out": sum(s["tokens_out"] for s in spans),
+            "cost_units": round(sum(s["cost_units"] for s in spans), 4),
+        },
+    }
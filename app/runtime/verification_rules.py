@@ -2,17 +2,11 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
+from app.extraction.schemas import compile_schema
+from app.runtime.grounding import SourceIndex, ground_fields
 from app.tools.contracts import VerificationReport
 
 
-def _present_str(x: Any) -> bool:
-    return isinstance(x, str) and x.strip() != ""
-
-
-def _present_num(x: Any) -> bool:
-    return isinstance(x, (int, float))
-
-
 def _get_fields(extracted: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(extracted, dict):
         return {}
@@ -23,8 +17,10 @@ def _get_fields(extracted: Dict[str, Any]) -> Dict[str, Any]:
 def verify(domain: str, schema_id: str, source_text: str, extracted: Dict[str, Any]) -> VerificationReport:
     """
     Deterministic verification (no LLM).
-    Produces PASS/WARN/FAIL based on domain-specific checks.
+    Produces PASS/WARN/FAIL based on the checks of the job's schema
+    (routing keeps domain and schema_id consistent).
     """
+    schema = compile_schema(schema_id)
     fields = _get_fields(extracted)
 
     checks: List[Dict[str, Any]] = []
@@ -41,29 +37,49 @@ def verify(domain: str, schema_id: str, source_text: str, extracted: Dict[str, A
                 soft_fail = True
 
     # Universal checks
+    # (a typed schema lists every key, so look for at least one value)
     add_check(
         "has_fields",
-        passed=bool(fields),
+        passed=any(v not in (None, "", [], {}) for v in fields.values()),
         severity="HARD",
         details={"keys": list(fields.keys())[:20]},
     )
 
-    # Domain-specific checks (MVP)
-    if domain == "finance":
-        # Expect invoice-like fields if we route to finance.* (later we can tighten routing)
-        add_check("vendor_present", _present_str(fields.get("vendor")), "SOFT")
-        add_check("total_present", _present_num(fields.get("total")) or _present_str(fields.get("total")), "SOFT")
-        add_check("currency_present", _present_str(fields.get("currency")), "SOFT")
-
-    elif domain == "legal":
-        add_check("parties_present", bool(fields.get("parties")), "SOFT")
-        add_check("effective_date_present", _present_str(fields.get("effective_date")), "SOFT")
-        add_check("governing_law_present", _present_str(fields.get("governing_law")), "SOFT")
+    if schema.spec.typed:
+        # values coerced to the schema's types; garbage is nulled and reported
+        checked = schema.validate(fields)
+        missing = set(schema.missing_required(checked.fields))
+        for f in schema.spec.fields:
+            if f.required:
+                add_check(f"{f.name}_present", f.name not in missing, "SOFT")
+
+        invalid = list(extracted.get("invalid") or []) + checked.errors
+        add_check(
+            "fields_valid",
+            passed=not invalid,
+            severity="SOFT",
+            details={"invalid": invalid[:20], "unknown": checked.unknown[:20]},
+        )
 
     else:
         # general: keep minimal
         add_check("non_empty_example_or_summary", bool(fields), "SOFT")
 
+    # Grounding: every extracted value must occur in the source (hallucination guard)
+    values = {k: v for k, v in fields.items() if v not in (None, "", [], {})}
+    if values and source_text:
+        grounding = ground_fields(
+            SourceIndex(source_text),
+            values,
+            types={f.name: f.type for f in schema.spec.fields},
+        )
+        add_check(
+            "grounded",
+            passed=not grounding.ungrounded,
+            severity="SOFT",
+            details=grounding.to_details(),
+        )
+
     if hard_fail:
         verdict = "FAIL"
     elif soft_fail:
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.audit import write_audit_event
+from app.core.config import settings
+from app.db.models import AuditEventType, JobStatus
+from app.db.session import CONNECTIONS_PER_WORKER, POOL_CAPACITY, AsyncSessionLocal
+from app.domain.job_service import set_job_status
+from app.domain.state_machine import TransitionConflict
+from app.extraction.engine import aclose_client
+from app.runtime.queue import claim_next_job, get_run_attempts, release_job, renew_lease
+from app.runtime.runner import run_job
+from app.tools.errors import CircuitOpenError
+from app.tools.init_tools import build_tool_registry
+from app.tools.registry import ToolRegistry
+
+log = logging.getLogger(__name__)
+
+# In-process pool (if any) — lets the API wake workers right after enqueue
+# instead of waiting for the next poll tick.
+_active_pool: "WorkerPool | None" = None
+
+
+def notify_enqueued() -> None:
+    if _active_pool is not None:
+        _active_pool.wakeup()
+
+
+async def _fail_job(session: AsyncSession, *, job_id: str, reason: str, error: str) -> None:
+    # keep the audit trail written since the last runner checkpoint (e.g. TOOL_CALLED
+    # of the failing step); if the session itself is broken, drop it
+    try:
+        await session.commit()
+    except Exception:
+        await session.rollback()
+
+    # never leave a job in EXECUTING; do not mask the original error if this fails
+    try:
+        await set_job_status(session, job_id=job_id, to_status=JobStatus.FAILED, reason=reason)
+    except Exception:
+        log.exception("failed to mark job %s as FAILED", job_id)
+
+    try:
+        await write_audit_event(
+            session,
+            job_id=job_id,
+            event_type=AuditEventType.ERROR,
+            payload={"error": error, "kind": reason},
+        )
+    except Exception:
+        log.exception("failed to audit error for job %s", job_id)
+
+
+async def execute_job(session: AsyncSession, *, job_id: str, tools: ToolRegistry) -> dict | None:
+    """
+    Run one job to completion and finalize it on failure:
+    - If policy denies a tool, the job is finalized as FAILED (policy_denied).
+    - An open circuit breaker is not the job's fault: CircuitOpenError is raised
+      to the caller, which puts the job back in the queue (steps done so far are
+      checkpointed and reused by the next run).
+    - Any unexpected error finalizes the job as FAILED (run_failed).
+    """
+    try:
+        return await run_job(session=session, job_id=job_id, tools=tools)
+
+    except PermissionError as e:
+        # runner already wrote POLICY_DENIED
+        await _fail_job(session, job_id=job_id, reason="policy_denied", error=str(e))
+
+    except asyncio.CancelledError:
+        raise
+
+    except CircuitOpenError as e:
+        log.warning("job %s: %s; requeued", job_id, e)
+        try:
+            await session.commit()  # the failed step's trail
+            await write_audit_event(
+                session,
+                job_id=job_id,
+                event_type=AuditEventType.ERROR,
+                payload={"error": str(e), "kind": "circuit_open", "retry_in_ms": int(e.retry_in_s * 1000)},
+            )
+        except Exception:
+            log.exception("failed to audit circuit_open for job %s", job_id)
+        raise
+
+    except TransitionConflict as e:
+        # someone else (another worker / an operator) moved the job — it is not ours to fail
+        log.warning("job %s: %s; abandoning run", job_id, e)
+        await session.rollback()
+
+    except Exception as e:
+        log.exception("job %s failed", job_id)
+        await _fail_job(session, job_id=job_id, reason="run_failed", error=str(e))
+
+    return None
+
+
+class WorkerPool:
+    """
+    N async workers claiming queued jobs via DB leases.
+
+    Several pools (e.g. `python -m app.runtime.worker` in separate processes)
+    can run against the same database; the lease makes claims exclusive.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int | None = None,
+        tools: ToolRegistry | None = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        poll_interval_s: float | None = None,
+        lease_s: float | None = None,
+        heartbeat_s: float | None = None,
+        max_attempts: int | None = None,
+    ) -> None:
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.tools = tools or build_tool_registry()
+        self.session_factory = session_factory
+        self.poll_interval_s = poll_interval_s or settings.worker_poll_interval_s
+        self.lease_s = lease_s or settings.worker_lease_s
+        self.heartbeat_s = heartbeat_s or settings.worker_heartbeat_s
+        self.max_attempts = max_attempts or settings.worker_max_attempts
+
+        self.pool_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+    # -----------------------
+    # lifecycle
+    # -----------------------
+
+    async def start(self) -> None:
+        global _active_pool
+        needed = self.concurrency * CONNECTIONS_PER_WORKER
+        if self.session_factory is AsyncSessionLocal and needed > POOL_CAPACITY:
+            # workers would queue on the pool and time out their tool calls instead
+            raise RuntimeError(
+                f"{self.concurrency} workers need up to {needed} DB connections, the pool has {POOL_CAPACITY}: "
+                "set WORKER_CONCURRENCY (the pool is sized from it) or DB_POOL_SIZE"
+            )
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self.pool_id}:{i}"), name=f"docops-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        _active_pool = self
+        log.info("worker pool %s started (%d workers)", self.pool_id, self.concurrency)
+
+    async def stop(self) -> None:
+        global _active_pool
+        self._stopping = True
+        if _active_pool is self:
+            _active_pool = None
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        log.info("worker pool %s stopped", self.pool_id)
+
+    async def run_forever(self) -> None:
+        await self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def wakeup(self) -> None:
+        self._wakeup.set()
+
+    # -----------------------
+    # worker loop
+    # -----------------------
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_s)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker_loop(self, owner: str) -> None:
+        while not self._stopping:
+            try:
+                async with self.session_factory() as session:
+                    job_id = await claim_next_job(session, owner=owner, lease_s=self.lease_s)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("worker %s: claim failed", owner)
+                job_id = None
+
+            if job_id is None:
+                await self._idle()
+                continue
+
+            await self._process(job_id, owner)
+
+    async def _heartbeat(self, job_id: str, owner: str, run_task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            try:
+                async with self.session_factory() as session:
+                    still_owner = await renew_lease(session, job_id=job_id, owner=owner, lease_s=self.lease_s)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("worker %s: heartbeat failed for job %s", owner, job_id)
+                continue
+
+            if not still_owner:
+                log.warning("worker %s: lost lease on job %s, aborting run", owner, job_id)
+                run_task.cancel()
+                return
+
+    async def _process(self, job_id: str, owner: str) -> None:
+        done = True
+        retry_in_s: float | None = None
+        async with self.session_factory() as session:
+            attempts = await get_run_attempts(session, job_id=job_id)
+            if attempts > self.max_attempts:
+                # previous workers kept dying on this job — stop retrying it
+                await _fail_job(
+                    session,
+                    job_id=job_id,
+                    reason="max_attempts_exceeded",
+                    error=f"job claimed {attempts} times without completing",
+                )
+                await release_job(session, job_id=job_id, owner=owner, done=True)
+                return
+
+            run_task = asyncio.create_task(execute_job(session, job_id=job_id, tools=self.tools))
+            hb_task = asyncio.create_task(self._heartbeat(job_id, owner, run_task))
+            try:
+                await asyncio.shield(run_task)
+            except asyncio.CancelledError:
+                # either pool shutdown (leave job queued) or lease lost (someone else owns it now)
+                run_task.cancel()
+                await asyncio.gather(run_task, return_exceptions=True)
+                done = False
+                if self._stopping:
+                    raise
+            except CircuitOpenError as e:
+                # back in the queue once the breaker may let a trial call through
+                done = False
+                retry_in_s = max(e.retry_in_s, self.poll_interval_s)
+            finally:
+                hb_task.cancel()
+                await asyncio.gather(hb_task, return_exceptions=True)
+                try:
+                    await session.rollback()
+                    await release_job(session, job_id=job_id, owner=owner, done=done, retry_in_s=retry_in_s)
+                except Exception:
+                    log.exception("worker %s: release failed for job %s", owner, job_id)
+
+
+# -----------------------
+# standalone worker process
+# -----------------------
+
+async def _serve(concurrency: int) -> None:
+    try:
+        await WorkerPool(concurrency=concurrency).run_forever()
+    finally:
+        await aclose_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DocOps background job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+    asyncio.run(_serve(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
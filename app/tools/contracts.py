@@ -11,6 +11,8 @@ class ExtractionInput(BaseModel):
 
 class ExtractionOutput(BaseModel):
     extracted: Dict[str, Any]
+    # non-sensitive run metadata, copied into the TOOL_RESULT audit event (e.g. {"cache": "hit"})
+    meta: Dict[str, Any] = Field(default_factory=dict)
 
 class VerificationInput(BaseModel):
     domain: str
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+
+class ToolError(RuntimeError):
+    # retryable errors may succeed if the same call is simply made again
+    retryable = False
+    # upstream errors are the backend's own failures; only these trip the circuit breaker
+    upstream = False
+
+
+class ToolExecutionError(ToolError):
+    """The tool ran and failed (bad input, bad output, bug). Retrying won't help."""
+
+
+class TransientToolError(ToolError):
+    """Backend hiccup (timeout, connection, 429/5xx). Safe to retry."""
+
+    retryable = True
+
+
+class UpstreamToolError(TransientToolError):
+    """The backend itself failed (connection, 429, 5xx), as opposed to our own queueing or deadlines."""
+
+    upstream = True
+
+
+class ToolTimeoutError(TransientToolError):
+    pass
+
+
+class CircuitOpenError(ToolError):
+    """The tool's circuit breaker is open: failing fast without calling the backend."""
+
+    def __init__(self, message: str, *, retry_in_s: float = 0.0) -> None:
+        super().__init__(message)
+        # until the breaker lets a trial call through
+        self.retry_in_s = retry_in_s
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, ToolError):
+        return exc.retryable
+    return isinstance(exc, (asyncio.TimeoutError, ConnectionError))
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    if isinstance(exc, ToolError):
+        return exc.upstream
+    return isinstance(exc, ConnectionError)
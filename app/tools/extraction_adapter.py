@@ -3,18 +3,23 @@ from __future__ import annotations
 import asyncio
 from typing import Any, Dict
 
-from app.extraction.engine import extract_fields
-from app.tools.contracts import ExtractionInput, ExtractionOutput
-
-
-class ToolTimeoutError(RuntimeError):
-    pass
+import openai
 
+from app.extraction.cache import cached_extract
+from app.extraction.engine import call_rounds
+from app.extraction.limiter import AdmissionTimeout, call_deadline
+from app.tools.contracts import ExtractionInput, ExtractionOutput
+from app.tools.errors import ToolExecutionError, ToolTimeoutError, TransientToolError, UpstreamToolError
 
-class ToolExecutionError(RuntimeError):
-    pass
+# model-side failures worth retrying (the SDK already retried the HTTP call itself)
+_UPSTREAM_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
 
 
+# per round of chunk calls: a long document gets one budget per round it needs (call_rounds)
 DEFAULT_EXTRACTION_TIMEOUT_S = 20
 
 
@@ -25,14 +30,23 @@ async def _call_existing_extractor(
     source_text: str,
     ctx: Dict[str, Any],
 ) -> Dict[str, Any]:
-    fields = await extract_fields(
+    result, cache_hit = await cached_extract(
         schema_id=schema_id,
         pipeline_id=pipeline_id,
         source_text=source_text,
+        on_progress=ctx.get("on_progress"),
     )
-    if not isinstance(fields, dict):
+    if not isinstance(result.fields, dict):
         raise ToolExecutionError("extract_fields() must return a dict")
-    return {"fields": fields}
+    return {
+        "fields": result.fields,
+        "cache_hit": cache_hit,
+        "provenance": result.provenance,
+        "conflicts": result.conflicts,
+        "invalid": result.invalid,
+        "chunks": result.chunks,
+        "truncated": result.truncated,
+    }
 
 
 async def extraction_run_real(inputs: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
@@ -46,22 +60,33 @@ async def extraction_run_real(inputs: Dict[str, Any], ctx: Dict[str, Any]) -> Di
         timeout_s = int(timeout_s_raw)
     except Exception:
         timeout_s = DEFAULT_EXTRACTION_TIMEOUT_S
+    rounds = call_rounds(data.source_text)
+    timeout_s *= rounds
 
     try:
-        raw = await asyncio.wait_for(
-            _call_existing_extractor(
-                schema_id=data.schema_id,
-                pipeline_id=data.pipeline_id,
-                source_text=data.source_text,
-                ctx=ctx,
-            ),
-            timeout=timeout_s,
-        )
+        with call_deadline(timeout_s):
+            raw = await asyncio.wait_for(
+                _call_existing_extractor(
+                    schema_id=data.schema_id,
+                    pipeline_id=data.pipeline_id,
+                    source_text=data.source_text,
+                    ctx=ctx,
+                ),
+                timeout=timeout_s,
+            )
     except asyncio.TimeoutError as e:
-        raise ToolTimeoutError(f"extraction timed out after {timeout_s}s") from e
+        raise ToolTimeoutError(f"extraction timed out after {timeout_s}s ({rounds} round(s) of chunk calls)") from e
+    except _UPSTREAM_ERRORS as e:
+        raise UpstreamToolError(f"extraction failed: {type(e).__name__}: {e}") from e
+    except AdmissionTimeout as e:
+        # our own limiter queue, not the model: retried, but no mark against its breaker
+        raise TransientToolError(f"extraction failed: {type(e).__name__}: {e}") from e
     except Exception as e:
         raise ToolExecutionError(f"extraction failed: {type(e).__name__}: {e}") from e
 
+    cache_hit = bool(raw.get("cache_hit")) if isinstance(raw, dict) else False
+    chunking = raw if isinstance(raw, dict) and "chunks" in raw else {}
+
     if isinstance(raw, dict) and isinstance(raw.get("fields"), dict):
         fields = raw["fields"]
     elif isinstance(raw, dict):
@@ -69,11 +94,25 @@ async def extraction_run_real(inputs: Dict[str, Any], ctx: Dict[str, Any]) -> Di
     else:
         raise ToolExecutionError("extractor returned invalid type (expected dict)")
 
-    out = ExtractionOutput(
-        extracted={
-            "schema_id": data.schema_id,
-            "pipeline_id": data.pipeline_id,
-            "fields": fields,
-        }
-    )
+    extracted: Dict[str, Any] = {
+        "schema_id": data.schema_id,
+        "pipeline_id": data.pipeline_id,
+        "fields": fields,
+    }
+    meta: Dict[str, Any] = {"cache": "hit" if cache_hit else "miss"}
+    if isinstance(raw, dict) and raw.get("invalid"):
+        # values the schema rejected (nulled in fields); verification reports them
+        extracted["invalid"] = raw["invalid"]
+        meta["invalid"] = len(raw["invalid"])
+    if chunking:
+        # which chunk of the document each field came from
+        extracted["provenance"] = chunking.get("provenance") or {}
+        if chunking.get("conflicts"):
+            extracted["conflicts"] = chunking["conflicts"]
+        meta["chunks"] = chunking.get("chunks", 1)
+        meta["conflicts"] = len(chunking.get("conflicts") or [])
+        if chunking.get("truncated"):
+            meta["truncated"] = True
+
+    out = ExtractionOutput(extracted=extracted, meta=meta)
     return out.model_dump()
@@ -9,17 +9,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.templating import Jinja2Templates
 
 from app.core.audit import write_audit_event
+from app.core.metrics import record_transition
 from app.db.models import Artifact, AuditEvent, AuditEventType, Job, JobStatus
 from app.db.session import get_session
-from app.runtime.runner import run_job
-from app.tools.init_tools import build_tool_registry
+from app.domain.documents import get_document_text, put_document
+from app.runtime.queue import enqueue_job
+from app.runtime.runner import TERMINAL_STATUSES
+from app.runtime.timeline import build_timeline
+from app.runtime.worker import notify_enqueued
 
 router = APIRouter(tags=["ui"])
 templates = Jinja2Templates(directory="app/ui/templates")
 
-# Build registry once (module-level). Tools should be pure / stateless.
-tool_registry = build_tool_registry()
-
 
 # -----------------------
 # Home (root UI)
@@ -44,17 +45,16 @@ async def ui_create_job(
     session: AsyncSession = Depends(get_session),
 ):
     job_id = str(uuid.uuid4())
+    content_sha256 = await put_document(session, text) if text else None
     job = Job(
         id=job_id,
         status=JobStatus.RECEIVED,
         filename=filename,
         content_type=content_type,
-        source_text=text,
+        content_sha256=content_sha256,
         signals={},
     )
     session.add(job)
-    await session.commit()
-    await session.refresh(job)
 
     await write_audit_event(
         session,
@@ -63,10 +63,11 @@ async def ui_create_job(
         payload={
             "filename": job.filename,
             "content_type": job.content_type,
-            "has_text": bool(job.source_text),
+            "has_text": bool(job.content_sha256),
         },
     )
 
+    record_transition(job.id, JobStatus.RECEIVED.value)
     return RedirectResponse(url=f"/ui/jobs/{job.id}", status_code=303)
 
 
@@ -100,13 +101,19 @@ async def ui_job_detail(
         {
             "request": request,
             "job": job,
+            "source_text": await get_document_text(session, job.content_sha256),
             "events": events,
             "artifacts": artifacts,
+            "timeline": build_timeline(job.id, events),
         },
     )
 
 
 @router.post("/ui/jobs/{job_id}/run")
 async def ui_run_job(job_id: str, session: AsyncSession = Depends(get_session)):
-    await run_job(session=session, job_id=job_id, tools=tool_registry)
+    res = await session.execute(select(Job.status).where(Job.id == job_id))
+    status = res.scalar_one_or_none()
+    if status is not None and status not in TERMINAL_STATUSES:
+        await enqueue_job(session, job_id=job_id)
+        notify_enqueued()
     return RedirectResponse(url=f"/ui/jobs/{job_id}", status_code=303)
@@ -0,0 +1,104 @@
+"""
+Micro-benchmarks of the per-job hot paths that run without I/O.
+
+    python -m benchmarks.bench_micro [--rounds 2000] [--out micro.json]
+
+build_plan (routing + compiled plan lookup), verify (schema checks and
+grounding), _robust_parse (direct and locally repaired model output) and
+ensure_transition_allowed. Prints p50/p99 per call in microseconds.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.db.models import JobStatus
+from app.domain.state_machine import TransitionError, ensure_transition_allowed
+from app.extraction.engine import _robust_parse
+from app.runtime.planner import build_plan
+from app.runtime.verification_rules import verify
+from benchmarks.bench_router import CONTRACT, CONTRACT_FIELDS, INVOICE, INVOICE_FIELDS
+from benchmarks.common import metric, new_result, summarize, write_result
+
+CLEAN_OUTPUT = json.dumps(INVOICE_FIELDS)
+FENCED_OUTPUT = "```json\n" + CLEAN_OUTPUT[:-2] + ",},\n```"
+TRUNCATED_OUTPUT = CLEAN_OUTPUT[: int(len(CLEAN_OUTPUT) * 0.7)]
+
+
+def _transition_denied() -> None:
+    try:
+        ensure_transition_allowed(JobStatus.SUCCEEDED, JobStatus.EXECUTING)
+    except TransitionError:
+        pass
+
+
+def _sample(fn: Callable[[], Any], rounds: int) -> List[float]:
+    fn()  # warm-up (compiled plans/schemas, lazy indexes)
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+async def _sample_async(fn: Callable[[], Awaitable[Any]], rounds: int) -> List[float]:
+    await fn()
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def run(rounds: int) -> Dict[str, Dict[str, float]]:
+    sync_cases: Dict[str, Callable[[], Any]] = {
+        "build_plan.invoice": lambda: build_plan(job_id="bench", source_text=INVOICE),
+        "build_plan.contract": lambda: build_plan(job_id="bench", source_text=CONTRACT),
+        "verify.invoice": lambda: verify("finance", "finance.invoice.v1", INVOICE, INVOICE_FIELDS),
+        "verify.contract": lambda: verify("legal", "legal.contract.v1", CONTRACT, CONTRACT_FIELDS),
+        "ensure_transition_allowed.ok": lambda: ensure_transition_allowed(JobStatus.EXECUTING, JobStatus.VERIFIED),
+        "ensure_transition_allowed.denied": _transition_denied,
+    }
+    async_cases: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "robust_parse.direct": lambda: _robust_parse(CLEAN_OUTPUT),
+        "robust_parse.local_repair": lambda: _robust_parse(FENCED_OUTPUT),
+        "robust_parse.truncated": lambda: _robust_parse(TRUNCATED_OUTPUT),
+    }
+
+    out = {name: summarize(_sample(fn, rounds)) for name, fn in sync_cases.items()}
+    for name, fn in async_cases.items():
+        out[name] = summarize(asyncio.run(_sample_async(fn, rounds)))
+    return out
+
+
+def add_metrics(result: Dict[str, Any], stats: Dict[str, Dict[str, float]]) -> None:
+    for name, s in stats.items():
+        result["metrics"][f"micro.{name}.p50_us"] = metric(s["p50"], "us")
+        result["metrics"][f"micro.{name}.p99_us"] = metric(s["p99"], "us")
+    result["details"]["micro"] = stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rounds", type=int, default=2000)
+    ap.add_argument("--out", default=None, help="write results as JSON (see benchmarks/compare.py)")
+    args = ap.parse_args()
+
+    stats = run(args.rounds)
+    print(f"{'case':<34} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    for name, s in stats.items():
+        print(f"{name:<34} {s['p50']:>9.1f} {s['p99']:>9.1f} {s['max']:>9.1f}")
+
+    if args.out:
+        result = new_result(vars(args))
+        add_metrics(result, stats)
+        write_result(result, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+End-to-end throughput benchmark: create -> run -> fetch artifacts, through the
+FastAPI app (in process, ASGI) with its worker pool, against a fresh SQLite DB.
+
+    python -m benchmarks.bench_pipeline [--levels 1,10,100,1000] [--llm-latency uniform:50,150]
+                                        [--workers 16] [--out pipeline.json] [--trace-memory]
+
+The LLM is the in-process fake backend (EXTRACTION_BACKEND=fake, see
+app/extraction/fake_llm.py) with the given latency, answering with fixtures:
+the correct fields of the invoice and contract documents, so every job runs
+the whole pipeline (extract, verify PASS, actions) and ends SUCCEEDED. Numbers
+measure the platform (HTTP, queue, workers, DB, parsing), not a provider.
+Every document is unique, so the extraction cache never hits.
+
+Per concurrency level C, max(C, --min-jobs) jobs run with at most C in flight:
+  - jobs/s
+  - p50/p95/p99 per client stage: create, enqueue, complete (run -> terminal),
+    artifacts, end_to_end
+  - p50/p95/p99 per executed step (server side, from /jobs/{id}/timeline)
+  - DB commits per job, peak RSS (and with --trace-memory the Python heap peak)
+  - the final status mix: a job ending anything but SUCCEEDED (or erroring)
+    fails the run (exit 1) unless --allow-failures, so a broken pipeline
+    can't pass as a throughput result
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from benchmarks.bench_router import CONTRACT, CONTRACT_FIELDS, INVOICE, INVOICE_FIELDS
+from benchmarks.common import metric, new_result, summarize, write_result
+
+TERMINAL = ("SUCCEEDED", "FAILED", "NEEDS_REVIEW")
+EXPECTED_STATUS = "SUCCEEDED"
+
+
+def _configure(args: argparse.Namespace) -> str:
+    # before anything imports app.core.config / app.db.session
+    workdir = tempfile.mkdtemp(prefix="docops-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    fixtures_path = os.path.join(workdir, "fixtures.json")
+    with open(fixtures_path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"match": "Northwind Traders", **INVOICE_FIELDS},
+            {"match": "SERVICES AGREEMENT", **CONTRACT_FIELDS},
+        ], f)
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["EXTRACTION_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_FIXTURES"] = fixtures_path
+    os.environ["FAKE_LLM_LATENCY"] = args.llm_latency
+    os.environ["WORKER_ENABLED"] = "true"
+    os.environ["WORKER_CONCURRENCY"] = str(args.workers)
+    os.environ["WORKER_POLL_INTERVAL_S"] = str(args.poll_ms / 1000)
+    # a long run must not trip the per-process spend guard
+    os.environ["COST_BUDGET_UNITS"] = "0"
+    return db_path
+
+
+def _document(level: int, i: int) -> str:
+    # a reference line keeps documents unique (cache misses) without touching the fixture fields
+    return (CONTRACT if i % 2 else INVOICE) + f"Ref: bench-{level}-{i:06d}\n"
+
+
+# -----------------------
+# One job, client side
+# -----------------------
+
+
+async def _job(client: Any, level: int, i: int, args: argparse.Namespace) -> Dict[str, Any]:
+    stages: Dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    r = await client.post("/jobs", json={"filename": f"bench-{i}.txt", "content_type": "text/plain", "text": _document(level, i)})
+    r.raise_for_status()
+    job_id = r.json()["id"]
+    t1 = time.perf_counter()
+    stages["create"] = t1 - t0
+
+    r = await client.post(f"/jobs/{job_id}/run")
+    r.raise_for_status()
+    t2 = time.perf_counter()
+    stages["enqueue"] = t2 - t1
+
+    # back off: a thousand clients polling every few ms would starve the
+    # event loop the workers run on and measure the benchmark, not the app
+    poll_s = args.poll_ms / 1000
+    deadline = t2 + args.timeout_s
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in TERMINAL and not job.get("run_requested_at"):
+            break
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"job {job_id} still {job['status']} after {args.timeout_s}s")
+        await asyncio.sleep(poll_s)
+        poll_s = min(poll_s * 1.5, args.poll_max_ms / 1000)
+    t3 = time.perf_counter()
+    stages["complete"] = t3 - t2
+
+    r = await client.get(f"/jobs/{job_id}/artifacts")
+    r.raise_for_status()
+    t4 = time.perf_counter()
+    stages["artifacts"] = t4 - t3
+    stages["end_to_end"] = t4 - t0
+
+    return {"job_id": job_id, "status": job["status"], "stages": stages}
+
+
+async def _level(client: Any, level: int, args: argparse.Namespace, commits: List[int]) -> Dict[str, Any]:
+    n_jobs = max(level, args.min_jobs)
+    sem = asyncio.Semaphore(level)
+
+    async def one(i: int) -> Any:
+        async with sem:
+            try:
+                return await _job(client, level, i, args)
+            except Exception as e:
+                return e
+
+    if args.trace_memory:
+        tracemalloc.reset_peak()
+    commits_before = commits[0]
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(n_jobs)))
+    elapsed = time.perf_counter() - t0
+    n_commits = commits[0] - commits_before
+
+    done = [r for r in results if not isinstance(r, Exception)]
+    errors = Counter(type(r).__name__ for r in results if isinstance(r, Exception))
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for r in done:
+        for name, seconds in r["stages"].items():
+            stages[name].append(seconds * 1000)
+
+    # server-side step durations, off the clock
+    steps: Dict[str, List[float]] = defaultdict(list)
+    breakdown: Dict[str, List[float]] = defaultdict(list)
+    for r in done[: args.timeline_sample]:
+        tl = (await client.get(f"/jobs/{r['job_id']}/timeline")).json()
+        for span in tl["spans"]:
+            steps[span["tool"] or span["step_id"] or "?"].append(span["duration_ms"])
+        for key in ("llm_ms", "queue_ms", "backoff_ms", "between_steps_ms"):
+            breakdown[key].append(tl["breakdown"][key])
+
+    out: Dict[str, Any] = {
+        "concurrency": level,
+        "jobs": n_jobs,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round(len(done) / elapsed, 3) if elapsed else 0.0,
+        "statuses": dict(Counter(r["status"] for r in done)),
+        "succeeded_ratio": round(sum(r["status"] == EXPECTED_STATUS for r in done) / n_jobs, 4),
+        "errors": dict(errors),
+        "db_commits_per_job": round(n_commits / n_jobs, 2),
+        "stages_ms": {name: summarize(v) for name, v in stages.items()},
+        "steps_ms": {name: summarize(v) for name, v in sorted(steps.items())},
+        "breakdown_ms": {name: summarize(v) for name, v in breakdown.items()},
+        # ru_maxrss: KiB on Linux, bytes on macOS; peak for the whole process so far
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }
+    if args.trace_memory:
+        out["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    return out
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import httpx
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.main import create_app
+
+    commits = [0]
+
+    def _count_commit(session: Session) -> None:
+        commits[0] += 1
+
+    event.listen(Session, "after_commit", _count_commit)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    app = create_app()
+    levels = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for level in args.levels:
+                levels.append(await _level(client, level, args, commits))
+                _print_level(levels[-1])
+    event.remove(Session, "after_commit", _count_commit)
+    await engine.dispose()
+    return levels
+
+
+# -----------------------
+# Output
+# -----------------------
+
+
+def _print_level(lv: Dict[str, Any]) -> None:
+    print(
+        f"\nconcurrency {lv['concurrency']}: {lv['jobs']} jobs in {lv['elapsed_s']:.2f}s"
+        f" = {lv['jobs_per_s']:.1f} jobs/s, {lv['db_commits_per_job']} commits/job,"
+        f" peak RSS {lv['peak_rss_mb']} MB" + (f", heap peak {lv['py_heap_peak_mb']} MB" if "py_heap_peak_mb" in lv else "")
+    )
+    print(f"  statuses {lv['statuses']}" + (f"  errors {lv['errors']}" if lv["errors"] else ""))
+    print(f"  {'stage / step (ms)':<28} {'p50':>9} {'p95':>9} {'p99':>9} {'n':>6}")
+    for group in ("stages_ms", "steps_ms", "breakdown_ms"):
+        for name, s in lv[group].items():
+            print(f"  {name:<28} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} {s['n']:>6}")
+
+
+def add_metrics(result: Dict[str, Any], levels: List[Dict[str, Any]]) -> None:
+    m = result["metrics"]
+    for lv in levels:
+        prefix = f"pipeline.c{lv['concurrency']}"
+        m[f"{prefix}.jobs_per_s"] = metric(lv["jobs_per_s"], "jobs/s", better="higher")
+        m[f"{prefix}.db_commits_per_job"] = metric(lv["db_commits_per_job"], "commits")
+        m[f"{prefix}.peak_rss_mb"] = metric(lv["peak_rss_mb"], "MB")
+        m[f"{prefix}.errors"] = metric(sum(lv["errors"].values()), "jobs")
+        m[f"{prefix}.succeeded_ratio"] = metric(lv["succeeded_ratio"], "ratio", better="higher")
+        for group in ("stages_ms", "steps_ms"):
+            for name, s in lv[group].items():
+                for p in ("p50", "p95", "p99"):
+                    m[f"{prefix}.{name}.{p}_ms"] = metric(s[p], "ms")
+    result["details"]["pipeline"] = levels
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--levels", default="1,10,100,1000", help="comma-separated concurrency levels")
+    ap.add_argument("--min-jobs", type=int, default=20, help="jobs per level at least (low levels need a sample)")
+    ap.add_argument("--llm-latency", default="uniform:50,150", help="fake LLM latency (fixed:MS, uniform:LO,HI, lognormal:MEDIAN,SIGMA)")
+    ap.add_argument("--workers", type=int, default=16, help="WORKER_CONCURRENCY of the in-process pool")
+    ap.add_argument("--poll-ms", type=float, default=50.0, help="first client poll delay and worker idle poll interval")
+    ap.add_argument("--poll-max-ms", type=float, default=1000.0, help="client poll delay cap (bounds the resolution of 'complete')")
+    ap.add_argument("--timeout-s", type=float, default=600.0, help="per-job wait before it counts as an error")
+    ap.add_argument("--timeline-sample", type=int, default=200, help="jobs per level whose step timeline is fetched")
+    ap.add_argument("--allow-failures", action="store_true", help=f"don't exit 1 when jobs end other than {EXPECTED_STATUS}")
+    ap.add_argument("--trace-memory", action="store_true", help="also track the Python heap peak (tracemalloc; slows the run)")
+    ap.add_argument("--out", default=None, help="write results as JSON (see benchmarks/compare.py)")
+    args = ap.parse_args()
+    args.levels = [int(x) for x in args.levels.split(",") if x.strip()]
+
+    db_path = _configure(args)
+    if args.trace_memory:
+        tracemalloc.start()
+    print(f"db {db_path}, llm latency {args.llm_latency}, {args.workers} workers")
+    levels = asyncio.run(run(args))
+
+    if args.out:
+        result = new_result({k: v for k, v in vars(args).items()})
+        add_metrics(result, levels)
+        write_result(result, args.out)
+
+    bad = [lv for lv in levels if lv["succeeded_ratio"] < 1.0]
+    if bad and not args.allow_failures:
+        for lv in bad:
+            print(f"concurrency {lv['concurrency']}: statuses {lv['statuses']}, errors {lv['errors']}", file=sys.stderr)
+        sys.exit(f"not every job ended {EXPECTED_STATUS}: the numbers above are not a valid throughput result")
+
+
+if __name__ == "__main__":
+    main()
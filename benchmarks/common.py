@@ -0,0 +1,70 @@
+"""
+Helpers shared by the benchmarks: percentiles and the result file format.
+
+A result file is JSON:
+
+    {"meta": {"commit": ..., "python": ..., "created_at": ..., "args": {...}},
+     "metrics": {"<suite>.<name>": {"value": 12.3, "unit": "ms", "better": "lower"}, ...},
+     "details": {...}}
+
+`metrics` is flat so two files can be diffed key by key (benchmarks/compare.py);
+`details` holds whatever else a suite wants to keep (per-level breakdowns).
+"""
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import time
+from typing import Any, Dict, Iterable, List
+
+
+def pct(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "n": len(ordered),
+        "p50": round(pct(ordered, 0.50), 3),
+        "p95": round(pct(ordered, 0.95), 3),
+        "p99": round(pct(ordered, 0.99), 3),
+        "max": round(ordered[-1], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def new_result(args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "args": args,
+        },
+        "metrics": {},
+        "details": {},
+    }
+
+
+def write_result(result: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"results written to {path}")
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files (e.g. main vs. a branch).
+
+    python -m benchmarks.compare base.json new.json [--threshold 0.10] [--all]
+
+Matches metrics by key and prints the relative change of each; a change in the
+wrong direction (see each metric's "better") beyond --threshold is a
+regression. Exits 1 if there is any, so it can gate CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], *, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    rows = []
+    for key in sorted(base["metrics"].keys() & new["metrics"].keys()):
+        b, n = base["metrics"][key], new["metrics"][key]
+        if b["value"] == 0:
+            change = 0.0 if n["value"] == 0 else float("inf")
+        else:
+            change = (n["value"] - b["value"]) / abs(b["value"])
+        worse = change < -threshold if b.get("better") == "higher" else change > threshold
+        rows.append((key, b["value"], n["value"], change, worse))
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.10, help="relative change that counts (0.10 = 10%%)")
+    ap.add_argument("--all", action="store_true", help="print every metric, not only changes beyond the threshold")
+    args = ap.parse_args()
+
+    base, new = _load(args.base), _load(args.new)
+    print(f"base {base['meta'].get('commit')} ({base['meta'].get('created_at')})")
+    print(f"new  {new['meta'].get('commit')} ({new['meta'].get('created_at')})\n")
+
+    rows = compare(base, new, threshold=args.threshold)
+    regressions = 0
+    print(f"{'metric':<56} {'base':>11} {'new':>11} {'change':>8}")
+    for key, b, n, change, worse in rows:
+        regressions += worse
+        if args.all or abs(change) > args.threshold:
+            flag = "  REGRESSION" if worse else ""
+            print(f"{key:<56} {b:>11.3f} {n:>11.3f} {change:>+8.1%}{flag}")
+
+    only = (base["metrics"].keys() ^ new["metrics"].keys())
+    if only:
+        print(f"\n{len(only)} metric(s) only in one file (different levels or cases), not compared")
+    print(f"\n{len(rows)} compared, {regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()